@@ -0,0 +1,37 @@
+"""Access to the TimeTable engine without Home Assistant.
+
+The package ``__init__`` of the integration imports Home Assistant, but the
+schedule engine (compiled schedule, vacations, overlay, rotation, edits and
+occurrences) only depends on the standard library. The integration directory
+is therefore registered as the path of a bare namespace package, so those
+modules import each other through their relative imports without running
+the package ``__init__``. The coordinator and the entity platforms load
+the same way but also need Home Assistant to be installed, as does the
+simulator built on them in ``simulator.py``.
+"""
+from __future__ import annotations
+
+import importlib
+import json
+from pathlib import Path
+import sys
+import types
+from typing import Any
+
+PACKAGE = "timetable_engine"
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "custom_components" / "timetable"
+
+
+def load(name: str) -> Any:
+    """Import an engine module, e.g. ``load("schedule")``."""
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [str(PACKAGE_DIR)]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{name}")
+
+
+def manifest_version() -> str:
+    """Return the integration version the benchmark runs against."""
+    with open(PACKAGE_DIR / "manifest.json", encoding="utf-8") as file:
+        return json.load(file)["version"]
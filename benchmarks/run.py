@@ -0,0 +1,345 @@
+"""Benchmark the TimeTable schedule engine with synthetic timetables.
+
+Every scenario loads a set of synthetic timetables into the coordinator and
+boundary scheduler of the integration, as the simulator does, and replays
+the simulated week under a fake clock that jumps from boundary to boundary.
+It measures compile time, refresh latency, allocations per refresh, wakeups
+and state writes per day, and the cost of an edit compared to a full
+recompile. Home Assistant must be installed.
+
+Run from the repository root:
+
+    python benchmarks/run.py --output report.json
+    python benchmarks/run.py --quick --baseline report.json
+
+With ``--baseline`` the timings are compared to an earlier report and the
+exit status is 1 if any of them regressed by more than ``--threshold``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, time, timedelta
+import gc
+from itertools import count, product
+import json
+import platform
+from statistics import fmean, median
+import sys
+from time import perf_counter_ns
+import tracemalloc
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from engine import load, manifest_version
+from simulator import Simulator, async_simulated_hass
+import synthetic
+
+schedule_module = load("schedule")
+edits_module = load("edits")
+
+TIME_ZONE = ZoneInfo("Europe/Berlin")
+
+# Exceptions added to every synthetic timetable
+EXCEPTIONS = 10
+
+MATRIX = {
+    "lessons_per_day": (1, 10, 50, 200),
+    "vacations": (0, 100, 1000),
+    "entries": (1, 10, 100),
+}
+QUICK_MATRIX = {
+    "lessons_per_day": (1, 50),
+    "vacations": (0, 1000),
+    "entries": (1, 10),
+}
+
+# Report values compared against a baseline; lower is better for all
+COMPARED = (
+    "compile_ms",
+    "refresh_us.p50",
+    "refresh_us.p95",
+    "intraday_refresh_us",
+    "alloc_bytes_per_refresh",
+    "edit_ms",
+    "recompile_ms",
+    "state_writes_per_day",
+    "wakeups_per_day",
+)
+
+
+def _percentiles(samples: list[float]) -> dict[str, float]:
+    """Return summary statistics of ``samples``."""
+    ordered = sorted(samples)
+    return {
+        "mean": round(fmean(ordered), 3),
+        "p50": round(ordered[len(ordered) // 2], 3),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+async def _async_timed_ms(
+    function: Callable[[], Awaitable[None]], repeat: int = 5
+) -> float:
+    """Return the median run time of ``function`` in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter_ns()
+        await function()
+        samples.append((perf_counter_ns() - start) / 1e6)
+    return round(median(samples), 3)
+
+
+def _timed_refresh(
+    action: Callable[[], Awaitable[None]], latencies: list[float]
+) -> Callable[[], Awaitable[None]]:
+    """Return ``action`` recording its latency in microseconds."""
+
+    async def _async_refresh() -> None:
+        start = perf_counter_ns()
+        await action()
+        latencies.append((perf_counter_ns() - start) / 1e3)
+
+    return _async_refresh
+
+
+async def _async_simulators(
+    hass: Any, datasets: list[dict[str, Any]], options: dict[str, Any]
+) -> list[Any]:
+    """Load one timetable per dataset, with its entities, on ``hass``."""
+    simulators = []
+    for index, data in enumerate(datasets):
+        simulator = Simulator(
+            hass, data, options, entry_id=f"benchmark_{index}"
+        )
+        await simulator.async_setup()
+        simulators.append(simulator)
+    return simulators
+
+
+async def async_simulate_week(
+    datasets: list[dict[str, Any]], options: dict[str, Any]
+) -> dict[str, Any]:
+    """Replay the simulated week and return refresh timings and counts.
+
+    Every timetable runs in a TimetableCoordinator driven by the shared
+    boundary scheduler, so one wakeup refreshes every timetable whose
+    boundary has been reached.
+    """
+    midnight = datetime.combine(synthetic.SIMULATED_WEEK, time(), tzinfo=TIME_ZONE)
+    end = midnight + timedelta(days=7)
+    latencies: list[float] = []
+    async with async_simulated_hass(midnight) as hass:
+        simulators = await _async_simulators(hass, datasets, options)
+        scheduler = simulators[0].scheduler
+        refreshes = []
+        for simulator in simulators:
+            refresh = _timed_refresh(simulator.coordinator.async_refresh, latencies)
+            scheduler.async_register(simulator.entry.entry_id, refresh)
+            refreshes.append(refresh)
+        # Like the first refresh of every entry after a restart
+        for refresh in refreshes:
+            await refresh()
+        while (timer := scheduler.timer) is not None and timer < end:
+            await scheduler.async_fire()
+
+    writes = sum(sum(simulator.writes.values()) for simulator in simulators)
+    # Every refresh notifies the listener of each entity
+    notified = len(latencies) * len(simulators[0].entity_keys)
+    return {
+        "refresh_us": _percentiles(latencies),
+        "refreshes_per_day": round(len(latencies) / 7, 1),
+        "wakeups_per_day": round((scheduler.wakeups + 1) / 7, 1),
+        "state_writes_per_day": round(writes / 7, 1),
+        "suppressed_writes_per_day": round((notified - writes) / 7, 1),
+    }
+
+
+async def async_intraday_refresh_us(coordinator: Any, repeat: int = 2000) -> float:
+    """Return the mean latency of refreshes served from the day snapshot."""
+    await coordinator.async_refresh()
+    start = perf_counter_ns()
+    for _ in range(repeat):
+        await coordinator.async_refresh()
+    return round((perf_counter_ns() - start) / 1e3 / repeat, 3)
+
+
+async def async_alloc_bytes_per_refresh(coordinator: Any) -> int:
+    """Return the peak memory allocated by one boundary refresh."""
+    await coordinator.async_refresh()
+    coordinator.clock.advance(timedelta(minutes=1))
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        await coordinator.async_refresh()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+async def async_edit_ms(coordinator: Any) -> float:
+    """Return the cost of adding a lesson, including the following refresh."""
+    # Every run adds a lesson in a free slot before the synthetic lessons
+    slots = count()
+
+    async def run() -> None:
+        start = next(slots) * 10
+        lesson = {
+            "subject": "Extra",
+            "start_time": f"{start // 60:02d}:{start % 60:02d}",
+            "end_time": f"{start // 60:02d}:{start % 60 + 5:02d}",
+        }
+        edit = edits_module.ScheduleEdit(coordinator.store.data)
+        edit.add_lesson("monday", lesson)
+        await coordinator.async_apply_edit(edit)
+
+    return await _async_timed_ms(run)
+
+
+async def async_recompile_ms(coordinator: Any) -> float:
+    """Return the cost of a full recompile, including the following refresh."""
+    entry = coordinator.config_entry
+    # Every run changes the options, which recompiles the schedule
+    runs = count()
+
+    async def run() -> None:
+        entry.options = {**entry.options, "name": f"Benchmark {next(runs)}"}
+        await coordinator.async_options_updated()
+
+    return await _async_timed_ms(run)
+
+
+async def async_probe(
+    data: dict[str, Any], options: dict[str, Any]
+) -> dict[str, Any]:
+    """Measure the refresh, edit and recompile paths of one timetable."""
+    now = datetime.combine(synthetic.SIMULATED_WEEK, time(10, 2), tzinfo=TIME_ZONE)
+    async with async_simulated_hass(now) as hass:
+        (simulator,) = await _async_simulators(hass, [data], options)
+        coordinator = simulator.coordinator
+        return {
+            "intraday_refresh_us": await async_intraday_refresh_us(coordinator),
+            "alloc_bytes_per_refresh": await async_alloc_bytes_per_refresh(
+                coordinator
+            ),
+            "edit_ms": await async_edit_ms(coordinator),
+            "recompile_ms": await async_recompile_ms(coordinator),
+        }
+
+
+async def async_run_scenario(
+    lessons_per_day: int, vacations: int, entries: int
+) -> dict[str, Any]:
+    """Benchmark one combination of timetable size and number of entries."""
+    datasets = [
+        synthetic.timetable(seed, lessons_per_day, vacations, EXCEPTIONS)
+        for seed in range(entries)
+    ]
+    options: dict[str, Any] = {}
+
+    async def compile_schedule() -> None:
+        schedule_module.CompiledSchedule.from_data(datasets[0], options)
+
+    return {
+        "lessons_per_day": lessons_per_day,
+        "vacations": vacations,
+        "entries": entries,
+        "compile_ms": await _async_timed_ms(compile_schedule),
+        **await async_simulate_week(datasets, options),
+        **await async_probe(datasets[0], options),
+    }
+
+
+def _value(result: dict[str, Any], path: str) -> float | None:
+    """Return the value at a dotted ``path`` of a scenario result."""
+    value: Any = result
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def compare(
+    report: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """Return a line per value that regressed by more than ``threshold``."""
+
+    def key(result: dict[str, Any]) -> tuple[int, int, int]:
+        return result["lessons_per_day"], result["vacations"], result["entries"]
+
+    previous = {key(result): result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        if (old := previous.get(key(result))) is None:
+            continue
+        for path in COMPARED:
+            new_value, old_value = _value(result, path), _value(old, path)
+            if not new_value or not old_value:
+                continue
+            if new_value > old_value * (1 + threshold):
+                regressions.append(
+                    f"{key(result)} {path}: {old_value} -> {new_value} "
+                    f"(+{new_value / old_value - 1:.0%})"
+                )
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmarks and write the report."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--quick", action="store_true", help="run a reduced matrix")
+    parser.add_argument("--baseline", help="compare with an earlier JSON report")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="relative slowdown reported as a regression (default 0.2)",
+    )
+    args = parser.parse_args()
+
+    matrix = QUICK_MATRIX if args.quick else MATRIX
+    results = []
+    for lessons_per_day, vacations, entries in product(*matrix.values()):
+        result = asyncio.run(
+            async_run_scenario(lessons_per_day, vacations, entries)
+        )
+        results.append(result)
+        print(
+            f"lessons/day={lessons_per_day:<4} vacations={vacations:<5} "
+            f"entries={entries:<4} refresh p50={result['refresh_us']['p50']}us "
+            f"writes/day={result['state_writes_per_day']} "
+            f"edit={result['edit_ms']}ms recompile={result['recompile_ms']}ms",
+            file=sys.stderr,
+        )
+
+    report = {
+        "version": manifest_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "quick": args.quick,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            regressions = compare(report, json.load(file), args.threshold)
+        for line in regressions:
+            print(f"Regression: {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Replay a week or a school year of a timetable under a fake clock.
+
+The timetable is run by the coordinator and boundary scheduler of the
+integration, which need Home Assistant to be installed. Prints the wakeups,
+state transitions and entity writes of the replay as JSON. With
+``--verify`` the state is also evaluated at every minute to prove that no
+transition happens between two wakeups.
+
+Run from the repository root:
+
+    python benchmarks/simulate.py --days 7 --verify
+    python benchmarks/simulate.py --schedule my_schedule.json --days 365
+
+``--schedule`` takes the ``data`` of a ``.storage/timetable.storage.*``
+file or any JSON object with ``lessons`` and ``vacations``; without it a
+synthetic timetable is replayed.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from datetime import date, datetime, time, timedelta
+import json
+import sys
+from time import perf_counter
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from simulator import Simulator, async_simulated_hass
+import synthetic
+
+
+
+async def async_replay(
+    data: dict[str, Any], options: dict[str, Any], start: datetime, args: Any
+) -> dict[str, Any]:
+    """Replay the timetable and return the summary."""
+    async with async_simulated_hass(start) as hass:
+        simulator = Simulator(hass, data, options)
+        await simulator.async_setup()
+        began = perf_counter()
+        await simulator.async_run(start + timedelta(days=args.days), verify=args.verify)
+        summary = {
+            **simulator.summary(),
+            "seconds": round(perf_counter() - began, 3),
+        }
+        if args.transitions:
+            summary["transition_log"] = [
+                {
+                    "at": transition.at.isoformat(),
+                    "key": transition.key,
+                    "new": transition.new,
+                }
+                for transition in simulator.transitions
+            ]
+    return summary
+
+
+def main() -> int:
+    """Run the replay and print its summary."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--schedule", help="JSON file with the stored schedule")
+    parser.add_argument("--options", help="JSON file with the entry options")
+    parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        default=synthetic.SIMULATED_WEEK,
+        help="first day of the replay (default: the synthetic week)",
+    )
+    parser.add_argument("--days", type=int, default=7, help="days to replay")
+    parser.add_argument("--time-zone", default="Europe/Berlin")
+    parser.add_argument("--lessons", type=int, default=8, help="synthetic lessons per day")
+    parser.add_argument("--vacations", type=int, default=0, help="synthetic vacations")
+    parser.add_argument("--verify", action="store_true", help="check every minute")
+    parser.add_argument(
+        "--transitions", action="store_true", help="include every transition"
+    )
+    args = parser.parse_args()
+
+    if args.schedule:
+        with open(args.schedule, encoding="utf-8") as file:
+            data = json.load(file)
+        data = data.get("data", data)
+    else:
+        data = synthetic.timetable(0, args.lessons, args.vacations)
+    options = {}
+    if args.options:
+        with open(args.options, encoding="utf-8") as file:
+            options = json.load(file)
+
+    start = datetime.combine(args.start, time(), tzinfo=ZoneInfo(args.time_zone))
+    summary = asyncio.run(async_replay(data, options, start, args))
+    json.dump(summary, sys.stdout, indent=2, default=str)
+    print()
+    return 1 if summary["missed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
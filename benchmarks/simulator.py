@@ -0,0 +1,232 @@
+"""Deterministic replay of a timetable under a fake clock.
+
+The simulator runs the real TimetableCoordinator and BoundaryScheduler on an
+unstarted Home Assistant instance. Only the timer of the scheduler is
+replaced: instead of waiting for the wall clock, the simulator moves a fake
+clock to the armed instant and fires the timer, so a whole school year
+replays in seconds. Every wakeup, every change of the coordinator data and
+every state write of the entities is recorded, so the accuracy of the
+boundaries and the wakeups and state writes per day can be checked without
+a running Home Assistant instance.
+
+The simulator is a development tool and not part of the integration; it
+loads the integration modules through ``engine.load``.
+"""
+from __future__ import annotations
+
+from collections.abc import AsyncIterator, Mapping
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from functools import partial
+from tempfile import TemporaryDirectory
+from typing import Any, NamedTuple
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+from homeassistant.util import slugify
+
+from engine import load
+
+clock_module = load("clock")
+const_module = load("const")
+coordinator_module = load("coordinator")
+scheduler_module = load("scheduler")
+store_module = load("store")
+
+
+class Transition(NamedTuple):
+    """A change of one coordinator data key."""
+
+    at: datetime
+    key: str
+    old: Any
+    new: Any
+
+
+class SimulatedEntry:
+    """The parts of a config entry read by the coordinator and its entities."""
+
+    def __init__(
+        self, entry_id: str, options: Mapping[str, Any], title: str = "Simulated"
+    ) -> None:
+        """Initialize the entry of the default schedule."""
+        self.entry_id = entry_id
+        self.title = title
+        self.data: dict[str, Any] = {}
+        self.options = dict(options)
+
+
+class SimulatedScheduler(scheduler_module.BoundaryScheduler):
+    """Boundary scheduler whose timer is fired by the simulator."""
+
+    def __init__(self, hass: HomeAssistant, clock: clock_module.FakeClock) -> None:
+        """Initialize the scheduler with the clock it advances."""
+        super().__init__(hass)
+        self.clock = clock
+        # Instant the timer is armed for
+        self.timer: datetime | None = None
+
+    @callback
+    def _async_track(self, when: datetime) -> CALLBACK_TYPE:
+        """Arm the timer without scheduling anything on the event loop."""
+        self.timer = when
+
+        @callback
+        def _async_cancel() -> None:
+            self.timer = None
+
+        return _async_cancel
+
+    async def async_fire(self) -> datetime:
+        """Move the clock to the armed instant and fire the timer."""
+        if (when := self.timer) is None:
+            raise RuntimeError("The timer is not armed")
+        self.timer = None
+        self.clock.advance_to(max(when, self.clock.now()))
+        await self._async_fire(when)
+        return when
+
+
+@asynccontextmanager
+async def async_simulated_hass(start: datetime) -> AsyncIterator[HomeAssistant]:
+    """Yield an unstarted Home Assistant instance with a simulated scheduler.
+
+    The fake clock of the scheduler starts at ``start``. Storage files are
+    written to a temporary configuration directory.
+    """
+    with TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.data[const_module.DATA_SCHEDULER] = SimulatedScheduler(
+            hass, clock_module.FakeClock(start)
+        )
+        try:
+            yield hass
+        finally:
+            await hass.async_stop(force=True)
+
+
+async def async_create_entities(
+    hass: HomeAssistant, entry: SimulatedEntry
+) -> dict[str, Entity]:
+    """Create the entities of a loaded timetable, keyed by entity ID."""
+    entities: dict[str, Entity] = {}
+    for platform in const_module.PLATFORMS:
+        module = load(platform)
+        added: list[Entity] = []
+        await module.async_setup_entry(hass, entry, added.extend)
+        for entity in added:
+            entities[f"{platform}.{slugify(str(entity.name))}"] = entity
+    return entities
+
+
+class Simulator:
+    """Replay the stored schedule ``data`` through a coordinator on ``hass``.
+
+    ``hass`` comes from ``async_simulated_hass``, and the replay starts at
+    the time of its fake clock. Entities are counted as written whenever the
+    coordinator notifies them.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        data: Mapping[str, Any],
+        options: Mapping[str, Any],
+        entry_id: str = "simulated",
+    ) -> None:
+        """Initialize the coordinator of the timetable."""
+        self.hass = hass
+        self.scheduler: SimulatedScheduler = hass.data[const_module.DATA_SCHEDULER]
+        self.clock = self.scheduler.clock
+        self.start = self.clock.now()
+        self.entry = SimulatedEntry(entry_id, options)
+        self.store = store_module.TimetableStore(hass, entry_id)
+        self.store.data = {**self.store.data, **data}
+        self.coordinator = coordinator_module.TimetableCoordinator(
+            hass, self.entry, self.store, self.clock
+        )
+        hass.data.setdefault(const_module.DOMAIN, {})[entry_id] = {
+            "coordinator": self.coordinator,
+            "store": self.store,
+        }
+        # Data keys of the entities, which they pass to the coordinator
+        self.entity_keys: dict[str, tuple[str, ...]] = {}
+        self.writes: dict[str, int] = {}
+        self.state: dict[str, Any] = {}
+        self.wakeups: list[datetime] = []
+        self.transitions: list[Transition] = []
+        # Minutes at which the state differed from the last refresh
+        self.missed: list[datetime] = []
+
+    async def async_setup(self) -> None:
+        """Create the entities and listen to the coordinator as they do."""
+        entities = await async_create_entities(self.hass, self.entry)
+        for entity_id, entity in entities.items():
+            # Entities without data keys, like the statistics sensor, are
+            # notified of every refresh but disabled by default
+            if entity.coordinator_context is None:
+                continue
+            self.entity_keys[entity_id] = entity.coordinator_context
+            self.writes[entity_id] = 0
+            self.coordinator.async_add_listener(
+                partial(self._async_count_write, entity_id), entity.coordinator_context
+            )
+        self.coordinator.async_add_listener(self._async_record)
+
+    @callback
+    def _async_count_write(self, entity_id: str) -> None:
+        """Count a state write of an entity."""
+        self.writes[entity_id] += 1
+
+    @callback
+    def _async_record(self) -> None:
+        """Record the keys that changed since the last refresh."""
+        state = self.coordinator.data
+        previous = self.state
+        now = self.clock.now()
+        self.transitions.extend(
+            Transition(now, key, previous.get(key), state[key])
+            for key in sorted(state)
+            if key not in previous or previous[key] != state[key]
+        )
+        self.state = state
+
+    def _verify(self, until: datetime) -> None:
+        """Evaluate every minute before ``until`` against the last refresh."""
+        minute = self.clock.now().replace(second=0, microsecond=0)
+        while (minute := minute + timedelta(minutes=1)) < until:
+            if self.coordinator.evaluate(minute) != self.state:
+                self.missed.append(minute)
+
+    async def async_run(self, until: datetime, verify: bool = False) -> None:
+        """Replay until ``until``, firing the scheduler from boundary to boundary.
+
+        With ``verify`` the state is also evaluated at every minute between
+        two wakeups; minutes at which it differs from the state of the last
+        wakeup are boundaries the schedule failed to report.
+        """
+        if not self.wakeups:
+            self.wakeups.append(self.clock.now())
+            await self.coordinator.async_refresh()
+        while (timer := self.scheduler.timer) is not None and timer < until:
+            if verify:
+                self._verify(timer)
+            self.wakeups.append(await self.scheduler.async_fire())
+        if verify:
+            self._verify(until)
+        self.clock.advance_to(max(until, self.clock.now()))
+
+    def summary(self) -> dict[str, Any]:
+        """Return the counts of the replay so far."""
+        days = max((self.clock.now() - self.start) / timedelta(days=1), 1)
+        writes = sum(self.writes.values())
+        return {
+            "days": round(days, 2),
+            "wakeups": len(self.wakeups),
+            "wakeups_per_day": round(len(self.wakeups) / days, 2),
+            "transitions": len(self.transitions),
+            "writes": writes,
+            "writes_per_day": round(writes / days, 2),
+            "writes_per_entity": dict(self.writes),
+            "missed": [minute.isoformat() for minute in self.missed],
+        }
@@ -0,0 +1,111 @@
+"""Synthetic timetables for the benchmarks.
+
+Timetables are generated from a seed, so every run and every release
+benchmarks the same data. Lessons snap to a five minute bell grid, so
+timetables generated with different seeds still share many boundaries,
+like classes of one school do.
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+import random
+from typing import Any
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday")
+
+# Week that is simulated; vacations are placed around it
+SIMULATED_WEEK = date(2026, 9, 14)
+
+# Years before and after the simulated week that vacations spread over
+VACATION_YEARS = 30
+
+
+def _time(minute: int) -> str:
+    """Return a minute of day as ``HH:MM``."""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def lessons(rng: random.Random, count: int) -> list[dict[str, Any]]:
+    """Return ``count`` lessons of one day, overlapping when they do not fit."""
+    result = []
+    minute = 7 * 60
+    for number in range(count):
+        length = rng.choice((5, 10, 45, 45, 90))
+        if minute + length > 24 * 60:
+            # More lessons than a day holds: parallel classes
+            minute = 7 * 60 + rng.randrange(0, 12 * 60, 5)
+        result.append(
+            {
+                "subject": f"Subject {number % 17}",
+                "start_time": _time(minute),
+                "end_time": _time(minute + length),
+                "room": f"R{rng.randrange(100, 400)}",
+                "teacher": f"Teacher {rng.randrange(40)}",
+                "notes": "",
+                "color": "#2196F3",
+                "icon": "mdi:book-open-variant",
+            }
+        )
+        minute += length + rng.choice((0, 5, 5, 10, 15))
+    result.sort(key=lambda lesson: lesson["start_time"])
+    return result
+
+
+def vacations(rng: random.Random, count: int) -> list[dict[str, Any]]:
+    """Return ``count`` vacation ranges, none of which touches the simulated week."""
+    first = SIMULATED_WEEK - timedelta(days=365 * VACATION_YEARS)
+    span = 2 * 365 * VACATION_YEARS
+    # Days around the simulated week that stay free of vacations
+    blocked_start = SIMULATED_WEEK - timedelta(days=1)
+    blocked_end = SIMULATED_WEEK + timedelta(days=7)
+    result = []
+    while len(result) < count:
+        start = first + timedelta(days=rng.randrange(span))
+        end = start + timedelta(days=rng.randrange(1, 21))
+        if end >= blocked_start and start <= blocked_end:
+            continue
+        result.append(
+            {
+                "label": f"Vacation {len(result)}",
+                "start_date": start.isoformat(),
+                "end_date": end.isoformat(),
+            }
+        )
+    result.sort(key=lambda vacation: vacation["start_date"])
+    return result
+
+
+def exceptions(
+    rng: random.Random, week: dict[str, list[dict[str, Any]]], count: int
+) -> list[dict[str, Any]]:
+    """Return up to ``count`` cancellations of distinct lessons in the simulated week."""
+    candidates = [
+        (weekday, lesson["start_time"], lesson["subject"])
+        for weekday, name in enumerate(WEEKDAYS)
+        for lesson in week[name]
+    ]
+    # Each cancellation must match a lesson that is still there
+    chosen = sorted(set(rng.sample(candidates, min(count, len(candidates)))))
+    return [
+        {
+            "date": (SIMULATED_WEEK + timedelta(days=weekday)).isoformat(),
+            "type": "cancel",
+            "start_time": start_time,
+            "subject": subject,
+        }
+        for weekday, start_time, subject in chosen
+    ]
+
+
+def timetable(
+    seed: int, lessons_per_day: int, vacation_count: int, exception_count: int = 0
+) -> dict[str, Any]:
+    """Return the stored data of a synthetic timetable."""
+    rng = random.Random(seed)
+    week = {weekday: lessons(rng, lessons_per_day) for weekday in WEEKDAYS}
+    return {
+        "lessons": {**week, "saturday": [], "sunday": []},
+        "vacations": vacations(rng, vacation_count),
+        "exceptions": exceptions(rng, week, exception_count),
+        "revision": 0,
+    }
@@ -6,19 +6,23 @@ import logging
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN
+from .const import DOMAIN, PLATFORMS
 from .coordinator import TimetableCoordinator
+from .services import async_setup_services
+from .store import SCHEDULE_KEYS, TimetableStore
+from .sync import SubstitutionSync
 from .view import async_setup_view
+from .websocket import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS = ["sensor", "binary_sensor"]
-
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up the TimeTable component (YAML not supported)."""
     # Register the TimeTable Manager panel
     await async_setup_view(hass)
+    async_register_websocket_commands(hass)
+    async_setup_services(hass)
     return True
 
 
@@ -27,14 +31,33 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     try:
         hass.data.setdefault(DOMAIN, {})
 
+        # Load the schedule, moving it out of the options on first run
+        store = TimetableStore(hass, entry.entry_id)
+        if await store.async_load(entry.options):
+            hass.config_entries.async_update_entry(
+                entry,
+                options={
+                    key: value
+                    for key, value in entry.options.items()
+                    if key not in SCHEDULE_KEYS
+                },
+            )
+
         # Initialize coordinator with config entry
         _LOGGER.debug("Initializing coordinator for entry %s", entry.entry_id)
-        coordinator = TimetableCoordinator(hass, entry)
+        coordinator = TimetableCoordinator(hass, entry, store)
+        entry.async_on_unload(coordinator.async_shutdown)
         await coordinator.async_config_entry_first_refresh()
 
+        # Poll the substitution plan, if one is configured
+        sync = SubstitutionSync(hass, coordinator)
+        entry.async_on_unload(sync.async_stop)
+
         # Store coordinator
         hass.data[DOMAIN][entry.entry_id] = {
             "coordinator": coordinator,
+            "store": store,
+            "sync": sync,
         }
 
         # Set up platforms
@@ -42,7 +65,8 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
         # Add update listener for options changes
-        entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+        entry.async_on_unload(entry.add_update_listener(async_update_options))
+        sync.async_configure(entry.options)
 
         _LOGGER.info("Successfully set up TimeTable integration")
         return True
@@ -51,9 +75,12 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         raise
 
 
-async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry when options change."""
-    await hass.config_entries.async_reload(entry.entry_id)
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply changed options to the running coordinator without a reload."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinator: TimetableCoordinator = entry_data["coordinator"]
+    await coordinator.async_options_updated()
+    entry_data["sync"].async_configure(entry.options)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -61,6 +88,12 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data["store"].async_flush()
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the schedule storage of a deleted config entry."""
+    await TimetableStore(hass, entry.entry_id).async_remove()
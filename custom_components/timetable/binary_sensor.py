@@ -27,12 +27,14 @@ async def async_setup_entry(
 class TimetableIsSchooltimeSensor(CoordinatorEntity, BinarySensorEntity):
     """Binary sensor for whether currently in school time."""
 
+    _data_keys = ("is_schooltime",)
+
     def __init__(
         self, coordinator: TimetableCoordinator, entry: ConfigEntry
     ) -> None:
         """Initialize the binary sensor."""
-        super().__init__(coordinator)
-        self._attr_name = "TimeTable Is Schooltime"
+        super().__init__(coordinator, self._data_keys)
+        self._attr_name = f"{coordinator.entity_prefix} Is Schooltime"
         self._attr_unique_id = f"{entry.entry_id}_is_schooltime"
         self._attr_icon = "mdi:school"
         self._attr_device_class = "occupancy"
@@ -41,4 +43,4 @@ class TimetableIsSchooltimeSensor(CoordinatorEntity, BinarySensorEntity):
     @property
     def is_on(self) -> bool:
         """Return true if currently in a lesson."""
-        return self.coordinator.data.get("current_lesson") is not None
+        return self.coordinator.data.get("is_schooltime", False)
@@ -0,0 +1,262 @@
+"""Whole-week lesson text for the bulk edit step of the options flow.
+
+A week is written either as YAML, with a list of lessons per weekday::
+
+    monday:
+      - 08:00-08:45 Math
+      - {start_time: "08:50", end_time: "09:35", subject: English, room: "101"}
+
+or as tab-separated rows of weekday, start, end, subject, room, teacher and
+notes, optionally below a header row naming the columns. The whole text is
+parsed and validated in one pass and every invalid line is reported, so a
+week is entered with one save instead of one form per lesson.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+import re
+from typing import Any
+
+import voluptuous as vol
+import yaml
+
+from .const import WEEKDAYS
+from .importer import parse_weekday
+from .schedule import Lesson, parse_time
+from .schemas import LESSON_SCHEMA
+from .validation import day_conflicts
+
+# Columns of tab-separated rows without a header row
+TSV_COLUMNS = (
+    "weekday",
+    "start_time",
+    "end_time",
+    "subject",
+    "room",
+    "teacher",
+    "notes",
+)
+
+# Values filled in by LESSON_SCHEMA, left out of the formatted text
+DEFAULTS = LESSON_SCHEMA({"subject": "", "start_time": "", "end_time": ""})
+
+_SHORT_LESSON = re.compile(r"(\d{1,2}:\d{2})\s*-\s*(\d{1,2}:\d{2})(?:\s+(.*))?")
+
+_WEEKEND = ("saturday", "sunday")
+
+
+def _time(value: str) -> str:
+    """Return ``value`` as a zero-padded ``HH:MM`` time."""
+    try:
+        minutes = parse_time(value)
+    except ValueError:
+        raise ValueError(f"invalid time {value!r}, expected HH:MM") from None
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _lesson(fields: dict[str, Any]) -> dict[str, Any]:
+    """Validate the fields of a lesson and fill in the defaults."""
+    fields.setdefault("subject", "")
+    for key in ("start_time", "end_time"):
+        if not fields.get(key):
+            raise ValueError(f"missing {key}")
+        fields[key] = _time(fields[key])
+    try:
+        lesson = LESSON_SCHEMA(fields)
+    except vol.Invalid as err:
+        raise ValueError(str(err)) from None
+    Lesson(lesson)
+    return lesson
+
+
+def _short_lesson(value: str) -> dict[str, Any]:
+    """Parse a ``HH:MM-HH:MM Subject`` lesson."""
+    if (match := _SHORT_LESSON.fullmatch(value.strip())) is None:
+        raise ValueError("expected 'HH:MM-HH:MM Subject' or a mapping of fields")
+    start, end, subject = match.groups()
+    return _lesson({"start_time": start, "end_time": end, "subject": subject or ""})
+
+
+def _mapping_lesson(node: yaml.MappingNode) -> dict[str, Any]:
+    """Parse a lesson given as a mapping of its fields."""
+    fields: dict[str, Any] = {}
+    for key_node, value_node in node.value:
+        key = str(key_node.value)
+        if isinstance(value_node, yaml.ScalarNode):
+            fields[key] = value_node.value
+        elif isinstance(value_node, yaml.SequenceNode) and all(
+            isinstance(item, yaml.ScalarNode) for item in value_node.value
+        ):
+            fields[key] = [item.value for item in value_node.value]
+        else:
+            raise ValueError(f"unsupported value for {key}")
+    return _lesson(fields)
+
+
+def _parse_yaml(
+    text: str,
+    entries: list[tuple[str, int, dict[str, Any]]],
+    errors: list[tuple[int, str]],
+) -> None:
+    """Parse a week written as YAML into ``entries``."""
+    # Composed nodes keep the raw scalars (YAML 1.1 reads 10:00 as 600) and
+    # the line of every lesson
+    try:
+        root = yaml.compose(text, Loader=yaml.SafeLoader)
+    except yaml.YAMLError as err:
+        mark = getattr(err, "problem_mark", None)
+        errors.append(
+            (mark.line + 1 if mark else 1, getattr(err, "problem", None) or str(err))
+        )
+        return
+    if root is None:
+        return
+    if not isinstance(root, yaml.MappingNode):
+        errors.append((root.start_mark.line + 1, "expected one key per weekday"))
+        return
+
+    seen: dict[str, int] = {}
+    for key_node, value_node in root.value:
+        line = key_node.start_mark.line + 1
+        try:
+            weekday = parse_weekday(str(key_node.value))
+        except ValueError as err:
+            errors.append((line, str(err)))
+            continue
+        if weekday in seen:
+            errors.append(
+                (line, f"{weekday} is already listed on line {seen[weekday]}")
+            )
+            continue
+        seen[weekday] = line
+        if isinstance(value_node, yaml.ScalarNode) and not value_node.value:
+            continue
+        if not isinstance(value_node, yaml.SequenceNode):
+            errors.append((line, f"expected a list of lessons for {weekday}"))
+            continue
+        for item in value_node.value:
+            item_line = item.start_mark.line + 1
+            try:
+                if isinstance(item, yaml.ScalarNode):
+                    lesson = _short_lesson(item.value)
+                elif isinstance(item, yaml.MappingNode):
+                    lesson = _mapping_lesson(item)
+                else:
+                    raise ValueError("expected a lesson")
+            except ValueError as err:
+                errors.append((item_line, str(err)))
+                continue
+            entries.append((weekday, item_line, lesson))
+
+
+def _parse_tsv(
+    text: str,
+    entries: list[tuple[str, int, dict[str, Any]]],
+    errors: list[tuple[int, str]],
+) -> None:
+    """Parse a week written as tab-separated rows into ``entries``."""
+    columns: tuple[str, ...] = TSV_COLUMNS
+    first = True
+    for number, line in enumerate(text.splitlines(), 1):
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        cells = [cell.strip() for cell in line.split("\t")]
+        if first and cells[0].lower() == "weekday":
+            columns = tuple(cell.lower() for cell in cells)
+            first = False
+            continue
+        first = False
+        if any(cells[len(columns) :]):
+            errors.append((number, f"expected at most {len(columns)} columns"))
+            continue
+        row = {column: cell for column, cell in zip(columns, cells) if cell}
+        try:
+            weekday = parse_weekday(row.pop("weekday", ""))
+            if "weeks" in row:
+                row["weeks"] = [week.strip() for week in row["weeks"].split(",")]
+            entries.append((weekday, number, _lesson(row)))
+        except ValueError as err:
+            errors.append((number, str(err)))
+
+
+def parse_week(text: str) -> tuple[dict[str, list[dict[str, Any]]], list[str]]:
+    """Parse a whole week of lessons.
+
+    Returns the lessons of every weekday, sorted by start time, with days
+    missing from the text left empty, and one ``line N: ...`` message per
+    invalid line.
+    """
+    entries: list[tuple[str, int, dict[str, Any]]] = []
+    errors: list[tuple[int, str]] = []
+    if "\t" in text:
+        _parse_tsv(text, entries, errors)
+    else:
+        _parse_yaml(text, entries, errors)
+
+    days: dict[str, list[tuple[int, dict[str, Any]]]] = {
+        weekday: [] for weekday in WEEKDAYS
+    }
+    for weekday, line, lesson in entries:
+        days[weekday].append((line, lesson))
+    for day in days.values():
+        for index, other in day_conflicts([lesson for _, lesson in day]):
+            (line, lesson), (other_line, other_lesson) = day[index], day[other]
+            errors.append(
+                (
+                    line,
+                    f"{lesson['subject']} overlaps {other_lesson['subject']} "
+                    f"on line {other_line}",
+                )
+            )
+
+    lessons = {
+        weekday: sorted(
+            (lesson for _, lesson in day), key=lambda lesson: lesson["start_time"]
+        )
+        for weekday, day in days.items()
+    }
+    return lessons, [f"line {line}: {message}" for line, message in sorted(errors)]
+
+
+def _item(lesson: Mapping[str, Any]) -> str | dict[str, Any]:
+    """Return the short form of a lesson, or its fields that are not defaults."""
+    fields = {
+        key: value
+        for key, value in lesson.items()
+        if value not in ("", None, []) and DEFAULTS.get(key) != value
+    }
+    if fields.keys() <= {"subject", "start_time", "end_time"}:
+        short = f"{lesson['start_time']}-{lesson['end_time']}"
+        return f"{short} {fields['subject']}" if "subject" in fields else short
+    return {
+        "start_time": fields.pop("start_time"),
+        "end_time": fields.pop("end_time"),
+        **fields,
+    }
+
+
+def _dump(value: Any) -> str:
+    """Return ``value`` as a single line of YAML."""
+    dumped = yaml.safe_dump(
+        value,
+        default_flow_style=True,
+        allow_unicode=True,
+        sort_keys=False,
+        width=float("inf"),
+    )
+    # Plain scalars are dumped as a document with an explicit end
+    return dumped.removesuffix("\n").removesuffix("\n...")
+
+
+def format_week(lessons: Mapping[str, list[Mapping[str, Any]]]) -> str:
+    """Return the weekly lessons as YAML text, one line per lesson."""
+    lines = []
+    for weekday in WEEKDAYS:
+        day = lessons.get(weekday) or []
+        if not day:
+            if weekday not in _WEEKEND:
+                lines.append(f"{weekday}: []")
+            continue
+        lines.append(f"{weekday}:")
+        lines.extend(f"  - {_dump(_item(lesson))}" for lesson in day)
+    return "\n".join(lines) + "\n"
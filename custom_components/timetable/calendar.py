@@ -0,0 +1,91 @@
+"""Calendar platform for TimeTable."""
+from __future__ import annotations
+
+from datetime import datetime, time, timedelta, tzinfo
+
+from homeassistant.components.calendar import CalendarEntity, CalendarEvent
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .coordinator import TimetableCoordinator
+from .occurrences import Occurrence
+
+# How far ahead the calendar state looks for the next lesson
+EVENT_LOOKAHEAD = timedelta(days=14)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Timetable calendar based on a config entry."""
+    coordinator: TimetableCoordinator = hass.data[DOMAIN][entry.entry_id][
+        "coordinator"
+    ]
+
+    async_add_entities([TimetableCalendar(coordinator, entry)])
+
+
+def _to_event(occurrence: Occurrence, time_zone: tzinfo) -> CalendarEvent:
+    """Convert a lesson occurrence to a calendar event."""
+    midnight = datetime.combine(occurrence.date, time(), tzinfo=time_zone)
+    lesson = occurrence.data
+    details = [lesson.get("teacher"), lesson.get("notes")]
+    return CalendarEvent(
+        start=midnight + timedelta(minutes=occurrence.start),
+        end=midnight + timedelta(minutes=occurrence.end),
+        summary=lesson.get("subject", ""),
+        location=lesson.get("room") or None,
+        description="\n".join(detail for detail in details if detail) or None,
+    )
+
+
+class TimetableCalendar(CoordinatorEntity, CalendarEntity):
+    """Calendar of the lessons of a timetable.
+
+    Range queries are answered from the coordinator's occurrence index, which
+    expands each week once and is only invalidated by schedule edits.
+    """
+
+    _data_keys = ("current_lesson", "next_lesson", "weekday", "revision")
+
+    def __init__(
+        self, coordinator: TimetableCoordinator, entry: ConfigEntry
+    ) -> None:
+        """Initialize the calendar."""
+        super().__init__(coordinator, self._data_keys)
+        self._attr_name = f"{coordinator.entity_prefix} Lessons"
+        self._attr_unique_id = f"{entry.entry_id}_calendar"
+        self._attr_icon = "mdi:calendar-clock"
+        self._attr_has_entity_name = False
+
+    @property
+    def event(self) -> CalendarEvent | None:
+        """Return the current or next lesson."""
+        now = self.coordinator.clock.now()
+        for occurrence in self.coordinator.occurrences.between(
+            now.date(), (now + EVENT_LOOKAHEAD).date()
+        ):
+            event = _to_event(occurrence, now.tzinfo)
+            if event.end > now:
+                return event
+        return None
+
+    async def async_get_events(
+        self, hass: HomeAssistant, start_date: datetime, end_date: datetime
+    ) -> list[CalendarEvent]:
+        """Return the lessons between ``start_date`` and ``end_date``."""
+        time_zone = dt_util.get_default_time_zone()
+        start = dt_util.as_local(start_date)
+        end = dt_util.as_local(end_date)
+        events = []
+        for occurrence in self.coordinator.occurrences.between(start.date(), end.date()):
+            event = _to_event(occurrence, time_zone)
+            if event.end > start_date and event.start < end_date:
+                events.append(event)
+        return events
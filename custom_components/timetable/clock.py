@@ -0,0 +1,57 @@
+"""Clocks for TimeTable.
+
+The coordinator and its entities read the time only through a clock, so
+the simulator can replay days and years under a fake clock without a
+running Home Assistant instance.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import datetime, timedelta, tzinfo
+from typing import Protocol
+
+
+class Clock(Protocol):
+    """Source of the current local time."""
+
+    def now(self) -> datetime:
+        """Return the current time, aware of the local time zone."""
+
+
+class SystemClock:
+    """Wall clock in the time zone returned by ``time_zone``."""
+
+    def __init__(self, time_zone: Callable[[], tzinfo]) -> None:
+        """Initialize the clock.
+
+        The time zone is looked up on every call, as it can change at runtime.
+        """
+        self._time_zone = time_zone
+
+    def now(self) -> datetime:
+        """Return the current time."""
+        return datetime.now(self._time_zone())
+
+
+class FakeClock:
+    """Clock that only moves when told to."""
+
+    def __init__(self, now: datetime) -> None:
+        """Start the clock at the aware datetime ``now``."""
+        if now.tzinfo is None:
+            raise ValueError("The fake clock needs an aware datetime")
+        self._now = now
+
+    def now(self) -> datetime:
+        """Return the current time."""
+        return self._now
+
+    def advance(self, delta: timedelta) -> None:
+        """Move the clock forward by ``delta``."""
+        self.advance_to(self._now + delta)
+
+    def advance_to(self, instant: datetime) -> None:
+        """Move the clock forward to ``instant``."""
+        if instant < self._now:
+            raise ValueError("The clock cannot go back")
+        self._now = instant
@@ -1,6 +1,7 @@
 """Config flow for TimeTable integration."""
 from __future__ import annotations
 
+from datetime import date
 import logging
 from typing import Any
 
@@ -9,12 +10,44 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
-
-from .const import DOMAIN
+from homeassistant.helpers.selector import TextSelector, TextSelectorConfig
+from homeassistant.util import slugify
+
+from .bulk import format_week, parse_week
+from .const import (
+    ATTR_SCHEDULE_ID,
+    CONF_COMPACT_ATTRIBUTES,
+    CONF_ROTATION_ANCHOR,
+    CONF_ROTATION_SKIP_VACATIONS,
+    CONF_ROTATION_WEEKS,
+    CONF_SYNC_FORMAT,
+    CONF_SYNC_INTERVAL,
+    CONF_SYNC_SOURCE,
+    DEFAULT_SCHEDULE_ID,
+    DEFAULT_SYNC_FORMAT,
+    DEFAULT_SYNC_INTERVAL,
+    DOMAIN,
+    MAX_REPORTED_ERRORS,
+    MAX_ROTATION_WEEKS,
+)
+from .coordinator import TimetableCoordinator
+from .edits import ScheduleEdit
+from .schedule import parse_time
+from .substitutions import PARSERS
+from .validation import OverlapError
 
 _LOGGER = logging.getLogger(__name__)
 
 
+def _check_times(start_time: str, end_time: str) -> str | None:
+    """Return the error key for invalid lesson times, if any."""
+    try:
+        start, end = parse_time(start_time), parse_time(end_time)
+    except ValueError:
+        return "invalid_time"
+    return "end_before_start" if end <= start else None
+
+
 class TimetableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for TimeTable."""
 
@@ -24,19 +57,25 @@ class TimetableConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Handle the initial step."""
-        # Check if already configured
-        await self.async_set_unique_id(DOMAIN)
-        self._abort_if_unique_id_configured()
-
         if user_input is not None:
+            # The first timetable keeps the "default" schedule ID (and the
+            # original entity names); further ones are keyed by their name.
+            if self._async_current_entries():
+                schedule_id = slugify(user_input.get("name", "TimeTable"))
+            else:
+                schedule_id = DEFAULT_SCHEDULE_ID
+
+            # Entries created before multiple timetables used the domain as ID
+            unique_id = DOMAIN if schedule_id == DEFAULT_SCHEDULE_ID else schedule_id
+            await self.async_set_unique_id(unique_id)
+            self._abort_if_unique_id_configured()
+
             return self.async_create_entry(
                 title=user_input.get("name", "TimeTable"),
-                data={},
+                data={ATTR_SCHEDULE_ID: schedule_id},
                 options={
                     "name": user_input.get("name", "My Timetable"),
                     "include_weekends": user_input.get("include_weekends", False),
-                    "lessons": {},
-                    "vacations": [],
                 },
             )
 
@@ -67,13 +106,22 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
         self._editing_day = None
         self._editing_lesson_index = None
 
+    @property
+    def _coordinator(self) -> TimetableCoordinator:
+        """Return the coordinator of the entry being configured."""
+        return self.hass.data[DOMAIN][self.config_entry.entry_id]["coordinator"]
+
     def _get_lessons(self) -> dict:
         """Get current lessons."""
-        return self.config_entry.options.get("lessons", {}) if self.config_entry.options else {}
+        return self._coordinator.store.data["lessons"]
 
     def _get_vacations(self) -> list:
         """Get current vacations."""
-        return self.config_entry.options.get("vacations", []) if self.config_entry.options else []
+        return self._coordinator.store.data["vacations"]
+
+    def _async_finish(self) -> FlowResult:
+        """Close the flow; schedule edits are already stored."""
+        return self.async_create_entry(title="", data=dict(self.config_entry.options))
 
     def _format_lesson(self, lesson: dict) -> str:
         """Format lesson for display."""
@@ -113,6 +161,8 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
             action = user_input.get("action")
             if action == "manage_lessons":
                 return await self.async_step_manage_lessons()
+            elif action == "bulk_edit":
+                return await self.async_step_bulk_edit()
             elif action == "manage_vacations":
                 return await self.async_step_manage_vacations()
             elif action == "settings":
@@ -126,6 +176,7 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
                     vol.Required("action"): vol.In(
                         {
                             "manage_lessons": f"📚 Manage Lessons ({total_lessons} total)",
+                            "bulk_edit": "📝 Edit Whole Week",
                             "manage_vacations": f"🌴 Manage Vacations ({len(vacations)} total)",
                             "settings": "⚙️ Settings",
                         }
@@ -206,27 +257,16 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
     ) -> FlowResult:
         """Add a new lesson."""
         errors = {}
+        placeholders = {"conflicts": ""}
 
         if user_input is not None:
             start_time = user_input.get("start_time", "")
             end_time = user_input.get("end_time", "")
 
-            if start_time and end_time and start_time >= end_time:
-                errors["end_time"] = "end_before_start"
+            if error := _check_times(start_time, end_time):
+                errors["end_time"] = error
 
             if not errors:
-                options = dict(self.config_entry.options) if self.config_entry.options else {
-                    "name": "TimeTable",
-                    "include_weekends": False,
-                    "lessons": {},
-                    "vacations": [],
-                }
-
-                if "lessons" not in options:
-                    options["lessons"] = {}
-                if self._editing_day not in options["lessons"]:
-                    options["lessons"][self._editing_day] = []
-
                 lesson = {
                     "subject": user_input.get("subject", ""),
                     "start_time": start_time,
@@ -238,13 +278,19 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
                     "icon": "mdi:book-open-variant",
                 }
 
-                options["lessons"][self._editing_day].append(lesson)
-                options["lessons"][self._editing_day].sort(key=lambda x: x["start_time"])
-
-                return self.async_create_entry(title="", data=options)
+                try:
+                    await self._coordinator.async_add_lesson(self._editing_day, lesson)
+                except OverlapError as err:
+                    errors["base"] = "overlap"
+                    placeholders["conflicts"] = str(err)
+                except ValueError:
+                    errors["base"] = "invalid_time"
+                else:
+                    return self._async_finish()
 
         return self.async_show_form(
             step_id="add_lesson",
+            description_placeholders=placeholders,
             data_schema=vol.Schema(
                 {
                     vol.Required("subject"): str,
@@ -271,24 +317,24 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
 
         current_lesson = day_lessons[self._editing_lesson_index]
         errors = {}
+        placeholders = {"conflicts": ""}
 
         if user_input is not None:
             if user_input.get("delete", False):
                 # Delete lesson
-                options = dict(self.config_entry.options)
-                options["lessons"][self._editing_day].pop(self._editing_lesson_index)
-                return self.async_create_entry(title="", data=options)
+                await self._coordinator.async_remove_lesson(
+                    self._editing_day, self._editing_lesson_index
+                )
+                return self._async_finish()
 
             # Update lesson
             start_time = user_input.get("start_time", "")
             end_time = user_input.get("end_time", "")
 
-            if start_time and end_time and start_time >= end_time:
-                errors["end_time"] = "end_before_start"
+            if error := _check_times(start_time, end_time):
+                errors["end_time"] = error
 
             if not errors:
-                options = dict(self.config_entry.options)
-
                 updated_lesson = {
                     "subject": user_input.get("subject", ""),
                     "start_time": start_time,
@@ -300,13 +346,21 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
                     "icon": "mdi:book-open-variant",
                 }
 
-                options["lessons"][self._editing_day][self._editing_lesson_index] = updated_lesson
-                options["lessons"][self._editing_day].sort(key=lambda x: x["start_time"])
-
-                return self.async_create_entry(title="", data=options)
+                try:
+                    await self._coordinator.async_update_lesson(
+                        self._editing_day, self._editing_lesson_index, updated_lesson
+                    )
+                except OverlapError as err:
+                    errors["base"] = "overlap"
+                    placeholders["conflicts"] = str(err)
+                except ValueError:
+                    errors["base"] = "invalid_time"
+                else:
+                    return self._async_finish()
 
         return self.async_show_form(
             step_id="edit_lesson",
+            description_placeholders=placeholders,
             data_schema=vol.Schema(
                 {
                     vol.Required("subject", default=current_lesson.get("subject", "")): str,
@@ -322,6 +376,46 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
             errors=errors,
         )
 
+    async def async_step_bulk_edit(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Edit the lessons of the whole week as text, saved at once."""
+        errors: dict[str, str] = {}
+        placeholders = {"errors": ""}
+        stored = self._get_lessons()
+        text = format_week(stored)
+
+        if user_input is not None:
+            text = user_input.get("week", "")
+            lessons, problems = parse_week(text)
+            if problems:
+                errors["base"] = "invalid_week"
+                shown = [f"- {problem}" for problem in problems[:MAX_REPORTED_ERRORS]]
+                if len(problems) > MAX_REPORTED_ERRORS:
+                    shown.append(f"- and {len(problems) - MAX_REPORTED_ERRORS} more")
+                placeholders["errors"] = "\n".join(shown)
+            else:
+                # Only the days that changed are recompiled
+                edit = ScheduleEdit(self._coordinator.store.data)
+                for weekday, day_lessons in lessons.items():
+                    if day_lessons != stored.get(weekday, []):
+                        edit.set_lessons(weekday, day_lessons)
+                await self._coordinator.async_apply_edit(edit)
+                return self._async_finish()
+
+        return self.async_show_form(
+            step_id="bulk_edit",
+            description_placeholders=placeholders,
+            data_schema=vol.Schema(
+                {
+                    vol.Required("week", default=text): TextSelector(
+                        TextSelectorConfig(multiline=True)
+                    ),
+                }
+            ),
+            errors=errors,
+        )
+
     async def async_step_manage_vacations(
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
@@ -336,9 +430,8 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
                 return await self.async_step_init()
             elif action.startswith("delete_"):
                 idx = int(action.split("_")[1])
-                options = dict(self.config_entry.options)
-                options["vacations"].pop(idx)
-                return self.async_create_entry(title="", data=options)
+                await self._coordinator.async_remove_vacation(idx)
+                return self._async_finish()
 
         actions = {"add": "➕ Add Vacation Period"}
 
@@ -373,24 +466,18 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
                 errors["end_date"] = "end_before_start"
 
             if not errors:
-                options = dict(self.config_entry.options) if self.config_entry.options else {
-                    "name": "TimeTable",
-                    "include_weekends": False,
-                    "lessons": {},
-                    "vacations": [],
-                }
-
-                if "vacations" not in options:
-                    options["vacations"] = []
-
                 vacation = {
                     "label": user_input.get("label", "Vacation"),
                     "start_date": start_date,
                     "end_date": end_date,
                 }
 
-                options["vacations"].append(vacation)
-                return self.async_create_entry(title="", data=options)
+                try:
+                    await self._coordinator.async_add_vacation(vacation)
+                except ValueError:
+                    errors["base"] = "invalid_date"
+                else:
+                    return self._async_finish()
 
         return self.async_show_form(
             step_id="add_vacation",
@@ -408,20 +495,44 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
         self, user_input: dict[str, Any] | None = None
     ) -> FlowResult:
         """Change settings."""
+        errors: dict[str, str] = {}
         if user_input is not None:
-            options = dict(self.config_entry.options) if self.config_entry.options else {
-                "lessons": {},
-                "vacations": [],
-            }
+            anchor = user_input.get(CONF_ROTATION_ANCHOR, "").strip()
+            try:
+                if anchor:
+                    date.fromisoformat(anchor)
+            except ValueError:
+                errors[CONF_ROTATION_ANCHOR] = "invalid_date"
+
+        if user_input is not None and not errors:
+            options = dict(self.config_entry.options)
             options["name"] = user_input.get("name", "TimeTable")
             options["include_weekends"] = user_input.get("include_weekends", False)
+            options[CONF_COMPACT_ATTRIBUTES] = user_input.get(
+                CONF_COMPACT_ATTRIBUTES, False
+            )
+            options[CONF_SYNC_SOURCE] = user_input.get(CONF_SYNC_SOURCE, "").strip()
+            options[CONF_SYNC_FORMAT] = user_input.get(
+                CONF_SYNC_FORMAT, DEFAULT_SYNC_FORMAT
+            )
+            options[CONF_SYNC_INTERVAL] = user_input.get(
+                CONF_SYNC_INTERVAL, DEFAULT_SYNC_INTERVAL
+            )
+            options[CONF_ROTATION_WEEKS] = user_input.get(CONF_ROTATION_WEEKS, 1)
+            options[CONF_ROTATION_ANCHOR] = anchor
+            options[CONF_ROTATION_SKIP_VACATIONS] = user_input.get(
+                CONF_ROTATION_SKIP_VACATIONS, False
+            )
             return self.async_create_entry(title="", data=options)
 
         current_name = "TimeTable"
         current_weekends = False
-        if self.config_entry.options:
-            current_name = self.config_entry.options.get("name", "TimeTable")
-            current_weekends = self.config_entry.options.get("include_weekends", False)
+        current_compact = False
+        options = self.config_entry.options
+        if options:
+            current_name = options.get("name", "TimeTable")
+            current_weekends = options.get("include_weekends", False)
+            current_compact = options.get(CONF_COMPACT_ATTRIBUTES, False)
 
         return self.async_show_form(
             step_id="settings",
@@ -429,6 +540,33 @@ class TimetableOptionsFlow(config_entries.OptionsFlow):
                 {
                     vol.Required("name", default=current_name): str,
                     vol.Required("include_weekends", default=current_weekends): bool,
+                    vol.Required(
+                        CONF_COMPACT_ATTRIBUTES, default=current_compact
+                    ): bool,
+                    vol.Optional(
+                        CONF_SYNC_SOURCE, default=options.get(CONF_SYNC_SOURCE, "")
+                    ): str,
+                    vol.Required(
+                        CONF_SYNC_FORMAT,
+                        default=options.get(CONF_SYNC_FORMAT, DEFAULT_SYNC_FORMAT),
+                    ): vol.In(list(PARSERS)),
+                    vol.Required(
+                        CONF_SYNC_INTERVAL,
+                        default=options.get(CONF_SYNC_INTERVAL, DEFAULT_SYNC_INTERVAL),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=1440)),
+                    vol.Required(
+                        CONF_ROTATION_WEEKS,
+                        default=options.get(CONF_ROTATION_WEEKS, 1),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_ROTATION_WEEKS)),
+                    vol.Optional(
+                        CONF_ROTATION_ANCHOR,
+                        default=options.get(CONF_ROTATION_ANCHOR, ""),
+                    ): str,
+                    vol.Required(
+                        CONF_ROTATION_SKIP_VACATIONS,
+                        default=options.get(CONF_ROTATION_SKIP_VACATIONS, False),
+                    ): bool,
                 }
             ),
+            errors=errors,
         )
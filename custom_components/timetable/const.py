@@ -2,8 +2,13 @@
 from typing import Final
 
 DOMAIN: Final = "timetable"
+DATA_SCHEDULER: Final = f"{DOMAIN}_scheduler"
 STORAGE_VERSION: Final = 1
 STORAGE_KEY: Final = "timetable.storage"
+# Seconds to coalesce edits before writing them to disk
+SAVE_DELAY: Final = 10
+# Entity platforms of every timetable
+PLATFORMS: Final = ["sensor", "binary_sensor", "calendar"]
 
 # Panel
 PANEL_NAME: Final = "TimeTable Manager"
@@ -11,8 +16,8 @@ PANEL_ICON: Final = "mdi:table-clock"
 PANEL_URL: Final = "/timetable_panel"
 PANEL_FILENAME: Final = "timetable-panel.js"
 
-# Update interval (in seconds)
-UPDATE_INTERVAL: Final = 60
+# Calendar feed
+ICS_URL: Final = "/api/timetable/ics/{entry_id}/{token}"
 
 # Weekdays
 WEEKDAYS: Final = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
@@ -27,6 +32,7 @@ WEEKDAY_MAP: Final = {
 }
 
 # Default config
+DEFAULT_SCHEDULE_ID: Final = "default"
 DEFAULT_SCHEDULE_NAME: Final = "Default Schedule"
 DEFAULT_INCLUDE_WEEKENDS: Final = False
 
@@ -36,6 +42,27 @@ SERVICE_ADD_LESSON: Final = "add_lesson"
 SERVICE_REMOVE_LESSON: Final = "remove_lesson"
 SERVICE_ADD_VACATION: Final = "add_vacation"
 SERVICE_REMOVE_VACATION: Final = "remove_vacation"
+SERVICE_GET_OCCURRENCES: Final = "get_occurrences"
+SERVICE_IMPORT_SCHEDULE: Final = "import_schedule"
+SERVICE_BATCH_UPDATE: Final = "batch_update"
+SERVICE_ADD_EXCEPTION: Final = "add_exception"
+SERVICE_REMOVE_EXCEPTION: Final = "remove_exception"
+SERVICE_SYNC_SUBSTITUTIONS: Final = "sync_substitutions"
+
+# Date-specific changes to single lessons
+EXCEPTION_TYPES: Final = ("cancel", "replace", "move", "room", "add")
+
+# File formats accepted by the import service
+IMPORT_FORMATS: Final = ("ics", "csv")
+# Invalid lines, rows or conflicts listed in one error message
+MAX_REPORTED_ERRORS: Final = 10
+
+# Longest date range a single occurrence query may expand
+MAX_OCCURRENCE_DAYS: Final = 3 * 366
+
+# Upcoming lessons kept in the coordinator data and the most one query returns
+UPCOMING_LESSONS: Final = 5
+MAX_UPCOMING_LESSONS: Final = 100
 
 # Attributes
 ATTR_SCHEDULE_ID: Final = "schedule_id"
@@ -52,10 +79,27 @@ ATTR_TEACHER: Final = "teacher"
 ATTR_NOTES: Final = "notes"
 ATTR_COLOR: Final = "color"
 ATTR_ICON: Final = "icon"
+ATTR_WEEKS: Final = "weeks"
+ATTR_VACATION: Final = "vacation"
 ATTR_VACATION_START: Final = "start_date"
 ATTR_VACATION_END: Final = "end_date"
 ATTR_VACATION_LABEL: Final = "label"
 ATTR_VACATION_INDEX: Final = "vacation_index"
+ATTR_START_DATE: Final = "start_date"
+ATTR_END_DATE: Final = "end_date"
+ATTR_OCCURRENCES: Final = "occurrences"
+ATTR_PATH: Final = "path"
+ATTR_FORMAT: Final = "format"
+ATTR_MERGE: Final = "merge"
+ATTR_MIN_OCCURRENCES: Final = "min_occurrences"
+ATTR_OPERATIONS: Final = "operations"
+ATTR_ACTION: Final = "action"
+ATTR_TARGET_WEEKDAY: Final = "target_weekday"
+ATTR_EXCEPTION: Final = "exception"
+ATTR_EXCEPTION_INDEX: Final = "exception_index"
+ATTR_UPCOMING: Final = "upcoming"
+ATTR_COUNT: Final = "count"
+ATTR_CONFLICTS: Final = "conflicts"
 
 # Sensor attributes
 ATTR_TODAY_LESSONS: Final = "today_lessons"
@@ -65,3 +109,35 @@ ATTR_IS_VACATION: Final = "is_vacation"
 ATTR_IS_SCHOOL_DAY: Final = "is_school_day"
 ATTR_CURRENT_LESSON: Final = "current_lesson"
 ATTR_VACATION_NAME: Final = "vacation_name"
+ATTR_NEXT_VACATION_START: Final = "next_vacation_start"
+ATTR_DAYS_UNTIL_VACATION: Final = "days_until_vacation"
+ATTR_CURRENT_LESSON_INDEX: Final = "current_lesson_index"
+ATTR_NEXT_LESSON_INDEX: Final = "next_lesson_index"
+ATTR_LESSON_COUNT: Final = "lesson_count"
+ATTR_REVISION: Final = "revision"
+ATTR_WEEK: Final = "week"
+ATTR_NEXT_SCHOOL_DAY: Final = "next_school_day"
+ATTR_NEXT_SCHOOL_DAY_START: Final = "next_school_day_start"
+ATTR_TOMORROW_FIRST_LESSON: Final = "tomorrow_first_lesson"
+ATTR_WEEK_LABEL: Final = "week_label"
+
+# Options
+CONF_COMPACT_ATTRIBUTES: Final = "compact_attributes"
+CONF_ROTATION_WEEKS: Final = "rotation_weeks"
+CONF_ROTATION_ANCHOR: Final = "rotation_anchor"
+CONF_ROTATION_SKIP_VACATIONS: Final = "rotation_skip_vacations"
+CONF_SYNC_SOURCE: Final = "sync_source"
+CONF_SYNC_FORMAT: Final = "sync_format"
+CONF_SYNC_INTERVAL: Final = "sync_interval"
+
+# Longest rotation cycle in weeks
+MAX_ROTATION_WEEKS: Final = 8
+
+# Substitution plan sync
+DEFAULT_SYNC_FORMAT: Final = "json"
+# Minutes between polls of the plan
+DEFAULT_SYNC_INTERVAL: Final = 5
+# Source tag of exceptions taken from the plan
+SYNC_SOURCE: Final = "sync"
+# Largest plan accepted, in bytes
+MAX_PLAN_SIZE: Final = 2 * 1024 * 1024
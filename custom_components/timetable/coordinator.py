@@ -1,132 +1,384 @@
-"""DataUpdateCoordinator for TimeTable that reads from config entry."""
+"""DataUpdateCoordinator for TimeTable."""
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import date, datetime
 import logging
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.util import dt as dt_util
 
-from .const import DOMAIN, UPDATE_INTERVAL, WEEKDAY_MAP
+from .clock import Clock, SystemClock
+from .const import (
+    ATTR_SCHEDULE_ID,
+    DEFAULT_SCHEDULE_ID,
+    DOMAIN,
+    MAX_OCCURRENCE_DAYS,
+)
+from .edits import ScheduleEdit, check_exception
+from .occurrences import Occurrence, OccurrenceIndex
+from .overlay import prune
+from .substitutions import merge_exceptions
+from .schedule import CompiledSchedule, DaySnapshot, Lesson, SnapshotCache
+from .scheduler import async_get_scheduler
+from .stats import Stats
+from .store import SCHEDULE_KEYS, TimetableStore
+from .vacations import parse_vacation
+from .validation import check_overlaps
 
 _LOGGER = logging.getLogger(__name__)
 
 
 class TimetableCoordinator(DataUpdateCoordinator):
-    """Class to manage fetching TimeTable data from config entry."""
+    """Class to manage the TimeTable state of one config entry.
 
-    def __init__(self, hass: HomeAssistant, config_entry: ConfigEntry) -> None:
-        """Initialize the coordinator."""
+    Instead of polling, the coordinator hands the next instant at which its
+    state can change (a lesson start or end, or local midnight) to the shared
+    boundary scheduler after every refresh.
+
+    Entities register the data keys they render as their listener context
+    and are only notified when the values of those keys changed.
+
+    The parts of the data that only change at midnight or on edits are
+    kept in day snapshots keyed by date and schedule revision, so refreshes
+    during the day only look up the time of day.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        config_entry: ConfigEntry,
+        store: TimetableStore,
+        clock: Clock | None = None,
+    ) -> None:
+        """Initialize the coordinator.
+
+        The coordinator and its entities read the time from ``clock``, which
+        defaults to the wall clock in the Home Assistant time zone. Runtime
+        statistics are shared with the ``store``.
+        """
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=UPDATE_INTERVAL),
+            update_interval=None,
         )
         self.config_entry = config_entry
+        self.store = store
+        self.clock = clock or SystemClock(dt_util.get_default_time_zone)
+        self.stats: Stats = store.stats
+        self._options: dict[str, Any] = dict(config_entry.options)
+        self.schedule = CompiledSchedule.from_data(store.data, self._options)
+        self.occurrences = OccurrenceIndex(self.schedule)
+        self._snapshots = SnapshotCache()
+        self.next_boundary: datetime | None = None
+        self._fingerprints: dict[tuple[str, ...], tuple[Any, ...]] = {}
+        self._scheduler = async_get_scheduler(hass)
+        self._unsub_scheduler: CALLBACK_TYPE | None = self._scheduler.async_register(
+            config_entry.entry_id, self.async_refresh
+        )
+
+    @property
+    def schedule_id(self) -> str:
+        """Return the schedule ID of this timetable."""
+        return self.config_entry.data.get(ATTR_SCHEDULE_ID, DEFAULT_SCHEDULE_ID)
+
+    @property
+    def entity_prefix(self) -> str:
+        """Return the prefix for entity names of this timetable."""
+        if self.schedule_id == DEFAULT_SCHEDULE_ID:
+            return "TimeTable"
+        return self.config_entry.title
+
+    async def async_shutdown(self) -> None:
+        """Stop receiving boundary refreshes."""
+        if self._unsub_scheduler is not None:
+            self._unsub_scheduler()
+            self._unsub_scheduler = None
+        await super().async_shutdown()
+
+    async def async_options_updated(self) -> None:
+        """Apply changed settings from the config entry options."""
+        options = self.config_entry.options
+        if any(key in options for key in SCHEDULE_KEYS):
+            # Whole-schedule writes from older frontends: move them to the store
+            try:
+                await self.async_set_schedule(
+                    {key: options[key] for key in SCHEDULE_KEYS if key in options}
+                )
+            except ValueError as err:
+                _LOGGER.error("Ignoring invalid schedule in options: %s", err)
+            self.hass.config_entries.async_update_entry(
+                self.config_entry,
+                options={
+                    key: value
+                    for key, value in options.items()
+                    if key not in SCHEDULE_KEYS
+                },
+            )
+            return
+
+        if options == self._options:
+            return
+        self._options = dict(options)
+        # Weekend and rotation settings shape the compiled schedule
+        with self.stats.timer("compile_ms"):
+            self.schedule = CompiledSchedule.from_data(self.store.data, self._options)
+        self.occurrences.invalidate(self.schedule)
+        # The revision stays the same, so snapshots would not be missed
+        self._snapshots.clear()
+        # Settings such as compact attributes change the rendering, not the data
+        self._fingerprints.clear()
+        await self.async_refresh()
+
+    async def async_apply_edit(self, edit: ScheduleEdit) -> None:
+        """Commit edited days and vacations with one write and one refresh.
+
+        Raises OverlapError if the edited days gain overlapping lessons.
+        """
+        if not (changes := edit.changes()):
+            return
+        check_overlaps(self.store.data["lessons"], edit.lessons)
+        with self.stats.timer("compile_ms"):
+            for weekday, lessons in edit.lessons.items():
+                self.schedule.update_day(weekday, lessons)
+            if edit.vacations is not None:
+                self.schedule.update_vacations(edit.vacations)
+            if edit.exceptions is not None:
+                self.schedule.update_exceptions(edit.exceptions)
+        self.stats.incr("edits")
+        self.occurrences.invalidate()
+        self.store.async_update(changes)
+        await self.async_refresh()
+
+    async def async_apply_operations(self, operations: list[dict[str, Any]]) -> None:
+        """Apply a batch of operations atomically.
+
+        Nothing is stored unless every operation succeeds.
+        """
+        edit = ScheduleEdit(self.store.data)
+        for operation in operations:
+            edit.apply(operation)
+        await self.async_apply_edit(edit)
 
-    def _get_schedule_data(self) -> dict[str, Any]:
-        """Get schedule data from config entry options."""
-        return {
-            "lessons": self.config_entry.options.get("lessons", {}),
-            "vacations": self.config_entry.options.get("vacations", []),
-            "include_weekends": self.config_entry.options.get("include_weekends", False),
-        }
+    async def async_set_schedule(
+        self, data: dict[str, Any], settings: dict[str, Any] | None = None
+    ) -> None:
+        """Replace the lessons, vacations and/or exceptions as a whole.
 
-    def _get_lessons_for_day(self, weekday: str) -> list[dict[str, Any]]:
-        """Get lessons for a specific weekday."""
-        schedule = self._get_schedule_data()
-        return schedule["lessons"].get(weekday, [])
+        Changed ``settings``, such as the name or the weekend setting, are
+        stored in the entry options once ``data`` is valid, and are applied
+        with the same compile and refresh.
+        """
+        for lessons in data.get("lessons", {}).values():
+            for lesson in lessons:
+                Lesson(lesson)
+        for vacation in data.get("vacations", []):
+            parse_vacation(vacation)
+        for exception in data.get("exceptions", []):
+            check_exception(exception)
+        if "lessons" in data:
+            check_overlaps(self.store.data["lessons"], data["lessons"])
 
-    def _check_vacation(self, date: datetime) -> tuple[bool, str | None]:
-        """Check if date is in vacation period."""
-        schedule = self._get_schedule_data()
-        date_str = date.date().isoformat()
+        changes: dict[str, Any] = {}
+        if "lessons" in data:
+            changes["lessons"] = {
+                weekday: sorted(lessons, key=lambda lesson: lesson["start_time"])
+                for weekday, lessons in data["lessons"].items()
+            }
+        if "vacations" in data:
+            changes["vacations"] = sorted(
+                data["vacations"], key=lambda item: item["start_date"]
+            )
+        if "exceptions" in data:
+            changes["exceptions"] = sorted(
+                data["exceptions"], key=lambda item: item["date"]
+            )
+        options = {**self.config_entry.options, **(settings or {})}
+        options_changed = options != self.config_entry.options
+        if not changes and not options_changed:
+            return
+        if options_changed:
+            # Applied here, so async_options_updated finds nothing to do
+            self._options = dict(options)
+            self.hass.config_entries.async_update_entry(
+                self.config_entry, options=options
+            )
+            self._snapshots.clear()
+            self._fingerprints.clear()
+        if changes:
+            self.store.async_update(changes)
+        with self.stats.timer("compile_ms"):
+            self.schedule = CompiledSchedule.from_data(self.store.data, self._options)
+        self.occurrences.invalidate(self.schedule)
+        await self.async_refresh()
 
-        for vacation in schedule["vacations"]:
-            start = vacation["start_date"]
-            end = vacation["end_date"]
+    async def async_add_lesson(self, weekday: str, lesson: dict[str, Any]) -> None:
+        """Add a lesson to ``weekday``."""
+        edit = ScheduleEdit(self.store.data)
+        edit.add_lesson(weekday, lesson)
+        await self.async_apply_edit(edit)
 
-            if start <= date_str <= end:
-                return True, vacation["label"]
+    async def async_update_lesson(
+        self,
+        weekday: str,
+        index: int,
+        changes: dict[str, Any],
+        target_weekday: str | None = None,
+    ) -> None:
+        """Update fields of a lesson, optionally moving it to another day."""
+        edit = ScheduleEdit(self.store.data)
+        edit.update_lesson(weekday, index, changes, target_weekday)
+        await self.async_apply_edit(edit)
 
-        return False, None
+    async def async_remove_lesson(self, weekday: str, index: int) -> None:
+        """Remove a lesson from ``weekday``."""
+        edit = ScheduleEdit(self.store.data)
+        edit.remove_lesson(weekday, index)
+        await self.async_apply_edit(edit)
 
-    def _get_current_lesson(
-        self, now: datetime, lessons: list[dict[str, Any]]
-    ) -> dict[str, Any] | None:
-        """Get the current lesson if any."""
-        current_time = now.strftime("%H:%M")
+    async def async_add_vacation(self, vacation: dict[str, Any]) -> None:
+        """Add a vacation period."""
+        edit = ScheduleEdit(self.store.data)
+        edit.add_vacation(vacation)
+        await self.async_apply_edit(edit)
 
-        for lesson in lessons:
-            if lesson["start_time"] <= current_time < lesson["end_time"]:
-                return lesson
+    async def async_update_vacation(
+        self, index: int, changes: dict[str, Any]
+    ) -> None:
+        """Update fields of a vacation period."""
+        edit = ScheduleEdit(self.store.data)
+        edit.update_vacation(index, changes)
+        await self.async_apply_edit(edit)
 
-        return None
+    async def async_remove_vacation(self, index: int) -> None:
+        """Remove a vacation period."""
+        edit = ScheduleEdit(self.store.data)
+        edit.remove_vacation(index)
+        await self.async_apply_edit(edit)
 
-    def _get_next_lesson(
-        self, now: datetime, lessons: list[dict[str, Any]]
-    ) -> dict[str, Any] | None:
-        """Get the next upcoming lesson."""
-        current_time = now.strftime("%H:%M")
+    async def async_add_exception(self, exception: dict[str, Any]) -> None:
+        """Add a date-specific exception."""
+        edit = ScheduleEdit(self.store.data)
+        edit.add_exception(exception)
+        await self.async_apply_edit(edit)
 
-        for lesson in lessons:
-            if lesson["start_time"] > current_time:
-                return lesson
+    async def async_remove_exception(self, index: int) -> None:
+        """Remove a date-specific exception."""
+        edit = ScheduleEdit(self.store.data)
+        edit.remove_exception(index)
+        await self.async_apply_edit(edit)
 
-        return None
+    async def async_sync_exceptions(
+        self, source: str, exceptions: list[dict[str, Any]]
+    ) -> tuple[int, int]:
+        """Replace the exceptions of ``source``, writing only if some changed.
 
-    def _get_remaining_lessons(
-        self, now: datetime, lessons: list[dict[str, Any]]
-    ) -> list[dict[str, Any]]:
-        """Get remaining lessons for today."""
-        current_time = now.strftime("%H:%M")
+        Returns the numbers of added and removed exceptions.
+        """
+        merged = merge_exceptions(
+            self.store.data["exceptions"], exceptions, source, self.clock.now().toordinal()
+        )
+        if merged is None:
+            return 0, 0
+        merged_exceptions, added, removed = merged
+        edit = ScheduleEdit(self.store.data)
+        edit.set_exceptions(merged_exceptions)
+        await self.async_apply_edit(edit)
+        return added, removed
+
+    @callback
+    def _async_prune_exceptions(self, ordinal: int) -> None:
+        """Drop the exceptions that only affect days before ``ordinal``."""
+        exceptions = prune(self.store.data["exceptions"], ordinal)
+        self.store.async_update({"exceptions": exceptions})
+        self.schedule.update_exceptions(exceptions)
+        self.occurrences.invalidate()
+
+    def snapshot(self, day: date) -> DaySnapshot:
+        """Return the snapshot of ``day`` for the current schedule revision."""
+        return self._snapshots.get(self.schedule, day.toordinal(), self.store.revision)
+
+    def get_upcoming(self, count: int) -> list[dict[str, Any]]:
+        """Return the next ``count`` lessons, looking ahead across days."""
+        return self.schedule.upcoming(self.clock.now(), count)
 
-        return [lesson for lesson in lessons if lesson["end_time"] > current_time]
+    def get_occurrences(self, start: date, end: date) -> list[Occurrence]:
+        """Return the lesson occurrences from ``start`` to ``end`` inclusive."""
+        if end < start:
+            raise ValueError("End date is before start date")
+        if (end - start).days >= MAX_OCCURRENCE_DAYS:
+            raise ValueError(f"Date range exceeds {MAX_OCCURRENCE_DAYS} days")
+        return self.occurrences.between(start, end)
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Notify the listeners whose part of the data changed."""
+        data = self.data or {}
+        changed: dict[tuple[str, ...], bool] = {}
+        for update_callback, context in list(self._listeners.values()):
+            if context is None:
+                update_callback()
+                continue
+            if context not in changed:
+                fingerprint = (
+                    self.last_update_success,
+                    *(data.get(key) for key in context),
+                )
+                changed[context] = self._fingerprints.get(context) != fingerprint
+                self._fingerprints[context] = fingerprint
+            if changed[context]:
+                self.stats.incr("writes_emitted")
+                update_callback()
+            else:
+                self.stats.incr("writes_suppressed")
 
     async def _async_update_data(self) -> dict[str, Any]:
-        """Fetch data from config entry."""
-        now = dt_util.now()
-        weekday = WEEKDAY_MAP[now.weekday()]
-
-        # Check if in vacation
-        is_vacation, vacation_name = self._check_vacation(now)
-
-        # Get today's lessons
-        today_lessons = self._get_lessons_for_day(weekday)
-
-        # Get current and next lessons
-        current_lesson = self._get_current_lesson(now, today_lessons)
-        next_lesson = self._get_next_lesson(now, today_lessons)
-
-        # Get remaining lessons
-        remaining_lessons = self._get_remaining_lessons(now, today_lessons)
-
-        # Determine current state
-        if is_vacation:
-            state = f"Vacation: {vacation_name}"
-        elif current_lesson:
-            state = current_lesson["subject"]
-        elif next_lesson:
-            state = "Free Period"
-        elif today_lessons:
-            state = "After School"
-        else:
-            state = "No School Today"
-
-        # Build result data
-        return {
-            "state": state,
-            "current_lesson": current_lesson,
-            "next_lesson": next_lesson,
-            "today_lessons": today_lessons,
-            "remaining_today_count": len(remaining_lessons),
-            "is_vacation": is_vacation,
-            "vacation_name": vacation_name,
-            "is_school_day": len(today_lessons) > 0,
-            "is_schooltime": current_lesson is not None,
-            "weekday": weekday,
-        }
+        """Compute the current state from the compiled schedule."""
+        with self.stats.timer("refresh_ms"):
+            return self._compute_data()
+
+    def _compute_data(self) -> dict[str, Any]:
+        """Compute the current state and schedule the next refresh."""
+        now = self.clock.now()
+        if self.schedule.exceptions.expired(now.toordinal()):
+            self._async_prune_exceptions(now.toordinal())
+
+        # Hand the next state change to the shared scheduler
+        self.next_boundary = self.schedule.next_boundary(now)
+        self._scheduler.async_schedule(self.config_entry.entry_id, self.next_boundary)
+
+        return self.evaluate(now)
+
+    def evaluate(self, now: datetime) -> dict[str, Any]:
+        """Return the data at ``now`` without scheduling a refresh."""
+        data = self.schedule.evaluate(now, self.snapshot(now.date()))
+        data["revision"] = self.store.revision
+        return data
+
+
+@callback
+def async_get_coordinators(hass: HomeAssistant) -> list[TimetableCoordinator]:
+    """Return the coordinators of all loaded timetables."""
+    return [
+        entry_data["coordinator"] for entry_data in hass.data.get(DOMAIN, {}).values()
+    ]
+
+
+@callback
+def async_find_coordinator(
+    hass: HomeAssistant, entry_id: str | None = None, schedule_id: str | None = None
+) -> TimetableCoordinator | None:
+    """Return the coordinator addressed by entry or schedule ID.
+
+    Without either ID the first loaded timetable is returned.
+    """
+    for coordinator in async_get_coordinators(hass):
+        if entry_id is not None and coordinator.config_entry.entry_id != entry_id:
+            continue
+        if schedule_id is not None and coordinator.schedule_id != schedule_id:
+            continue
+        return coordinator
+    return None
@@ -0,0 +1,93 @@
+"""Diagnostics support for TimeTable."""
+from __future__ import annotations
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+from homeassistant.components.diagnostics import REDACTED, async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_SYNC_SOURCE, DATA_SCHEDULER, DOMAIN
+from .coordinator import TimetableCoordinator
+from .schedule import Lesson
+from .sync import SubstitutionSync
+from .validation import find_conflicts
+
+# Plan URLs can carry credentials
+TO_REDACT = {CONF_SYNC_SOURCE}
+
+
+def _check_lessons(
+    lessons: Mapping[str, Sequence[Mapping[str, Any]]],
+) -> tuple[int, int]:
+    """Return the numbers of invalid and of overlapping stored lessons.
+
+    Invalid lessons are skipped by the compiled schedule, so they are
+    counted and left out of the overlap check instead of failing it.
+    """
+    invalid = 0
+    valid: dict[str, list[Mapping[str, Any]]] = {}
+    for weekday, day in lessons.items():
+        valid[weekday] = []
+        for lesson in day:
+            try:
+                Lesson(lesson)
+            except (KeyError, ValueError):
+                invalid += 1
+            else:
+                valid[weekday].append(lesson)
+    return invalid, len(find_conflicts(valid))
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinator: TimetableCoordinator = entry_data["coordinator"]
+    sync: SubstitutionSync = entry_data["sync"]
+    store_data = coordinator.store.data
+    schedule = coordinator.schedule
+    scheduler = hass.data.get(DATA_SCHEDULER)
+    invalid_lessons, overlapping_lessons = _check_lessons(store_data["lessons"])
+    last_error = sync.last_error
+    if last_error and sync.source:
+        # Fetch errors quote the plan URL
+        last_error = last_error.replace(sync.source, REDACTED)
+
+    return {
+        "options": async_redact_data(dict(entry.options), TO_REDACT),
+        "schedule": {
+            "revision": coordinator.store.revision,
+            "lessons": {
+                weekday: len(lessons)
+                for weekday, lessons in store_data["lessons"].items()
+            },
+            "vacations": len(store_data["vacations"]),
+            "merged_vacations": len(schedule.vacations),
+            "exceptions": len(store_data["exceptions"]),
+            "exception_days": len(schedule.exceptions),
+            "rotation_weeks": schedule.rotation.weeks,
+            "skipped_weeks": len(schedule.rotation.skipped),
+            "invalid_lessons": invalid_lessons,
+            "overlapping_lessons": overlapping_lessons,
+        },
+        "coordinator": {
+            "last_update_success": coordinator.last_update_success,
+            "next_boundary": coordinator.next_boundary,
+        },
+        "scheduler": {
+            "wakeups": scheduler.wakeups if scheduler is not None else None,
+        },
+        "sync": {
+            "configured": sync.source is not None,
+            "format": sync.parser,
+            "last_status": sync.last_status,
+            "last_error": last_error,
+            "last_checked": sync.last_checked,
+            "last_changed": sync.last_changed,
+            "stats": sync.stats,
+        },
+        "statistics": coordinator.stats.as_dict(),
+    }
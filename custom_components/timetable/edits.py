@@ -0,0 +1,181 @@
+"""Batched edits of a stored schedule.
+
+Edits are applied to copies of only the weekday lists, the vacation list
+and the exception list they touch, so a batch of any size is validated as
+a whole and committed with one store write, one recompile of the touched
+days and one refresh.
+"""
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from .overlay import parse_exception
+from .schedule import Lesson, parse_time
+from .vacations import parse_vacation
+
+
+def _lesson_order(lesson: Mapping[str, Any]) -> str:
+    """Return the sort key of stored lessons."""
+    return lesson["start_time"]
+
+
+def check_exception(exception: Mapping[str, Any]) -> None:
+    """Raise if a date-specific exception is invalid."""
+    parse_exception(exception)
+    if exception.get("start_time"):
+        parse_time(exception["start_time"])
+    if exception["type"] == "add":
+        Lesson(exception["lesson"])
+
+
+class ScheduleEdit:
+    """Working copy of the parts of a schedule changed by a batch of edits."""
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        """Start editing the stored schedule ``data``."""
+        self._data = data
+        self.lessons: dict[str, list[dict[str, Any]]] = {}
+        self.vacations: list[dict[str, Any]] | None = None
+        self.exceptions: list[dict[str, Any]] | None = None
+
+    def _day(self, weekday: str) -> list[dict[str, Any]]:
+        """Return the working copy of the lessons of ``weekday``."""
+        if weekday not in self.lessons:
+            self.lessons[weekday] = list(self._data["lessons"].get(weekday, []))
+        return self.lessons[weekday]
+
+    def _vacations(self) -> list[dict[str, Any]]:
+        """Return the working copy of the vacations."""
+        if self.vacations is None:
+            self.vacations = list(self._data["vacations"])
+        return self.vacations
+
+    def _exceptions(self) -> list[dict[str, Any]]:
+        """Return the working copy of the exceptions."""
+        if self.exceptions is None:
+            self.exceptions = list(self._data.get("exceptions", []))
+        return self.exceptions
+
+    @staticmethod
+    def _check_index(items: list[Any], index: int, kind: str) -> None:
+        """Raise if ``index`` does not address one of ``items``."""
+        if index < 0 or index >= len(items):
+            raise ValueError(f"Invalid {kind} index: {index}")
+
+    def add_lesson(self, weekday: str, lesson: dict[str, Any]) -> None:
+        """Add a lesson to ``weekday``."""
+        Lesson(lesson)
+        lessons = self._day(weekday)
+        lessons.append(lesson)
+        lessons.sort(key=_lesson_order)
+
+    def update_lesson(
+        self,
+        weekday: str,
+        index: int,
+        changes: Mapping[str, Any],
+        target_weekday: str | None = None,
+    ) -> None:
+        """Update fields of a lesson, optionally moving it to another day."""
+        lessons = self._day(weekday)
+        self._check_index(lessons, index, "lesson")
+        lesson = {**lessons[index], **changes}
+        Lesson(lesson)
+        if target_weekday is None or target_weekday == weekday:
+            lessons[index] = lesson
+            lessons.sort(key=_lesson_order)
+            return
+        lessons.pop(index)
+        self.add_lesson(target_weekday, lesson)
+
+    def remove_lesson(self, weekday: str, index: int) -> None:
+        """Remove a lesson from ``weekday``."""
+        lessons = self._day(weekday)
+        self._check_index(lessons, index, "lesson")
+        lessons.pop(index)
+
+    def set_lessons(self, weekday: str, lessons: list[dict[str, Any]]) -> None:
+        """Replace all lessons of ``weekday``."""
+        for lesson in lessons:
+            Lesson(lesson)
+        self.lessons[weekday] = sorted(lessons, key=_lesson_order)
+
+    def add_vacation(self, vacation: dict[str, Any]) -> None:
+        """Add a vacation period."""
+        parse_vacation(vacation)
+        vacations = self._vacations()
+        vacations.append(vacation)
+        vacations.sort(key=lambda item: item["start_date"])
+
+    def update_vacation(self, index: int, changes: Mapping[str, Any]) -> None:
+        """Update fields of a vacation period."""
+        vacations = self._vacations()
+        self._check_index(vacations, index, "vacation")
+        vacation = {**vacations[index], **changes}
+        parse_vacation(vacation)
+        vacations[index] = vacation
+        vacations.sort(key=lambda item: item["start_date"])
+
+    def remove_vacation(self, index: int) -> None:
+        """Remove a vacation period."""
+        vacations = self._vacations()
+        self._check_index(vacations, index, "vacation")
+        vacations.pop(index)
+
+    def add_exception(self, exception: dict[str, Any]) -> None:
+        """Add a date-specific exception."""
+        check_exception(exception)
+        exceptions = self._exceptions()
+        exceptions.append(exception)
+        exceptions.sort(key=lambda item: item["date"])
+
+    def remove_exception(self, index: int) -> None:
+        """Remove a date-specific exception."""
+        exceptions = self._exceptions()
+        self._check_index(exceptions, index, "exception")
+        exceptions.pop(index)
+
+    def set_exceptions(self, exceptions: list[dict[str, Any]]) -> None:
+        """Replace all date-specific exceptions."""
+        for exception in exceptions:
+            check_exception(exception)
+        self.exceptions = sorted(exceptions, key=lambda item: item["date"])
+
+    def apply(self, operation: Mapping[str, Any]) -> None:
+        """Apply one operation of a batch, dispatched on its ``action``."""
+        action = operation["action"]
+        if action == "add_lesson":
+            self.add_lesson(operation["weekday"], operation["lesson"])
+        elif action == "update_lesson":
+            self.update_lesson(
+                operation["weekday"],
+                operation["lesson_index"],
+                operation["lesson"],
+                operation.get("target_weekday"),
+            )
+        elif action == "remove_lesson":
+            self.remove_lesson(operation["weekday"], operation["lesson_index"])
+        elif action == "add_vacation":
+            self.add_vacation(operation["vacation"])
+        elif action == "update_vacation":
+            self.update_vacation(operation["vacation_index"], operation["vacation"])
+        elif action == "remove_vacation":
+            self.remove_vacation(operation["vacation_index"])
+        elif action == "add_exception":
+            self.add_exception(operation["exception"])
+        elif action == "remove_exception":
+            self.remove_exception(operation["exception_index"])
+        else:
+            raise ValueError(f"Unknown action: {action}")
+
+    def changes(self) -> dict[str, Any]:
+        """Return the store changes of this edit."""
+        changes: dict[str, Any] = {}
+        if self.lessons:
+            changes["lessons"] = {**self._data["lessons"], **self.lessons}
+        if self.vacations is not None:
+            changes["vacations"] = self.vacations
+        if self.exceptions is not None:
+            changes["exceptions"] = self.exceptions
+        return changes
@@ -10,7 +10,8 @@ class TimetablePanel extends HTMLElement {
     this.attachShadow({ mode: 'open' });
     this._hass = null;
     this._config = null;
-    this._selectedSchedule = 'default';
+    this._selectedSchedule = null;
+    this._schedules = [];
     this._loading = true;
     this._editingLesson = null;
     this._editingVacation = null;
@@ -24,19 +25,25 @@ class TimetablePanel extends HTMLElement {
     this._undoStack = [];
     this._redoStack = [];
     this._activeTab = 'schedule';
+    this._schedule = null;
   }
 
   set hass(hass) {
+    // Schedule changes arrive over the subscription; other state changes are ignored
+    const firstUpdate = !this._hass;
     this._hass = hass;
-    this._loading = false;
-    // Don't re-render if a modal is open to prevent input focus loss
-    if (!this._showLessonEditor && !this._showVacationEditor &&
-        !this._showTemplateSelector && !this._showImportExport &&
-        !this._showDashboardHelper) {
+    if (firstUpdate) {
+      this._loadSchedule();
       this.render();
     }
   }
 
+  _hasOpenModal() {
+    return this._showLessonEditor || this._showVacationEditor ||
+      this._showTemplateSelector || this._showImportExport ||
+      this._showDashboardHelper;
+  }
+
   connectedCallback() {
     console.info(
       '%c TIMETABLE-PANEL %c 4.0.4 ',
@@ -52,6 +59,9 @@ class TimetablePanel extends HTMLElement {
 
     this.render();
     this._attachKeyboardShortcuts();
+    if (this._hass) {
+      this._loadSchedule();
+    }
   }
 
   _suppressKnownErrors() {
@@ -118,6 +128,7 @@ class TimetablePanel extends HTMLElement {
 
   disconnectedCallback() {
     this._detachKeyboardShortcuts();
+    this._unsubscribeSchedule();
   }
 
   _attachKeyboardShortcuts() {
@@ -158,38 +169,94 @@ class TimetablePanel extends HTMLElement {
     return entry ? entry.entry_id : null;
   }
 
-  _getConfigEntry() {
-    if (!this._hass) return null;
-
-    // Find the timetable config entry
-    // Try multiple ways to access config entries
-    let entries = [];
-
-    if (this._hass.config_entries) {
-      entries = this._hass.config_entries;
-    } else if (this._hass.states) {
-      // Fallback: try to get from integration entity
-      const entity = Object.values(this._hass.states).find(
-        state => state.entity_id.startsWith('sensor.timetable_')
-      );
-      if (entity && entity.attributes.config_entry_id) {
-        // Try to construct entry info from entity
-        return {
-          entry_id: entity.attributes.config_entry_id,
-          domain: 'timetable',
-          options: entity.attributes.schedule || {}
-        };
+  async _loadSchedule() {
+    // The schedule lives in the integration's own storage, not in the entry options
+    try {
+      this._schedules = await this._hass.callWS({ type: 'timetable/schedules/list' });
+      if (!this._schedules.some(schedule => schedule.entry_id === this._selectedSchedule)) {
+        this._selectedSchedule = this._schedules.length ? this._schedules[0].entry_id : null;
       }
+    } catch (error) {
+      console.warn('TimeTable: Could not load schedules:', error);
+      this._selectedSchedule = null;
     }
+    this._subscribeSchedule();
+  }
 
-    const entry = entries.find(entry => entry.domain === 'timetable');
+  _subscribeSchedule() {
+    if (this._subscription && this._subscribedSchedule === this._selectedSchedule) {
+      return;
+    }
+    this._unsubscribeSchedule();
+    if (!this._selectedSchedule) {
+      this._loading = false;
+      this.render();
+      return;
+    }
+    this._subscribedSchedule = this._selectedSchedule;
+    this._subscription = this._hass.connection.subscribeMessage(
+      (event) => this._handleScheduleEvent(event),
+      { type: 'timetable/subscribe', entry_id: this._selectedSchedule }
+    ).catch((error) => {
+      console.warn('TimeTable: Could not load schedule:', error);
+      this._subscription = null;
+      this._loading = false;
+      this.render();
+    });
+  }
+
+  _unsubscribeSchedule() {
+    if (this._subscription) {
+      this._subscription.then((unsubscribe) => unsubscribe && unsubscribe());
+      this._subscription = null;
+    }
+    this._subscribedSchedule = null;
+    this._schedule = null;
+  }
+
+  _resyncSchedule() {
+    // A new subscription starts with a full snapshot of the stored schedule
+    this._unsubscribeSchedule();
+    this._loading = true;
+    this._subscribeSchedule();
+  }
 
-    // Debug logging
-    if (!entry) {
-      console.warn('TimeTable: Config entry not found. Available entries:', entries.map(e => e.domain));
+  _handleScheduleEvent(event) {
+    // The first event is a full snapshot, later ones only carry what changed
+    if (event.snapshot) {
+      this._schedule = { entry_id: event.entry_id, lessons: {}, vacations: [] };
+    }
+    const schedule = this._schedule;
+    if (!schedule) {
+      return;
     }
+    Object.assign(schedule.lessons, event.lessons || {});
+    if (event.vacations) schedule.vacations = event.vacations;
+    if ('name' in event) schedule.name = event.name;
+    if ('include_weekends' in event) schedule.include_weekends = event.include_weekends;
+    schedule.revision = event.revision;
+    this._loading = false;
+    // Don't re-render if a modal is open to prevent input focus loss
+    if (!this._hasOpenModal()) {
+      this.render();
+    }
+  }
 
-    return entry;
+  _selectSchedule(entryId) {
+    this._selectedSchedule = entryId;
+    this._undoStack = [];
+    this._redoStack = [];
+    this._loadSchedule();
+  }
+
+  _getConfigEntry() {
+    if (!this._schedule) return null;
+
+    return {
+      entry_id: this._schedule.entry_id,
+      domain: 'timetable',
+      options: this._schedule
+    };
   }
 
   _getScheduleData() {
@@ -285,7 +352,13 @@ class TimetablePanel extends HTMLElement {
           <div class="stats">
             <div class="stat">
               <span class="stat-label">Schedule</span>
-              <span class="stat-value">${scheduleData.name}</span>
+              ${this._schedules.length > 1 ? `
+                <select class="stat-value schedule-select" id="schedule-select">
+                  ${this._schedules.map(schedule => `
+                    <option value="${schedule.entry_id}" ${schedule.entry_id === this._selectedSchedule ? 'selected' : ''}>${schedule.name}</option>
+                  `).join('')}
+                </select>
+              ` : `<span class="stat-value">${scheduleData.name}</span>`}
             </div>
             <div class="stat">
               <span class="stat-label">Total Lessons</span>
@@ -420,31 +493,24 @@ class TimetablePanel extends HTMLElement {
     if (!entryId) return;
 
     try {
-      const entry = this._getConfigEntry();
-      const currentOptions = { ...entry.options };
-      const lessons = { ...currentOptions.lessons };
-
-      // Remove from source
-      lessons[sourceWeekday] = [...lessons[sourceWeekday]];
-      lessons[sourceWeekday].splice(sourceIndex, 1);
-
-      // Add to target
-      if (!lessons[targetWeekday]) lessons[targetWeekday] = [];
-      lessons[targetWeekday] = [...lessons[targetWeekday], lesson];
-      lessons[targetWeekday].sort((a, b) => a.start_time.localeCompare(b.start_time));
-
       await this._hass.callWS({
-        type: 'config_entries/options/update',
+        type: 'timetable/lesson/update',
         entry_id: entryId,
-        options: {
-          ...currentOptions,
-          lessons
+        weekday: sourceWeekday,
+        lesson_index: sourceIndex,
+        target_weekday: targetWeekday,
+        lesson: {
+          start_time: lesson.start_time,
+          end_time: lesson.end_time
         }
       });
 
-      setTimeout(() => this.render(), 500);
+      this.render();
     } catch (error) {
       console.error('Failed to move lesson:', error);
+      // Rejected moves (e.g. onto another lesson) leave the stored schedule as is
+      alert(`Error moving lesson: ${error.message}`);
+      this._resyncSchedule();
     }
   }
 
@@ -512,23 +578,22 @@ class TimetablePanel extends HTMLElement {
       const entryId = this._getConfigEntryId();
       if (entryId) {
         try {
-          const entry = this._getConfigEntry();
-          const currentOptions = { ...entry.options };
-          const lessons = { ...currentOptions.lessons };
-          lessons[weekday] = [...lessons[weekday]];
-
           await this._hass.callWS({
-            type: 'config_entries/options/update',
+            type: 'timetable/lesson/update',
             entry_id: entryId,
-            options: {
-              ...currentOptions,
-              lessons
+            weekday,
+            lesson_index: index,
+            lesson: {
+              start_time: lesson.start_time,
+              end_time: lesson.end_time
             }
           });
 
-          setTimeout(() => this.render(), 500);
+          this.render();
         } catch (error) {
           console.error('Failed to save resized lesson:', error);
+          alert(`Error saving lesson: ${error.message}`);
+          this._resyncSchedule();
         }
       }
     }
@@ -1037,6 +1102,9 @@ show_colors: true`;
     const importExportBtn = this.shadowRoot.getElementById('import-export-btn');
     const dashboardBtn = this.shadowRoot.getElementById('dashboard-btn');
 
+    const scheduleSelect = this.shadowRoot.getElementById('schedule-select');
+    if (scheduleSelect) scheduleSelect.addEventListener('change', (e) => this._selectSchedule(e.target.value));
+
     if (undoBtn) undoBtn.addEventListener('click', () => this._undo());
     if (redoBtn) redoBtn.addEventListener('click', () => this._redo());
     if (templateBtn) templateBtn.addEventListener('click', () => {
@@ -1391,42 +1459,30 @@ show_colors: true`;
     this._saveState(); // Save for undo
 
     try {
-      // Get current options
-      const entry = this._getConfigEntry();
-      const currentOptions = { ...entry.options };
-      const lessons = { ...currentOptions.lessons };
-
-      // Initialize weekday array if needed
-      if (!lessons[weekday]) {
-        lessons[weekday] = [];
-      }
-
+      // Patch the single lesson; the backend re-sorts and refreshes in place
       if (index !== null) {
-        // Update existing lesson
-        lessons[weekday][index] = data;
+        await this._hass.callWS({
+          type: 'timetable/lesson/update',
+          entry_id: entryId,
+          weekday,
+          lesson_index: index,
+          lesson: data
+        });
       } else {
-        // Add new lesson
-        lessons[weekday].push(data);
-        // Sort by start_time
-        lessons[weekday].sort((a, b) => a.start_time.localeCompare(b.start_time));
+        await this._hass.callWS({
+          type: 'timetable/lesson/add',
+          entry_id: entryId,
+          weekday,
+          lesson: data
+        });
       }
 
-      // Update config entry options
-      await this._hass.callWS({
-        type: 'config_entries/options/update',
-        entry_id: entryId,
-        options: {
-          ...currentOptions,
-          lessons
-        }
-      });
-
       // Close editor
       this._showLessonEditor = false;
       this._editingLesson = null;
 
-      // Reload to show changes
-      setTimeout(() => this.render(), 500);
+      // The subscription has already delivered the change
+      this.render();
     } catch (error) {
       console.error('Failed to save lesson:', error);
       alert(`Error saving lesson: ${error.message}`);
@@ -1442,24 +1498,14 @@ show_colors: true`;
     if (!entryId) return;
 
     try {
-      const entry = this._getConfigEntry();
-      const currentOptions = { ...entry.options };
-      const lessons = { ...currentOptions.lessons };
-
-      if (lessons[weekday]) {
-        lessons[weekday].splice(index, 1);
-      }
-
       await this._hass.callWS({
-        type: 'config_entries/options/update',
+        type: 'timetable/lesson/remove',
         entry_id: entryId,
-        options: {
-          ...currentOptions,
-          lessons
-        }
+        weekday,
+        lesson_index: index
       });
 
-      setTimeout(() => this.render(), 500);
+      this.render();
     } catch (error) {
       console.error('Failed to delete lesson:', error);
       alert(`Error deleting lesson: ${error.message}`);
@@ -1510,30 +1556,25 @@ show_colors: true`;
     this._saveState(); // Save for undo
 
     try {
-      const entry = this._getConfigEntry();
-      const currentOptions = { ...entry.options };
-      const vacations = [...(currentOptions.vacations || [])];
-
       if (index !== null) {
-        vacations[index] = data;
+        await this._hass.callWS({
+          type: 'timetable/vacation/update',
+          entry_id: entryId,
+          vacation_index: index,
+          vacation: data
+        });
       } else {
-        vacations.push(data);
-        vacations.sort((a, b) => a.start_date.localeCompare(b.start_date));
+        await this._hass.callWS({
+          type: 'timetable/vacation/add',
+          entry_id: entryId,
+          vacation: data
+        });
       }
 
-      await this._hass.callWS({
-        type: 'config_entries/options/update',
-        entry_id: entryId,
-        options: {
-          ...currentOptions,
-          vacations
-        }
-      });
-
       this._showVacationEditor = false;
       this._editingVacation = null;
 
-      setTimeout(() => this.render(), 500);
+      this.render();
     } catch (error) {
       console.error('Failed to save vacation:', error);
       alert(`Error saving vacation: ${error.message}`);
@@ -1549,22 +1590,13 @@ show_colors: true`;
     if (!entryId) return;
 
     try {
-      const entry = this._getConfigEntry();
-      const currentOptions = { ...entry.options };
-      const vacations = [...(currentOptions.vacations || [])];
-
-      vacations.splice(index, 1);
-
       await this._hass.callWS({
-        type: 'config_entries/options/update',
+        type: 'timetable/vacation/remove',
         entry_id: entryId,
-        options: {
-          ...currentOptions,
-          vacations
-        }
+        vacation_index: index
       });
 
-      setTimeout(() => this.render(), 500);
+      this.render();
     } catch (error) {
       console.error('Failed to delete vacation:', error);
       alert(`Error deleting vacation: ${error.message}`);
@@ -1612,12 +1644,13 @@ show_colors: true`;
 
     try {
       await this._hass.callWS({
-        type: 'config_entries/options/update',
+        type: 'timetable/schedule/set',
         entry_id: entry.entry_id,
-        options
+        lessons: options.lessons,
+        vacations: options.vacations
       });
 
-      setTimeout(() => this.render(), 500);
+      this.render();
     } catch (error) {
       console.error('Undo failed:', error);
       // Restore stack on failure
@@ -1641,12 +1674,13 @@ show_colors: true`;
 
     try {
       await this._hass.callWS({
-        type: 'config_entries/options/update',
+        type: 'timetable/schedule/set',
         entry_id: entry.entry_id,
-        options
+        lessons: options.lessons,
+        vacations: options.vacations
       });
 
-      setTimeout(() => this.render(), 500);
+      this.render();
     } catch (error) {
       console.error('Redo failed:', error);
       // Restore stack on failure
@@ -1806,15 +1840,10 @@ show_colors: true`;
         throw new Error('Config entry not found');
       }
 
-      const currentOptions = { ...entry.options };
-
       await this._hass.callWS({
-        type: 'config_entries/options/update',
+        type: 'timetable/schedule/set',
         entry_id: entryId,
-        options: {
-          ...currentOptions,
-          lessons: template.lessons
-        }
+        lessons: template.lessons
       });
 
       console.log('✓ Template applied successfully');
@@ -1830,7 +1859,7 @@ show_colors: true`;
     const newName = prompt('Enter name for duplicated schedule:');
     if (!newName || !newName.trim()) return;
 
-    alert('Note: Multiple schedules not yet fully supported. This will export current schedule for backup.');
+    alert('To create another schedule, add a new TimeTable integration entry and import this export there.');
 
     const scheduleData = this._getScheduleData();
     const exportData = {
@@ -1892,19 +1921,16 @@ show_colors: true`;
       const currentOptions = { ...entry.options };
 
       await this._hass.callWS({
-        type: 'config_entries/options/update',
+        type: 'timetable/schedule/set',
         entry_id: entryId,
-        options: {
-          ...currentOptions,
-          name: data.name || currentOptions.name,
-          lessons: data.lessons,
-          vacations: data.vacations || [],
-          include_weekends: data.include_weekends ?? currentOptions.include_weekends
-        }
+        name: data.name || currentOptions.name,
+        lessons: data.lessons,
+        vacations: data.vacations || [],
+        include_weekends: data.include_weekends ?? currentOptions.include_weekends
       });
 
       this._showImportExport = false;
-      setTimeout(() => this.render(), 500);
+      this.render();
       alert('Schedule imported successfully!');
     } catch (error) {
       console.error('Import failed:', error);
@@ -1976,6 +2002,19 @@ show_colors: true`;
           gap: 8px;
         }
 
+        .schedule-select {
+          background: rgba(255, 255, 255, 0.2);
+          border: none;
+          border-radius: 8px;
+          color: inherit;
+          font: inherit;
+          padding: 2px 8px;
+        }
+
+        .schedule-select option {
+          color: #333;
+        }
+
         .header-btn {
           display: flex;
           align-items: center;
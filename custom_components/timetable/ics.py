@@ -0,0 +1,274 @@
+"""iCalendar export of a compiled schedule.
+
+Every lesson of the weekly template becomes one weekly recurring event, and
+the school days lost to vacations are listed as EXDATEs of that series, so
+the feed size depends on the template and the vacation list rather than on
+the number of weeks covered. With a week rotation each week of the cycle
+gets its own series with an interval of the cycle length, split where
+skipped vacation weeks shift the cycle. Dates with exceptions are excluded from the
+series as well and carry their lessons as single events. Lines are
+generated lazily so the HTTP view can stream them. Times are local to the
+time zone of Home Assistant, which is described by a VTIMEZONE.
+"""
+from __future__ import annotations
+
+from calendar import monthrange
+from collections.abc import Iterator
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from .const import WEEKDAYS
+from .occurrences import school_weekdays, weekday_of
+from .schedule import MINUTES_PER_DAY, CompiledSchedule, Lesson
+
+BYDAY = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+# Longest content line in octets before folding (RFC 5545, 3.1)
+MAX_LINE_OCTETS = 75
+
+
+def escape(text: str) -> str:
+    """Escape a TEXT property value."""
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def fold(line: str) -> str:
+    """Fold a content line and terminate it with CRLF."""
+    encoded = line.encode()
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line + "\r\n"
+    parts = []
+    start = 0
+    limit = MAX_LINE_OCTETS
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # Never split a multi-byte UTF-8 sequence
+        while end < len(encoded) and encoded[end] & 0xC0 == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start = end
+        # Continuation lines start with a space
+        limit = MAX_LINE_OCTETS - 1
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _local(ordinal: int, minute: int) -> str:
+    """Format a local date-time value."""
+    # A lesson may end at 24:00, which is written as midnight of the next day
+    day = date.fromordinal(ordinal + minute // MINUTES_PER_DAY)
+    minute %= MINUTES_PER_DAY
+    return f"{day:%Y%m%d}T{minute // 60:02d}{minute % 60:02d}00"
+
+
+def _offset(delta: timedelta) -> str:
+    """Format a UTC offset as ``+HHMM`` (``+HHMMSS`` if needed)."""
+    seconds = int(delta.total_seconds())
+    sign = "-" if seconds < 0 else "+"
+    hours, rest = divmod(abs(seconds), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{sign}{hours:02d}{minutes:02d}" + (f"{seconds:02d}" if seconds else "")
+
+
+def _transitions(zone: ZoneInfo, year: int) -> list[datetime]:
+    """Return the UTC instants at which the offset of ``zone`` changes in ``year``."""
+    found = []
+    day = datetime(year, 1, 1, tzinfo=timezone.utc)
+    end = datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    while day < end:
+        following = day + timedelta(days=1)
+        offset = day.astimezone(zone).utcoffset()
+        if following.astimezone(zone).utcoffset() != offset:
+            # Narrow the change down to the minute
+            low, high = day, following
+            while high - low > timedelta(minutes=1):
+                middle = low + (high - low) / 2
+                if middle.astimezone(zone).utcoffset() == offset:
+                    low = middle
+                else:
+                    high = middle
+            found.append(high.replace(second=0, microsecond=0))
+        day = following
+    return found
+
+
+def vtimezone(time_zone: str, year: int) -> Iterator[str]:
+    """Yield a VTIMEZONE for ``time_zone`` with the rules observed in ``year``.
+
+    Each offset change of ``year`` becomes a yearly observance on the same
+    weekday of its month (e.g. the last Sunday of March), which is how
+    current daylight saving rules are defined.
+    """
+    zone = ZoneInfo(time_zone)
+    yield fold("BEGIN:VTIMEZONE")
+    yield fold(f"TZID:{time_zone}")
+    if not (transitions := _transitions(zone, year)):
+        local = datetime(year, 1, 1, tzinfo=zone)
+        offset = _offset(local.utcoffset() or timedelta())
+        yield fold("BEGIN:STANDARD")
+        yield fold("DTSTART:19700101T000000")
+        yield fold(f"TZOFFSETFROM:{offset}")
+        yield fold(f"TZOFFSETTO:{offset}")
+        yield fold(f"TZNAME:{local.tzname()}")
+        yield fold("END:STANDARD")
+    for instant in transitions:
+        before = (instant - timedelta(minutes=1)).astimezone(zone)
+        after = instant.astimezone(zone)
+        kind = "DAYLIGHT" if after.dst() else "STANDARD"
+        # Observances start at the local time of the offset they replace
+        start = (instant + (before.utcoffset() or timedelta())).replace(tzinfo=None)
+        days = monthrange(start.year, start.month)[1]
+        nth = -1 if start.day + 7 > days else (start.day - 1) // 7 + 1
+        yield fold(f"BEGIN:{kind}")
+        yield fold(f"DTSTART:{start:%Y%m%dT%H%M%S}")
+        byday = f"{nth}{BYDAY[start.weekday()]}"
+        yield fold(f"RRULE:FREQ=YEARLY;BYMONTH={start.month};BYDAY={byday}")
+        yield fold(f"TZOFFSETFROM:{_offset(before.utcoffset() or timedelta())}")
+        yield fold(f"TZOFFSETTO:{_offset(after.utcoffset() or timedelta())}")
+        yield fold(f"TZNAME:{after.tzname()}")
+        yield fold(f"END:{kind}")
+    yield fold("END:VTIMEZONE")
+
+
+def _until(ordinal: int, zone: ZoneInfo) -> str:
+    """Format the end of a local day as the UTC ``UNTIL`` of a series."""
+    end = datetime.combine(date.fromordinal(ordinal), time(23, 59, 59), tzinfo=zone)
+    return f"{end.astimezone(timezone.utc):%Y%m%dT%H%M%SZ}"
+
+
+def _lesson_lines(lesson: Lesson) -> Iterator[str]:
+    """Yield the descriptive properties of a lesson event."""
+    data = lesson.data
+    yield fold(f"SUMMARY:{escape(lesson.subject)}")
+    if room := data.get("room"):
+        yield fold(f"LOCATION:{escape(room)}")
+    details = [data.get("teacher"), data.get("notes")]
+    if description := "\n".join(detail for detail in details if detail):
+        yield fold(f"DESCRIPTION:{escape(description)}")
+
+
+def iter_calendar(
+    schedule: CompiledSchedule,
+    *,
+    name: str,
+    uid_prefix: str,
+    time_zone: str,
+    anchor: date,
+) -> Iterator[str]:
+    """Yield the folded lines of the calendar.
+
+    Lesson series start on the first matching weekday on or after ``anchor``.
+    Times are local to ``time_zone`` so lessons keep their wall-clock time
+    across daylight saving changes.
+    """
+    stamp = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}"
+    first = anchor.toordinal()
+    vacations = schedule.vacations
+    # Dates whose lessons differ from the template
+    overridden = [
+        ordinal
+        for ordinal in schedule.exceptions.ordinals
+        if ordinal >= first and not vacations.contains(ordinal)
+    ]
+
+    yield fold("BEGIN:VCALENDAR")
+    yield fold("VERSION:2.0")
+    yield fold("PRODID:-//TimeTable//Home Assistant//EN")
+    yield fold("CALSCALE:GREGORIAN")
+    yield fold(f"X-WR-CALNAME:{escape(name)}")
+    yield fold(f"X-WR-TIMEZONE:{time_zone}")
+    yield from vtimezone(time_zone, anchor.year)
+    zone = ZoneInfo(time_zone)
+
+    rotation = schedule.rotation
+    interval = f";INTERVAL={rotation.weeks}" if rotation.weeks > 1 else ""
+    segments = rotation.segments(first)
+    for weekday in school_weekdays(schedule):
+        first_day = first + (weekday - weekday_of(first)) % 7
+        # School days of this weekday that fall into a vacation
+        excluded = [
+            ordinal
+            for start, end in zip(vacations.starts, vacations.ends)
+            if end >= first_day
+            for ordinal in range(
+                start + (weekday - weekday_of(start)) % 7, end + 1, 7
+            )
+            if ordinal >= first_day
+        ]
+        excluded += [
+            ordinal
+            for ordinal in overridden
+            if ordinal >= first_day and weekday_of(ordinal) == weekday
+        ]
+        excluded.sort()
+
+        # One series per rotation week and stretch of unbroken rotation
+        for segment, (segment_start, segment_end) in enumerate(segments):
+            last = segment_end if segment_end is not None else date.max.toordinal()
+            # UNTIL is in UTC when DTSTART has a TZID (RFC 5545, 3.3.10)
+            until = (
+                f";UNTIL={_until(segment_end, zone)}" if segment_end is not None else ""
+            )
+            day = segment_start + (weekday - weekday_of(segment_start)) % 7
+            starts = {
+                rotation.week_of(ordinal): ordinal
+                for ordinal in range(day, min(day + 7 * rotation.weeks, last + 1), 7)
+            }
+            for week, dtstart in sorted(starts.items()):
+                suffix = f"-w{week + 1}" if rotation.weeks > 1 else ""
+                if segment:
+                    suffix += f"-s{segment}"
+                series_excluded = [
+                    ordinal
+                    for ordinal in excluded
+                    if dtstart <= ordinal <= last and rotation.week_of(ordinal) == week
+                ]
+                for pos, lesson in enumerate(schedule.weeks[week][weekday].lessons):
+                    yield fold("BEGIN:VEVENT")
+                    yield fold(
+                        f"UID:{uid_prefix}-{WEEKDAYS[weekday]}-{pos}{suffix}@timetable"
+                    )
+                    yield fold(f"DTSTAMP:{stamp}")
+                    yield fold(
+                        f"DTSTART;TZID={time_zone}:{_local(dtstart, lesson.start)}"
+                    )
+                    yield fold(f"DTEND;TZID={time_zone}:{_local(dtstart, lesson.end)}")
+                    yield fold(
+                        f"RRULE:FREQ=WEEKLY{interval};BYDAY={BYDAY[weekday]}{until}"
+                    )
+                    for ordinal in series_excluded:
+                        yield fold(
+                            f"EXDATE;TZID={time_zone}:{_local(ordinal, lesson.start)}"
+                        )
+                    yield from _lesson_lines(lesson)
+                    yield fold("END:VEVENT")
+
+    for ordinal in overridden:
+        day = date.fromordinal(ordinal)
+        for pos, lesson in enumerate(schedule.day_for(ordinal).lessons):
+            yield fold("BEGIN:VEVENT")
+            yield fold(f"UID:{uid_prefix}-{day:%Y%m%d}-{pos}@timetable")
+            yield fold(f"DTSTAMP:{stamp}")
+            yield fold(f"DTSTART;TZID={time_zone}:{_local(ordinal, lesson.start)}")
+            yield fold(f"DTEND;TZID={time_zone}:{_local(ordinal, lesson.end)}")
+            yield from _lesson_lines(lesson)
+            yield fold("END:VEVENT")
+
+    for pos, (start, end, label) in enumerate(
+        zip(vacations.starts, vacations.ends, vacations.labels)
+    ):
+        yield fold("BEGIN:VEVENT")
+        yield fold(f"UID:{uid_prefix}-vacation-{pos}@timetable")
+        yield fold(f"DTSTAMP:{stamp}")
+        yield fold(f"DTSTART;VALUE=DATE:{date.fromordinal(start):%Y%m%d}")
+        yield fold(f"DTEND;VALUE=DATE:{date.fromordinal(end + 1):%Y%m%d}")
+        yield fold(f"SUMMARY:{escape(label)}")
+        yield fold("TRANSP:TRANSPARENT")
+        yield fold("END:VEVENT")
+
+    yield fold("END:VCALENDAR")
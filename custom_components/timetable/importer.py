@@ -0,0 +1,398 @@
+"""Bulk import of timetables from iCalendar and CSV files.
+
+Files are parsed line by line. Dated lessons are not kept; each is counted
+against its weekly slot (weekday, times, subject, room), so memory grows
+with the size of the weekly template rather than with the number of events
+in the file. Slots seen often enough become lessons of the template, and
+all-day events become vacation ranges. Weekly series without an end count
+as lessons right away; series ending with ``UNTIL`` or ``COUNT`` count their
+occurrences, less the ``EXDATE`` ones.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+import csv
+from datetime import date, datetime, timedelta, timezone, tzinfo
+from typing import Any
+
+from .const import MAX_REPORTED_ERRORS, WEEKDAYS
+from .schedule import Lesson
+from .vacations import parse_vacation
+
+BYDAY = {"MO": 0, "TU": 1, "WE": 2, "TH": 3, "FR": 4, "SA": 5, "SU": 6}
+
+LESSON_FIELDS = ("room", "teacher", "notes", "color", "icon")
+
+# RRULE parts understood for weekly lesson series
+RRULE_PARTS = frozenset({"FREQ", "INTERVAL", "BYDAY", "UNTIL", "COUNT", "WKST"})
+
+
+class TemplateBuilder:
+    """Collapse imported events into weekly lessons and vacation ranges."""
+
+    def __init__(self, min_occurrences: int = 2) -> None:
+        """Initialize the builder.
+
+        Dated events become a weekly lesson once their slot was seen
+        ``min_occurrences`` times; series without an end count immediately.
+        """
+        self.min_occurrences = min_occurrences
+        self.events = 0
+        self.errors: list[str] = []
+        self._slots: dict[tuple[str, str, str, str, str], dict[str, Any]] = {}
+        self._counts: dict[tuple[str, str, str, str, str], int] = {}
+        self._holidays: list[tuple[int, int, str]] = []
+
+    def error(self, line: int, message: str) -> None:
+        """Record an invalid entry."""
+        self.errors.append(f"line {line}: {message}")
+
+    def add_lesson(
+        self,
+        line: int,
+        weekday: str,
+        lesson: dict[str, Any],
+        occurrences: int | None = 1,
+    ) -> None:
+        """Count ``occurrences`` of a lesson on ``weekday``.
+
+        ``None`` stands for a series without an end.
+        """
+        self.events += 1
+        try:
+            Lesson(lesson)
+        except (KeyError, ValueError) as err:
+            self.error(line, f"invalid lesson ({err})")
+            return
+        key = (
+            weekday,
+            lesson["start_time"],
+            lesson["end_time"],
+            lesson.get("subject", ""),
+            lesson.get("room", ""),
+        )
+        self._slots.setdefault(key, lesson)
+        count = self._counts.get(key, 0)
+        self._counts[key] = (
+            self.min_occurrences if occurrences is None else count + occurrences
+        )
+
+    def add_holiday(self, line: int, start: date, end: date, label: str) -> None:
+        """Record a vacation from ``start`` to ``end`` inclusive."""
+        self.events += 1
+        if end < start:
+            self.error(line, "vacation ends before it starts")
+            return
+        self._holidays.append((start.toordinal(), end.toordinal(), label))
+
+    def build(self) -> dict[str, Any]:
+        """Return the collected lessons and vacations as schedule data."""
+        lessons: dict[str, list[dict[str, Any]]] = {}
+        for key, lesson in self._slots.items():
+            if self._counts[key] >= self.min_occurrences:
+                lessons.setdefault(key[0], []).append(lesson)
+        for day_lessons in lessons.values():
+            day_lessons.sort(key=lambda lesson: lesson["start_time"])
+
+        # Holiday calendars often list every day as an event of its own
+        vacations: list[dict[str, Any]] = []
+        last_end = 0
+        for start, end, label in sorted(self._holidays):
+            if vacations and vacations[-1]["label"] == label and start <= last_end + 1:
+                last_end = max(last_end, end)
+                vacations[-1]["end_date"] = date.fromordinal(last_end).isoformat()
+                continue
+            last_end = end
+            vacations.append(
+                {
+                    "label": label,
+                    "start_date": date.fromordinal(start).isoformat(),
+                    "end_date": date.fromordinal(end).isoformat(),
+                }
+            )
+        return {"lessons": lessons, "vacations": vacations}
+
+    def raise_for_errors(self) -> None:
+        """Raise a single error listing the invalid entries, if any."""
+        if not self.errors:
+            return
+        shown = "; ".join(self.errors[:MAX_REPORTED_ERRORS])
+        more = len(self.errors) - MAX_REPORTED_ERRORS
+        if more > 0:
+            shown += f"; and {more} more"
+        raise ValueError(f"{len(self.errors)} invalid entries: {shown}")
+
+
+def _unfold(lines: Iterable[str]) -> Iterator[tuple[int, str]]:
+    """Yield unfolded content lines with the number of their first line."""
+    current = ""
+    start = 0
+    for number, raw in enumerate(lines, 1):
+        raw = raw.rstrip("\r\n")
+        if raw[:1] in (" ", "\t"):
+            current += raw[1:]
+            continue
+        if current:
+            yield start, current
+        current, start = raw, number
+    if current:
+        yield start, current
+
+
+def _split_property(line: str) -> tuple[str, dict[str, str], str]:
+    """Split a content line into name, parameters and value."""
+    in_quotes = False
+    for pos, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char == ":" and not in_quotes:
+            head, value = line[:pos], line[pos + 1 :]
+            break
+    else:
+        raise ValueError("missing ':'")
+    name, *params = head.split(";")
+    parameters = {}
+    for param in params:
+        key, _, param_value = param.partition("=")
+        parameters[key.upper()] = param_value.strip('"')
+    return name.upper(), parameters, value
+
+
+def _unescape(value: str) -> str:
+    """Unescape a TEXT property value."""
+    return (
+        value.replace("\\n", "\n")
+        .replace("\\N", "\n")
+        .replace("\\,", ",")
+        .replace("\\;", ";")
+        .replace("\\\\", "\\")
+    )
+
+
+def _parse_ics_datetime(value: str, time_zone: tzinfo) -> date | datetime:
+    """Parse a DATE or DATE-TIME value, converting UTC times to ``time_zone``."""
+    if "T" not in value:
+        return datetime.strptime(value, "%Y%m%d").date()
+    if value.endswith("Z"):
+        parsed = datetime.strptime(value, "%Y%m%dT%H%M%SZ")
+        return parsed.replace(tzinfo=timezone.utc).astimezone(time_zone)
+    # Floating and TZID times are taken as local wall-clock times
+    return datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+
+
+def _weekly_dates(
+    start: date, weekdays: list[int], until: date | None, count: int | None
+) -> Iterator[date]:
+    """Yield the dates of a weekly series starting on ``start``."""
+    monday = start - timedelta(days=start.weekday())
+    produced = 0
+    while True:
+        for weekday in weekdays:
+            day = monday + timedelta(days=weekday)
+            if day < start:
+                continue
+            if (until is not None and day > until) or (
+                count is not None and produced >= count
+            ):
+                return
+            produced += 1
+            yield day
+        monday += timedelta(weeks=1)
+
+
+def _add_ics_series(
+    builder: TemplateBuilder,
+    line: int,
+    event: dict[str, Any],
+    rule: dict[str, str],
+    start: datetime,
+    lesson: dict[str, Any],
+    time_zone: tzinfo,
+) -> None:
+    """Add the lessons of a weekly RRULE to ``builder``."""
+    if unsupported := sorted(rule.keys() - RRULE_PARTS):
+        builder.error(line, f"unsupported RRULE part {', '.join(unsupported)}")
+        return
+    if rule.get("FREQ") != "WEEKLY":
+        builder.error(line, f"unsupported RRULE frequency {rule.get('FREQ')}")
+        return
+    if rule.get("INTERVAL", "1") != "1":
+        # Such series need a week rotation, which the import does not set up
+        builder.error(
+            line,
+            f"unsupported RRULE INTERVAL={rule['INTERVAL']}, only weekly series",
+        )
+        return
+    days = {day[-2:] for day in rule.get("BYDAY", "").split(",")}
+    weekdays = sorted(BYDAY[day] for day in days if day in BYDAY) or [start.weekday()]
+
+    until: date | None = None
+    count: int | None = None
+    try:
+        if "UNTIL" in rule:
+            parsed = _parse_ics_datetime(rule["UNTIL"], time_zone)
+            until = parsed.date() if isinstance(parsed, datetime) else parsed
+            if isinstance(parsed, datetime) and parsed.time() < start.time():
+                # The series ends before the lesson of its last day
+                until -= timedelta(days=1)
+        if "COUNT" in rule:
+            count = int(rule["COUNT"])
+        excluded: set[date] = set()
+        for value in event.get("EXDATE", []):
+            parsed = _parse_ics_datetime(value, time_zone)
+            excluded.add(parsed.date() if isinstance(parsed, datetime) else parsed)
+    except ValueError as err:
+        builder.error(line, f"invalid RRULE or EXDATE ({err})")
+        return
+
+    if until is None and count is None:
+        for weekday in weekdays:
+            builder.add_lesson(line, WEEKDAYS[weekday], dict(lesson), None)
+        return
+    counts = dict.fromkeys(weekdays, 0)
+    for day in _weekly_dates(start.date(), weekdays, until, count):
+        if day not in excluded:
+            counts[day.weekday()] += 1
+    for weekday, occurrences in counts.items():
+        builder.add_lesson(line, WEEKDAYS[weekday], dict(lesson), occurrences)
+
+
+def _add_ics_event(
+    builder: TemplateBuilder, line: int, event: dict[str, Any], time_zone: tzinfo
+) -> None:
+    """Add a parsed VEVENT to ``builder``."""
+    try:
+        start = _parse_ics_datetime(event["DTSTART"], time_zone)
+        end = _parse_ics_datetime(event["DTEND"], time_zone) if "DTEND" in event else None
+    except KeyError:
+        builder.error(line, "event without DTSTART")
+        return
+    except ValueError as err:
+        builder.error(line, f"invalid date ({err})")
+        return
+    summary = event.get("SUMMARY", "")
+
+    if not isinstance(start, datetime):
+        # All-day events end on the day after their last day
+        last = start
+        if type(end) is date and end > start:
+            last = end - timedelta(days=1)
+        builder.add_holiday(line, start, last, summary or "Vacation")
+        return
+    if not isinstance(end, datetime) or end.date() != start.date():
+        builder.error(line, "lessons must start and end on the same day")
+        return
+
+    lesson: dict[str, Any] = {
+        "subject": summary,
+        "start_time": f"{start:%H:%M}",
+        "end_time": f"{end:%H:%M}",
+        "room": event.get("LOCATION", ""),
+        "notes": event.get("DESCRIPTION", ""),
+    }
+    if "RRULE" in event:
+        rule = dict(
+            part.upper().partition("=")[::2]
+            for part in event["RRULE"].split(";")
+            if part
+        )
+        _add_ics_series(builder, line, event, rule, start, lesson, time_zone)
+        return
+    builder.add_lesson(line, WEEKDAYS[start.weekday()], lesson)
+
+
+def parse_ics(
+    lines: Iterable[str], builder: TemplateBuilder, time_zone: tzinfo
+) -> None:
+    """Feed the events of an iCalendar stream into ``builder``."""
+    event: dict[str, Any] | None = None
+    event_line = 0
+    for number, line in _unfold(lines):
+        if not line:
+            continue
+        try:
+            name, _params, value = _split_property(line)
+        except ValueError as err:
+            builder.error(number, str(err))
+            continue
+        if name == "BEGIN" and value.upper() == "VEVENT":
+            event, event_line = {}, number
+        elif name == "END" and value.upper() == "VEVENT" and event is not None:
+            _add_ics_event(builder, event_line, event, time_zone)
+            event = None
+        elif event is not None and name == "EXDATE":
+            # May be repeated and hold several dates
+            event.setdefault(name, []).extend(value.split(","))
+        elif event is not None and name not in event:
+            event[name] = (
+                _unescape(value)
+                if name in ("SUMMARY", "LOCATION", "DESCRIPTION")
+                else value
+            )
+
+
+def parse_weekday(value: str) -> str:
+    """Return the weekday named by ``value`` (``Monday``, ``mon``, ...)."""
+    value = value.strip().lower()
+    for weekday in WEEKDAYS:
+        if len(value) >= 2 and weekday.startswith(value):
+            return weekday
+    raise ValueError(f"unknown weekday {value!r}")
+
+
+def parse_csv(lines: Iterable[str], builder: TemplateBuilder) -> None:
+    """Feed the rows of a CSV stream into ``builder``.
+
+    Rows with ``start_date``/``end_date`` are vacations, rows with a
+    ``weekday`` are template lessons and rows with a ``date`` are dated
+    lessons that are collapsed like iCalendar events.
+    """
+    reader = csv.DictReader(lines)
+    for row in reader:
+        number = reader.line_num
+        row = {
+            key.strip().lower(): (value or "").strip()
+            for key, value in row.items()
+            if key is not None
+        }
+        if row.get("start_date"):
+            vacation = {
+                "label": row.get("label") or row.get("subject") or "Vacation",
+                "start_date": row["start_date"],
+                "end_date": row.get("end_date") or row["start_date"],
+            }
+            try:
+                start, end, label = parse_vacation(vacation)
+            except ValueError as err:
+                builder.error(number, str(err))
+                continue
+            builder.add_holiday(number, date.fromordinal(start), date.fromordinal(end), label)
+            continue
+
+        lesson = {
+            "subject": row.get("subject", ""),
+            "start_time": row.get("start_time", ""),
+            "end_time": row.get("end_time", ""),
+            **{field: row[field] for field in LESSON_FIELDS if row.get(field)},
+        }
+        try:
+            if row.get("weekday"):
+                builder.add_lesson(number, parse_weekday(row["weekday"]), lesson, None)
+            elif row.get("date"):
+                weekday = date.fromisoformat(row["date"]).weekday()
+                builder.add_lesson(number, WEEKDAYS[weekday], lesson)
+            else:
+                builder.error(number, "row has neither weekday, date nor start_date")
+        except ValueError as err:
+            builder.error(number, str(err))
+
+
+def read_file(
+    path: str, file_format: str, builder: TemplateBuilder, time_zone: tzinfo
+) -> None:
+    """Stream the file at ``path`` into ``builder`` (blocking)."""
+    with open(path, encoding="utf-8-sig", newline="") as file:
+        if file_format == "csv":
+            parse_csv(file, builder)
+        else:
+            parse_ics(file, builder, time_zone)
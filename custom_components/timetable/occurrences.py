@@ -0,0 +1,141 @@
+"""Expansion of the weekly template into dated lesson occurrences.
+
+A date range is first split into the school spans left between vacations.
+Within each span the dates of one weekday form an arithmetic progression,
+so every weekday contributes one ``range`` of ordinals per span, and the
+lessons of each date come from the template of its rotation week. The work
+is proportional to the number of occurrences plus the number of vacations
+in the range, with no per-day weekday or vacation checks. Days with
+date-specific exceptions are skipped by the strides and emitted from their
+own compiled day.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Mapping
+from datetime import date
+from operator import itemgetter
+from typing import Any, NamedTuple
+
+from .schedule import CompiledSchedule
+
+# Sort key of occurrences: date, then start and end minute
+_ORDER = itemgetter(0, 1, 2)
+
+# Weeks kept by an OccurrenceIndex before it starts over
+MAX_CACHED_WEEKS = 520
+
+
+class Occurrence(NamedTuple):
+    """A lesson of the weekly template on a specific date."""
+
+    ordinal: int
+    start: int
+    end: int
+    data: Mapping[str, Any]
+
+    @property
+    def date(self) -> date:
+        """Return the date of the occurrence."""
+        return date.fromordinal(self.ordinal)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the stored lesson dict with the date added."""
+        return {**self.data, "date": self.date.isoformat()}
+
+
+def weekday_of(ordinal: int) -> int:
+    """Return the weekday (Monday is 0) of an ordinal day."""
+    # Ordinal 1 is Monday, 1 January of year 1
+    return (ordinal - 1) % 7
+
+
+def school_weekdays(schedule: CompiledSchedule) -> list[int]:
+    """Return the weekdays that have lessons in some week and count as school days."""
+    return [
+        weekday
+        for weekday in range(7)
+        if any(week[weekday].lessons for week in schedule.weeks)
+        and (weekday < 5 or schedule.include_weekends)
+    ]
+
+
+def _expand(schedule: CompiledSchedule, first: int, last: int) -> list[Occurrence]:
+    """Return all lesson occurrences between two ordinal days inclusive."""
+    spans = schedule.vacations.gaps(first, last)
+    overridden = {
+        ordinal
+        for ordinal in schedule.exceptions.between(first, last)
+        if not schedule.vacations.contains(ordinal)
+    }
+    occurrences: list[Occurrence] = []
+    template = schedule.template
+    for weekday in school_weekdays(schedule):
+        for span_start, span_end in spans:
+            offset = (weekday - weekday_of(span_start)) % 7
+            occurrences.extend(
+                Occurrence(ordinal, lesson.start, lesson.end, lesson.data)
+                for ordinal in range(span_start + offset, span_end + 1, 7)
+                if ordinal not in overridden
+                for lesson in template(ordinal).lessons
+            )
+    for ordinal in overridden:
+        occurrences.extend(
+            Occurrence(ordinal, lesson.start, lesson.end, lesson.data)
+            for lesson in schedule.day_for(ordinal).lessons
+        )
+
+    # Each weekday yields a sorted run, which timsort merges cheaply
+    occurrences.sort(key=_ORDER)
+    return occurrences
+
+
+def expand(schedule: CompiledSchedule, start: date, end: date) -> list[Occurrence]:
+    """Return all lesson occurrences from ``start`` to ``end`` inclusive."""
+    first, last = start.toordinal(), end.toordinal()
+    if last < first:
+        return []
+    return _expand(schedule, first, last)
+
+
+class OccurrenceIndex:
+    """Occurrences of a schedule, expanded per week on first use.
+
+    Weeks stay cached until the schedule is edited, so the range queries
+    the calendar issues on every view change only slice cached lists.
+    """
+
+    def __init__(self, schedule: CompiledSchedule) -> None:
+        """Initialize the index."""
+        self.schedule = schedule
+        self._weeks: dict[int, list[Occurrence]] = {}
+
+    def invalidate(self, schedule: CompiledSchedule | None = None) -> None:
+        """Drop cached weeks after an edit, optionally switching schedules."""
+        if schedule is not None:
+            self.schedule = schedule
+        self._weeks.clear()
+
+    def _week(self, monday: int) -> list[Occurrence]:
+        """Return the occurrences of the week starting on ordinal ``monday``."""
+        if (week := self._weeks.get(monday)) is None:
+            if len(self._weeks) >= MAX_CACHED_WEEKS:
+                self._weeks.clear()
+            week = self._weeks[monday] = _expand(self.schedule, monday, monday + 6)
+        return week
+
+    def between(self, start: date, end: date) -> list[Occurrence]:
+        """Return the occurrences from ``start`` to ``end`` inclusive."""
+        first, last = start.toordinal(), end.toordinal()
+        occurrences: list[Occurrence] = []
+        for monday in range(first - weekday_of(first), last + 1, 7):
+            week = self._week(monday)
+            if first <= monday and monday + 6 <= last:
+                occurrences.extend(week)
+                continue
+            # Partial week at either end of the range; 1-tuples sort before
+            # every occurrence of the same day
+            occurrences.extend(
+                week[bisect_left(week, (first,)) : bisect_left(week, (last + 1,))]
+            )
+        return occurrences
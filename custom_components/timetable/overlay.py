@@ -0,0 +1,115 @@
+"""Date-specific exceptions layered over the weekly template.
+
+Exceptions cancel, replace, move or re-room single lessons on one date, or
+add an extra lesson, without touching the weekly template. They are indexed
+by ordinal day, so finding the exceptions of a date is a single dict
+lookup; dates without exceptions fall through to the template day.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Mapping
+from datetime import date
+import logging
+from typing import Any
+
+from .const import EXCEPTION_TYPES
+
+_LOGGER = logging.getLogger(__name__)
+
+# Exception types that address a lesson of the template
+MATCHING_TYPES = ("cancel", "replace", "move", "room")
+
+
+def parse_exception(exception: Mapping[str, Any]) -> tuple[int, int]:
+    """Return the first and last ordinal day affected by a stored exception."""
+    kind = exception.get("type")
+    if kind not in EXCEPTION_TYPES:
+        raise ValueError(f"Invalid exception type: {kind}")
+    try:
+        first = date.fromisoformat(exception["date"]).toordinal()
+        target = date.fromisoformat(exception.get("to_date") or exception["date"])
+    except (KeyError, TypeError) as err:
+        raise ValueError(f"Invalid exception date: {err}") from err
+    if kind in MATCHING_TYPES and not exception.get("start_time"):
+        raise ValueError(f"A {kind} exception needs the start_time of the lesson")
+    if kind in ("replace", "add") and not isinstance(exception.get("lesson"), Mapping):
+        raise ValueError(f"A {kind} exception needs a lesson")
+    if kind == "room" and "room" not in exception:
+        raise ValueError("A room exception needs a room")
+    return min(first, target.toordinal()), max(first, target.toordinal())
+
+
+def matches(lesson: Mapping[str, Any], exception: Mapping[str, Any]) -> bool:
+    """Return whether ``exception`` addresses the stored ``lesson``."""
+    if lesson.get("start_time") != exception["start_time"]:
+        return False
+    subject = exception.get("subject")
+    return not subject or lesson.get("subject") == subject
+
+
+class ExceptionOverlay:
+    """Stored exceptions indexed by the ordinal day they apply to.
+
+    A move is indexed twice: as a cancellation on its date and as an
+    addition on its ``to_date``.
+    """
+
+    __slots__ = ("_by_day", "ordinals", "expiry")
+
+    def __init__(self, exceptions: Iterable[Mapping[str, Any]] = ()) -> None:
+        """Index the given stored exceptions, skipping invalid ones."""
+        self._by_day: dict[int, list[tuple[str, Mapping[str, Any]]]] = {}
+        lasts = []
+        for exception in exceptions:
+            try:
+                _first, last = parse_exception(exception)
+            except ValueError as err:
+                _LOGGER.warning("Skipping invalid exception (%s): %s", err, exception)
+                continue
+            lasts.append(last)
+            day = date.fromisoformat(exception["date"]).toordinal()
+            if exception["type"] == "move":
+                target = date.fromisoformat(
+                    exception.get("to_date") or exception["date"]
+                ).toordinal()
+                self._by_day.setdefault(day, []).append(("cancel", exception))
+                self._by_day.setdefault(target, []).append(("moved", exception))
+            else:
+                self._by_day.setdefault(day, []).append((exception["type"], exception))
+        self.ordinals = sorted(self._by_day)
+        # Last day on which every exception still matters
+        self.expiry = min(lasts) if lasts else None
+
+    def __len__(self) -> int:
+        """Return the number of days with exceptions."""
+        return len(self._by_day)
+
+    def get(self, ordinal: int) -> list[tuple[str, Mapping[str, Any]]] | None:
+        """Return the ``(role, exception)`` pairs of a day, if any."""
+        return self._by_day.get(ordinal)
+
+    def between(self, first: int, last: int) -> list[int]:
+        """Return the days with exceptions from ``first`` to ``last`` inclusive."""
+        return self.ordinals[
+            bisect_left(self.ordinals, first) : bisect_right(self.ordinals, last)
+        ]
+
+    def expired(self, ordinal: int) -> bool:
+        """Return whether some exception only affects days before ``ordinal``."""
+        return self.expiry is not None and self.expiry < ordinal
+
+
+def prune(
+    exceptions: Iterable[Mapping[str, Any]], ordinal: int
+) -> list[Mapping[str, Any]]:
+    """Return the exceptions that still affect ``ordinal`` or later days."""
+    kept = []
+    for exception in exceptions:
+        try:
+            _first, last = parse_exception(exception)
+        except ValueError:
+            continue
+        if last >= ordinal:
+            kept.append(exception)
+    return kept
@@ -0,0 +1,101 @@
+"""Week rotation for TimeTable.
+
+Schools with A/B weeks (or longer cycles) tag lessons with the weeks of the
+cycle they take place in. The week of the cycle a date belongs to is
+counted from an anchor week. When vacation weeks are skipped, the weeks
+fully covered by a vacation are collected once per vacation change, and
+the week of a date is found with a single bisection over them.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from datetime import date
+
+from .vacations import VacationIndex
+
+
+def monday_of(ordinal: int) -> int:
+    """Return the Monday of the week containing an ordinal day."""
+    # Ordinal 1 is Monday, 1 January of year 1
+    return ordinal - (ordinal - 1) % 7
+
+
+def week_label(week: int) -> str:
+    """Return the letter of a week of the cycle (0 is A)."""
+    return chr(ord("A") + week)
+
+
+class Rotation:
+    """Cycle of ``weeks`` weeks starting with the week of ``anchor``."""
+
+    __slots__ = ("weeks", "anchor", "skip_vacations", "skipped", "_offset")
+
+    def __init__(
+        self,
+        weeks: int = 1,
+        anchor: int = 1,
+        skip_vacations: bool = False,
+        vacations: VacationIndex | None = None,
+        school_days: int = 5,
+    ) -> None:
+        """Initialize the rotation.
+
+        With ``skip_vacations``, weeks whose first ``school_days`` days all
+        fall into a vacation do not advance the cycle.
+        """
+        self.weeks = max(weeks, 1)
+        self.anchor = monday_of(anchor)
+        self.skip_vacations = skip_vacations
+        # Sorted numbers, counted from the anchor week, of the skipped weeks
+        self.skipped: list[int] = []
+        if skip_vacations and vacations is not None and self.weeks > 1:
+            for start, end in zip(vacations.starts, vacations.ends):
+                first = -((self.anchor - start) // 7)
+                last = (end - (school_days - 1) - self.anchor) // 7
+                self.skipped.extend(range(first, last + 1))
+        # Skipped weeks before the anchor week
+        self._offset = bisect_left(self.skipped, 0)
+
+    @classmethod
+    def from_settings(
+        cls,
+        weeks: int,
+        anchor: str | None,
+        skip_vacations: bool,
+        vacations: VacationIndex,
+        include_weekends: bool,
+    ) -> Rotation:
+        """Build the rotation from the stored settings."""
+        return cls(
+            weeks,
+            date.fromisoformat(anchor).toordinal() if anchor else 1,
+            skip_vacations,
+            vacations,
+            7 if include_weekends else 5,
+        )
+
+    def week_of(self, ordinal: int) -> int:
+        """Return the week of the cycle (0 is the anchor week) of an ordinal day."""
+        if self.weeks == 1:
+            return 0
+        week = (ordinal - self.anchor) // 7
+        if self.skipped:
+            week -= bisect_left(self.skipped, week) - self._offset
+        return week % self.weeks
+
+    def segments(self, first: int) -> list[tuple[int, int | None]]:
+        """Return the ranges from ``first`` on in which the cycle runs unbroken.
+
+        Each skipped week ends a range; the last range is open-ended.
+        """
+        if not self.skipped:
+            return [(first, None)]
+        segments: list[tuple[int, int | None]] = []
+        start = first
+        for week in self.skipped[bisect_left(self.skipped, (first - self.anchor) // 7) :]:
+            monday = self.anchor + 7 * week
+            if monday > start:
+                segments.append((start, monday - 1))
+            start = max(start, monday + 7)
+        segments.append((start, None))
+        return segments
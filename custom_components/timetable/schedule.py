@@ -0,0 +1,519 @@
+"""Compiled schedule model for TimeTable.
+
+The stored schedule is compiled once into per-weekday
+indexes of integer minute-of-day arrays, so every refresh answers the
+current/next/remaining questions with a couple of bisections instead of
+re-scanning lesson dicts and comparing time strings.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections import OrderedDict
+from collections.abc import Iterator, Mapping
+from itertools import islice
+from datetime import date, datetime, time, timedelta, tzinfo
+import logging
+from typing import Any
+
+from .const import (
+    CONF_ROTATION_ANCHOR,
+    CONF_ROTATION_SKIP_VACATIONS,
+    CONF_ROTATION_WEEKS,
+    UPCOMING_LESSONS,
+    WEEKDAY_MAP,
+    WEEKDAYS,
+)
+from .overlay import ExceptionOverlay, matches
+from .rotation import Rotation
+from .vacations import VacationIndex
+
+_LOGGER = logging.getLogger(__name__)
+
+MINUTES_PER_DAY = 24 * 60
+
+# Day snapshots kept per timetable: today, plus the last days asked for
+MAX_SNAPSHOTS = 3
+
+
+def parse_time(value: str) -> int:
+    """Convert an ``HH:MM`` string to minutes after midnight."""
+    hours, minutes = value.split(":")
+    hours_int, minutes_int = int(hours), int(minutes)
+    if not (0 <= hours_int <= 24 and 0 <= minutes_int < 60):
+        raise ValueError(f"Invalid time: {value}")
+    result = hours_int * 60 + minutes_int
+    if result > MINUTES_PER_DAY:
+        raise ValueError(f"Invalid time: {value}")
+    return result
+
+
+class Lesson:
+    """A single lesson of the weekly template."""
+
+    __slots__ = ("start", "end", "subject", "weeks", "data")
+
+    def __init__(self, data: Mapping[str, Any]) -> None:
+        """Initialize the lesson from its stored dict."""
+        self.start = parse_time(data["start_time"])
+        self.end = parse_time(data["end_time"])
+        if self.end <= self.start:
+            raise ValueError(f"Lesson ends before it starts: {data['end_time']}")
+        self.subject: str = data.get("subject", "")
+        # Weeks of the rotation cycle (1 is the first), empty for every week
+        weeks = data.get("weeks") or ()
+        if not all(isinstance(week, int) and week >= 1 for week in weeks):
+            raise ValueError(f"Invalid rotation weeks: {weeks}")
+        self.weeks = frozenset(weeks)
+        self.data = data
+
+    def in_week(self, week: int) -> bool:
+        """Return whether the lesson takes place in ``week`` (0 is the first)."""
+        return not self.weeks or week + 1 in self.weeks
+
+
+class CompiledDay:
+    """Lessons of one day, sorted by start time and indexed for bisection."""
+
+    __slots__ = ("lessons", "data", "starts", "ends", "reach", "boundaries")
+
+    def __init__(self, lessons: list[Lesson]) -> None:
+        """Index the given lessons."""
+        self.lessons = sorted(lessons, key=lambda lesson: (lesson.start, lesson.end))
+        self.data = [lesson.data for lesson in self.lessons]
+        self.starts = [lesson.start for lesson in self.lessons]
+        # Sorted independently so remaining counts stay correct with overlaps
+        self.ends = sorted(lesson.end for lesson in self.lessons)
+        # Running maximum of end times, used to spot overlapping lessons
+        self.reach: list[int] = []
+        latest = -1
+        for lesson in self.lessons:
+            latest = max(latest, lesson.end)
+            self.reach.append(latest)
+        self.boundaries = sorted(set(self.starts) | set(self.ends))
+
+    @classmethod
+    def for_weeks(
+        cls, weekday: str, lessons: list[Mapping[str, Any]], weeks: int
+    ) -> list[CompiledDay]:
+        """Compile stored lesson dicts for each week of the rotation cycle.
+
+        Invalid lessons are skipped.
+        """
+        compiled = []
+        for lesson in lessons:
+            try:
+                compiled.append(Lesson(lesson))
+            except (KeyError, ValueError) as err:
+                _LOGGER.warning(
+                    "Skipping invalid lesson on %s (%s): %s", weekday, err, lesson
+                )
+        if not any(lesson.weeks for lesson in compiled):
+            # Identical weeks share one compiled day
+            return [cls(compiled)] * weeks
+        return [
+            cls([lesson for lesson in compiled if lesson.in_week(week)])
+            for week in range(weeks)
+        ]
+
+    def __len__(self) -> int:
+        """Return the number of lessons."""
+        return len(self.lessons)
+
+    def lookup(self, minute: int) -> tuple[int | None, int | None, int]:
+        """Return current and next lesson positions and remaining count at ``minute``."""
+        idx = bisect_right(self.starts, minute)
+        current = None
+        if idx and self.reach[idx - 1] > minute:
+            # Normally the latest started lesson; walk back only on overlaps
+            for pos in range(idx - 1, -1, -1):
+                if self.lessons[pos].end > minute:
+                    current = pos
+                    break
+        upcoming = idx if idx < len(self.lessons) else None
+        remaining = len(self.ends) - bisect_right(self.ends, minute)
+        return current, upcoming, remaining
+
+    def next_boundary(self, minute: int) -> int | None:
+        """Return the first lesson start or end strictly after ``minute``."""
+        idx = bisect_right(self.boundaries, minute)
+        if idx < len(self.boundaries):
+            return self.boundaries[idx]
+        return None
+
+
+def instant(ordinal: int, minute: int, tz: tzinfo | None) -> datetime:
+    """Return the instant of a minute of day on an ordinal day."""
+    midnight = datetime.combine(date.fromordinal(ordinal), time(), tzinfo=tz)
+    # Wall clock arithmetic, so lessons keep their time across DST changes
+    return midnight + timedelta(minutes=minute)
+
+
+def dated_lesson(ordinal: int, lesson: Lesson, tz: tzinfo | None) -> dict[str, Any]:
+    """Return the stored dict of a lesson with its date and start and end instants."""
+    return {
+        **lesson.data,
+        "date": date.fromordinal(ordinal).isoformat(),
+        "start": instant(ordinal, lesson.start, tz).isoformat(),
+        "end": instant(ordinal, lesson.end, tz).isoformat(),
+    }
+
+
+def _find_lesson(lessons: list[Lesson], exception: Mapping[str, Any]) -> int | None:
+    """Return the position of the lesson addressed by ``exception``."""
+    for pos, lesson in enumerate(lessons):
+        if matches(lesson.data, exception):
+            return pos
+    return None
+
+
+class DaySnapshot:
+    """Parts of the coordinator data that only change at midnight or on edits."""
+
+    __slots__ = ("ordinal", "day", "attends", "ahead", "data")
+
+    def __init__(self, schedule: CompiledSchedule, ordinal: int) -> None:
+        """Compute the snapshot of an ordinal day."""
+        today = date.fromordinal(ordinal)
+        self.ordinal = ordinal
+        self.day = day = schedule.day_for(ordinal)
+        week = schedule.rotation.week_of(ordinal)
+        vacation_name = schedule.vacations.lookup(today)
+        next_vacation = schedule.vacations.next_start(today)
+        # Whether today's lessons take place and the first lessons after today
+        self.attends = schedule.attends(ordinal)
+        self.ahead = list(islice(schedule.lessons_from(ordinal + 1), UPCOMING_LESSONS))
+        next_school_day = self.ahead[0][0] if self.ahead else None
+        # First lesson of the next school day, for wake-up automations
+        first = self.ahead[0][1].data if self.ahead else None
+
+        self.data: dict[str, Any] = {
+            "today_lessons": day.data,
+            "is_vacation": vacation_name is not None,
+            "vacation_name": vacation_name,
+            "next_vacation_start": next_vacation.isoformat() if next_vacation else None,
+            "days_until_vacation": schedule.vacations.days_until(today),
+            "is_school_day": len(day) > 0,
+            "has_exceptions": day is not schedule.weeks[week][today.weekday()],
+            "weekday": WEEKDAY_MAP[today.weekday()],
+            "date": today.isoformat(),
+            # Week of the rotation cycle, 1 for the first
+            "week": week + 1,
+            "next_school_day": (
+                date.fromordinal(next_school_day).isoformat()
+                if next_school_day is not None
+                else None
+            ),
+            "next_school_day_start": first["start_time"] if first else None,
+            "tomorrow_first_lesson": first if next_school_day == ordinal + 1 else None,
+        }
+
+
+class SnapshotCache:
+    """Least recently used day snapshots keyed by ordinal day and revision.
+
+    Edits bump the revision, so snapshots of older revisions are never hit
+    again and age out. Recompiling without a new revision needs ``clear``.
+    """
+
+    __slots__ = ("_snapshots",)
+
+    def __init__(self) -> None:
+        """Initialize an empty cache."""
+        self._snapshots: OrderedDict[tuple[int, int], DaySnapshot] = OrderedDict()
+
+    def get(
+        self, schedule: CompiledSchedule, ordinal: int, revision: int
+    ) -> DaySnapshot:
+        """Return the snapshot of an ordinal day, computing it on a miss."""
+        key = (ordinal, revision)
+        if (snapshot := self._snapshots.get(key)) is not None:
+            self._snapshots.move_to_end(key)
+            return snapshot
+        snapshot = self._snapshots[key] = schedule.snapshot(ordinal)
+        if len(self._snapshots) > MAX_SNAPSHOTS:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    def clear(self) -> None:
+        """Drop all snapshots."""
+        self._snapshots.clear()
+
+
+class CompiledSchedule:
+    """Schedule compiled from the stored lessons, vacations and exceptions."""
+
+    __slots__ = (
+        "weeks",
+        "vacations",
+        "include_weekends",
+        "rotation",
+        "exceptions",
+        "_overridden",
+    )
+
+    def __init__(
+        self,
+        weeks: list[list[CompiledDay]],
+        vacations: VacationIndex,
+        include_weekends: bool,
+        exceptions: ExceptionOverlay | None = None,
+        rotation: Rotation | None = None,
+    ) -> None:
+        """Initialize the compiled schedule.
+
+        ``weeks`` holds the seven compiled days of each week of the rotation.
+        """
+        self.weeks = weeks
+        self.vacations = vacations
+        self.include_weekends = include_weekends
+        self.rotation = rotation or Rotation()
+        self.exceptions = exceptions or ExceptionOverlay()
+        # Days with exceptions, compiled on first use
+        self._overridden: dict[int, CompiledDay] = {}
+
+    @classmethod
+    def from_data(
+        cls, data: Mapping[str, Any], options: Mapping[str, Any]
+    ) -> CompiledSchedule:
+        """Compile the stored schedule data with the settings in ``options``."""
+        include_weekends = options.get("include_weekends", False)
+        vacations = VacationIndex.from_list(data.get("vacations", []))
+        rotation = Rotation.from_settings(
+            options.get(CONF_ROTATION_WEEKS, 1),
+            options.get(CONF_ROTATION_ANCHOR),
+            options.get(CONF_ROTATION_SKIP_VACATIONS, False),
+            vacations,
+            include_weekends,
+        )
+        lessons = data.get("lessons", {})
+        days = [
+            CompiledDay.for_weeks(weekday, lessons.get(weekday, []), rotation.weeks)
+            for weekday in WEEKDAYS
+        ]
+        return cls(
+            [list(week) for week in zip(*days)],
+            vacations,
+            include_weekends,
+            ExceptionOverlay(data.get("exceptions", [])),
+            rotation,
+        )
+
+    def update_day(self, weekday: str, lessons: list[Mapping[str, Any]]) -> None:
+        """Recompile a single weekday after an edit."""
+        compiled = CompiledDay.for_weeks(weekday, lessons, self.rotation.weeks)
+        for week, day in zip(self.weeks, compiled):
+            week[WEEKDAYS.index(weekday)] = day
+        self._overridden.clear()
+
+    def update_vacations(self, vacations: list[Mapping[str, Any]]) -> None:
+        """Rebuild the vacation index after an edit."""
+        self.vacations = VacationIndex.from_list(vacations)
+        if self.rotation.skip_vacations:
+            rotation = self.rotation
+            self.rotation = Rotation(
+                rotation.weeks,
+                rotation.anchor,
+                True,
+                self.vacations,
+                7 if self.include_weekends else 5,
+            )
+            self._overridden.clear()
+
+    def update_exceptions(self, exceptions: list[Mapping[str, Any]]) -> None:
+        """Rebuild the exception overlay after an edit."""
+        self.exceptions = ExceptionOverlay(exceptions)
+        self._overridden.clear()
+
+    def template(self, ordinal: int) -> CompiledDay:
+        """Return the template day of the rotation week of an ordinal day."""
+        return self.weeks[self.rotation.week_of(ordinal)][(ordinal - 1) % 7]
+
+    def day_for(self, ordinal: int) -> CompiledDay:
+        """Return the lessons of an ordinal day with its exceptions applied."""
+        if (entries := self.exceptions.get(ordinal)) is None:
+            return self.template(ordinal)
+        if (day := self._overridden.get(ordinal)) is None:
+            day = self._overridden[ordinal] = self._apply_exceptions(ordinal, entries)
+        return day
+
+    def _apply_exceptions(
+        self, ordinal: int, entries: list[tuple[str, Mapping[str, Any]]]
+    ) -> CompiledDay:
+        """Compile the template day of ``ordinal`` with ``entries`` applied."""
+        lessons = list(self.template(ordinal).lessons)
+        for role, exception in entries:
+            try:
+                if role == "add":
+                    lessons.append(Lesson({**exception["lesson"], "exception": "add"}))
+                    continue
+                if role == "moved":
+                    # Moved lessons are taken from the template of their own date
+                    source = self.template(
+                        date.fromisoformat(exception["date"]).toordinal()
+                    )
+                    if (pos := _find_lesson(source.lessons, exception)) is None:
+                        raise ValueError("no matching lesson")
+                    lessons.append(
+                        Lesson(
+                            {
+                                **source.lessons[pos].data,
+                                **exception.get("lesson", {}),
+                                "exception": "move",
+                                "moved_from": exception["date"],
+                            }
+                        )
+                    )
+                    continue
+                if (pos := _find_lesson(lessons, exception)) is None:
+                    raise ValueError("no matching lesson")
+                if role == "cancel":
+                    lessons.pop(pos)
+                elif role == "replace":
+                    lessons[pos] = Lesson(
+                        {**lessons[pos].data, **exception["lesson"], "exception": role}
+                    )
+                else:
+                    lessons[pos] = Lesson(
+                        {**lessons[pos].data, "room": exception["room"], "exception": role}
+                    )
+            except (KeyError, ValueError) as err:
+                _LOGGER.warning(
+                    "Skipping exception on %s (%s): %s",
+                    date.fromordinal(ordinal),
+                    err,
+                    exception,
+                )
+        return CompiledDay(lessons)
+
+    def school_days(self, first: int) -> Iterator[int]:
+        """Yield the ordinal days from ``first`` on that have lessons.
+
+        Vacations are jumped over as whole ranges, and weekends only count
+        with ``include_weekends`` or when an exception adds lessons. The walk
+        ends after the last exception once a whole rotation cycle of school
+        days had no lessons.
+        """
+        cycle = 7 * self.rotation.weeks
+        last_exception = self.exceptions.ordinals[-1] if self.exceptions.ordinals else 0
+        idle = 0
+        ordinal = first
+        while idle < cycle or ordinal <= last_exception:
+            ordinal = self.vacations.skip(ordinal)
+            if self.attends(ordinal) and self.day_for(ordinal).lessons:
+                idle = 0
+                yield ordinal
+            else:
+                idle += 1
+            ordinal += 1
+
+    def attends(self, ordinal: int) -> bool:
+        """Return whether the lessons of an ordinal day take place."""
+        return not self.vacations.contains(ordinal) and (
+            self.exceptions.get(ordinal) is not None
+            or self.include_weekends
+            or (ordinal - 1) % 7 < 5
+        )
+
+    def lessons_from(
+        self, ordinal: int, minute: int = -1
+    ) -> Iterator[tuple[int, Lesson]]:
+        """Yield the ``(ordinal, lesson)`` pairs from ``minute`` of a day on.
+
+        Lessons of the first day only count if they start after ``minute``.
+        """
+        for day_ordinal in self.school_days(ordinal):
+            day = self.day_for(day_ordinal)
+            start = bisect_right(day.starts, minute) if day_ordinal == ordinal else 0
+            for lesson in day.lessons[start:]:
+                yield day_ordinal, lesson
+
+    def upcoming(self, now: datetime, count: int) -> list[dict[str, Any]]:
+        """Return the next ``count`` lessons after ``now``, across days."""
+        return [
+            dated_lesson(ordinal, lesson, now.tzinfo)
+            for ordinal, lesson in islice(
+                self.lessons_from(now.toordinal(), now.hour * 60 + now.minute), count
+            )
+        ]
+
+    def snapshot(self, ordinal: int) -> DaySnapshot:
+        """Return the date-dependent state of an ordinal day."""
+        return DaySnapshot(self, ordinal)
+
+    def next_boundary(self, now: datetime) -> datetime:
+        """Return the next instant at which the computed state can change."""
+        midnight = datetime.combine(
+            now.date() + timedelta(days=1), time(), tzinfo=now.tzinfo
+        )
+        day = self.day_for(now.toordinal())
+        minute = day.next_boundary(now.hour * 60 + now.minute)
+        if minute is None or minute >= MINUTES_PER_DAY:
+            return midnight
+        return now.replace(
+            hour=minute // 60, minute=minute % 60, second=0, microsecond=0
+        )
+
+    def evaluate(
+        self, now: datetime, snapshot: DaySnapshot | None = None
+    ) -> dict[str, Any]:
+        """Compute the coordinator data for ``now``.
+
+        Only the time-of-day part is computed when the ``snapshot`` of the
+        current day is passed in.
+        """
+        if snapshot is None or snapshot.ordinal != now.toordinal():
+            snapshot = self.snapshot(now.toordinal())
+        day = snapshot.day
+        if snapshot.attends:
+            current, upcoming, remaining = day.lookup(now.hour * 60 + now.minute)
+        else:
+            # The lessons of vacation days and excluded weekends do not take place
+            current, upcoming, remaining = None, None, 0
+
+        if (vacation_name := snapshot.data["vacation_name"]) is not None:
+            state = f"Vacation: {vacation_name}"
+        elif current is not None:
+            state = day.lessons[current].subject
+        elif upcoming is not None:
+            state = "Free Period"
+        elif snapshot.attends and day.lessons:
+            state = "After School"
+        else:
+            state = "No School Today"
+
+        today = snapshot.ordinal
+        tz = now.tzinfo
+        ahead = snapshot.ahead
+        if upcoming is not None:
+            ahead = [
+                (today, lesson)
+                for lesson in day.lessons[upcoming : upcoming + UPCOMING_LESSONS]
+            ] + ahead
+        current_end = None
+        if current is not None:
+            current_end = instant(today, day.lessons[current].end, tz)
+
+        return {
+            **snapshot.data,
+            "state": state,
+            "current_lesson": day.data[current] if current is not None else None,
+            "current_lesson_index": current,
+            "next_lesson": day.data[upcoming] if upcoming is not None else None,
+            "next_lesson_index": upcoming,
+            "remaining_today_count": remaining,
+            "is_schooltime": current is not None,
+            "upcoming_lessons": [
+                dated_lesson(ordinal, lesson, tz)
+                for ordinal, lesson in ahead[:UPCOMING_LESSONS]
+            ],
+            # Instants for the timestamp sensors; they only change at boundaries
+            "current_lesson_ends": current_end,
+            "next_lesson_starts": (
+                instant(ahead[0][0], ahead[0][1].start, tz) if ahead else None
+            ),
+            "next_school_day_starts": (
+                instant(snapshot.ahead[0][0], snapshot.ahead[0][1].start, tz)
+                if snapshot.ahead
+                else None
+            ),
+        }
@@ -0,0 +1,146 @@
+"""Boundary scheduler shared by all TimeTable entries."""
+from __future__ import annotations
+
+from collections.abc import Callable, Coroutine
+from datetime import datetime, timedelta
+import heapq
+import logging
+from typing import Any
+
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.event import async_track_point_in_time
+
+from .const import DATA_SCHEDULER
+
+_LOGGER = logging.getLogger(__name__)
+
+BoundaryAction = Callable[[], Coroutine[Any, Any, None]]
+
+# Delay before retrying a timetable whose refresh did not schedule its next
+# boundary, e.g. because it failed
+RETRY_DELAY = timedelta(minutes=1)
+
+
+class BoundaryScheduler:
+    """Run every timetable's refresh from a single timer.
+
+    Each timetable registers the next instant at which its state can change.
+    Pending instants are kept in a heap and only the earliest one is armed,
+    so any number of timetables costs one timer and timetables sharing the
+    same bell times are refreshed by the same wakeup.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the scheduler."""
+        self.hass = hass
+        self._actions: dict[str, BoundaryAction] = {}
+        self._due: dict[str, datetime] = {}
+        self._heap: list[tuple[datetime, str]] = []
+        self._armed: datetime | None = None
+        self._unsub_timer: CALLBACK_TYPE | None = None
+        self.wakeups = 0
+        self._unsub_config: CALLBACK_TYPE | None = hass.bus.async_listen(
+            EVENT_CORE_CONFIG_UPDATE, self._async_handle_core_config_update
+        )
+
+    @callback
+    def async_register(self, key: str, action: BoundaryAction) -> CALLBACK_TYPE:
+        """Register the refresh ``action`` of a timetable."""
+        self._actions[key] = action
+
+        @callback
+        def _async_unregister() -> None:
+            self._actions.pop(key, None)
+            self._due.pop(key, None)
+            self._async_rearm()
+            if not self._actions:
+                self._async_stop()
+
+        return _async_unregister
+
+    @callback
+    def _async_stop(self) -> None:
+        """Release the timer and listener once the last timetable is gone."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._armed = None
+        if self._unsub_config is not None:
+            self._unsub_config()
+            self._unsub_config = None
+        if self.hass.data.get(DATA_SCHEDULER) is self:
+            del self.hass.data[DATA_SCHEDULER]
+
+    @callback
+    def async_schedule(self, key: str, when: datetime) -> None:
+        """Run the action of ``key`` at ``when``, replacing its pending instant."""
+        if self._due.get(key) == when:
+            return
+        self._due[key] = when
+        heapq.heappush(self._heap, (when, key))
+        self._async_rearm()
+
+    @callback
+    def _async_rearm(self) -> None:
+        """Arm the timer for the earliest pending instant."""
+        # Drop heap entries superseded by a later async_schedule call
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+        earliest = self._heap[0][0] if self._heap else None
+        if earliest == self._armed:
+            return
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        self._armed = earliest
+        if earliest is not None:
+            self._unsub_timer = self._async_track(earliest)
+
+    @callback
+    def _async_track(self, when: datetime) -> CALLBACK_TYPE:
+        """Start the timer that fires at ``when``."""
+        return async_track_point_in_time(self.hass, self._async_fire, when)
+
+    async def _async_fire(self, now: datetime) -> None:
+        """Run the actions of all timetables whose instant has been reached."""
+        self._unsub_timer = None
+        self._armed = None
+        self.wakeups += 1
+
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, key = heapq.heappop(self._heap)
+            if self._due.get(key) == when:
+                del self._due[key]
+                due.append(key)
+        self._async_rearm()
+
+        for key in due:
+            if (action := self._actions.get(key)) is None:
+                continue
+            try:
+                await action()
+            except Exception:
+                _LOGGER.exception("Error refreshing timetable %s", key)
+            finally:
+                # A refresh that failed before scheduling its next boundary
+                # must not leave the timetable without a timer
+                if key in self._actions and key not in self._due:
+                    self.async_schedule(key, now + RETRY_DELAY)
+
+    async def _async_handle_core_config_update(self, event: Event) -> None:
+        """Re-evaluate every timetable when the time zone changes."""
+        if "time_zone" not in event.data:
+            return
+        for action in list(self._actions.values()):
+            await action()
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> BoundaryScheduler:
+    """Return the shared boundary scheduler, creating it on first use."""
+    if (scheduler := hass.data.get(DATA_SCHEDULER)) is None:
+        scheduler = hass.data[DATA_SCHEDULER] = BoundaryScheduler(hass)
+    return scheduler
@@ -0,0 +1,177 @@
+"""Voluptuous schemas for TimeTable lessons, vacations and exceptions."""
+from __future__ import annotations
+
+from typing import Any
+
+import voluptuous as vol
+
+from .const import (
+    ATTR_ACTION,
+    ATTR_COLOR,
+    ATTR_END_TIME,
+    ATTR_EXCEPTION,
+    ATTR_EXCEPTION_INDEX,
+    ATTR_ICON,
+    ATTR_LESSON,
+    ATTR_LESSON_INDEX,
+    ATTR_NOTES,
+    ATTR_ROOM,
+    ATTR_START_TIME,
+    ATTR_SUBJECT,
+    ATTR_TARGET_WEEKDAY,
+    ATTR_TEACHER,
+    ATTR_VACATION,
+    ATTR_VACATION_END,
+    ATTR_VACATION_INDEX,
+    ATTR_VACATION_LABEL,
+    ATTR_VACATION_START,
+    ATTR_WEEKDAY,
+    ATTR_WEEKS,
+    EXCEPTION_TYPES,
+    MAX_ROTATION_WEEKS,
+    WEEKDAYS,
+)
+
+# Weeks of the rotation cycle a lesson takes place in
+ROTATION_WEEKS = [vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_ROTATION_WEEKS))]
+
+LESSON_FIELDS = {
+    vol.Optional(ATTR_WEEKS): ROTATION_WEEKS,
+    vol.Optional(ATTR_ROOM): str,
+    vol.Optional(ATTR_TEACHER): str,
+    vol.Optional(ATTR_NOTES): str,
+    vol.Optional(ATTR_COLOR): str,
+    vol.Optional(ATTR_ICON): str,
+}
+
+LESSON_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_SUBJECT): str,
+        vol.Required(ATTR_START_TIME): str,
+        vol.Required(ATTR_END_TIME): str,
+        vol.Optional(ATTR_ROOM, default=""): str,
+        vol.Optional(ATTR_TEACHER, default=""): str,
+        vol.Optional(ATTR_NOTES, default=""): str,
+        vol.Optional(ATTR_COLOR, default="#2196F3"): str,
+        vol.Optional(ATTR_ICON, default="mdi:book-open-variant"): str,
+        vol.Optional(ATTR_WEEKS): ROTATION_WEEKS,
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+LESSON_CHANGES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SUBJECT): str,
+        vol.Optional(ATTR_START_TIME): str,
+        vol.Optional(ATTR_END_TIME): str,
+        **LESSON_FIELDS,
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+VACATION_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_VACATION_LABEL): str,
+        vol.Required(ATTR_VACATION_START): str,
+        vol.Required(ATTR_VACATION_END): str,
+    }
+)
+
+VACATION_CHANGES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_VACATION_LABEL): str,
+        vol.Optional(ATTR_VACATION_START): str,
+        vol.Optional(ATTR_VACATION_END): str,
+    }
+)
+
+EXCEPTION_SCHEMA = vol.Schema(
+    {
+        vol.Required("date"): str,
+        vol.Required("type"): vol.In(EXCEPTION_TYPES),
+        vol.Optional(ATTR_START_TIME): str,
+        vol.Optional(ATTR_SUBJECT): str,
+        vol.Optional("to_date"): str,
+        vol.Optional(ATTR_ROOM): str,
+        vol.Optional(ATTR_LESSON): LESSON_CHANGES_SCHEMA,
+        vol.Optional("source"): str,
+    }
+)
+
+SCHEDULE_DATA_SCHEMA = vol.Schema(
+    {
+        vol.Optional("name"): str,
+        vol.Optional("include_weekends"): bool,
+        vol.Optional("lessons"): {vol.In(WEEKDAYS): [LESSON_SCHEMA]},
+        vol.Optional("vacations"): [VACATION_SCHEMA],
+        vol.Optional("exceptions"): [EXCEPTION_SCHEMA],
+    },
+    extra=vol.ALLOW_EXTRA,
+)
+
+# Operations of a batch, keyed by their action
+OPERATION_SCHEMAS = {
+    "add_lesson": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+            vol.Required(ATTR_LESSON): LESSON_SCHEMA,
+        }
+    ),
+    "update_lesson": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+            vol.Required(ATTR_LESSON_INDEX): vol.Coerce(int),
+            vol.Required(ATTR_LESSON): LESSON_CHANGES_SCHEMA,
+            vol.Optional(ATTR_TARGET_WEEKDAY): vol.In(WEEKDAYS),
+        }
+    ),
+    "remove_lesson": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+            vol.Required(ATTR_LESSON_INDEX): vol.Coerce(int),
+        }
+    ),
+    "add_vacation": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_VACATION): VACATION_SCHEMA,
+        }
+    ),
+    "update_vacation": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_VACATION_INDEX): vol.Coerce(int),
+            vol.Required(ATTR_VACATION): VACATION_CHANGES_SCHEMA,
+        }
+    ),
+    "remove_vacation": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_VACATION_INDEX): vol.Coerce(int),
+        }
+    ),
+    "add_exception": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_EXCEPTION): EXCEPTION_SCHEMA,
+        }
+    ),
+    "remove_exception": vol.Schema(
+        {
+            vol.Required(ATTR_ACTION): str,
+            vol.Required(ATTR_EXCEPTION_INDEX): vol.Coerce(int),
+        }
+    ),
+}
+
+
+def operation(value: Any) -> dict[str, Any]:
+    """Validate a batch operation against the schema of its action."""
+    if not isinstance(value, dict):
+        raise vol.Invalid("Operation must be a dictionary")
+    if (schema := OPERATION_SCHEMAS.get(value.get(ATTR_ACTION))) is None:
+        raise vol.Invalid(f"Unknown action: {value.get(ATTR_ACTION)}")
+    return schema(value)
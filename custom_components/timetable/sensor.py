@@ -1,25 +1,53 @@
 """Sensor platform for TimeTable."""
 from __future__ import annotations
 
+from datetime import date, datetime
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfTime
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import (
+    ATTR_COLOR,
     ATTR_CURRENT_LESSON,
+    ATTR_CURRENT_LESSON_INDEX,
+    ATTR_DAYS_UNTIL_VACATION,
+    ATTR_ICON,
     ATTR_IS_SCHOOL_DAY,
     ATTR_IS_VACATION,
+    ATTR_LESSON_COUNT,
     ATTR_NEXT_LESSON,
+    ATTR_NEXT_LESSON_INDEX,
+    ATTR_NEXT_SCHOOL_DAY,
+    ATTR_NEXT_SCHOOL_DAY_START,
+    ATTR_NEXT_VACATION_START,
+    ATTR_NOTES,
     ATTR_REMAINING_TODAY,
+    ATTR_REVISION,
     ATTR_TODAY_LESSONS,
+    ATTR_TOMORROW_FIRST_LESSON,
+    ATTR_UPCOMING,
     ATTR_VACATION_NAME,
+    ATTR_WEEK,
+    ATTR_WEEK_LABEL,
+    ATTR_WEEKDAY,
+    CONF_COMPACT_ATTRIBUTES,
     DOMAIN,
+    WEEKDAY_MAP,
 )
 from .coordinator import TimetableCoordinator
+from .rotation import week_label
+
+# Timestamp sensors: coordinator data key, name suffix and icon
+TIMESTAMP_SENSORS = (
+    ("current_lesson_ends", "Current Lesson End", "mdi:timer-sand"),
+    ("next_lesson_starts", "Next Lesson Start", "mdi:clock-start"),
+    ("next_school_day_starts", "Next School Day Start", "mdi:calendar-clock"),
+)
 
 
 async def async_setup_entry(
@@ -36,22 +64,64 @@ async def async_setup_entry(
         [
             TimetableCurrentSensor(coordinator, entry),
             TimetableNextSensor(coordinator, entry),
+            *(
+                TimetableTimestampSensor(coordinator, entry, key, name, icon)
+                for key, name, icon in TIMESTAMP_SENSORS
+            ),
+            TimetableStatisticsSensor(coordinator, entry),
         ]
     )
 
 
 class TimetableCurrentSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for current lesson/state."""
+    """Sensor for current lesson/state.
+
+    In compact mode only indices into today's lessons are exposed; cards
+    fetch the full lessons once per schedule revision over the websocket.
+    """
+
+    # Lesson dicts are large and change rarely; keep them out of the recorder
+    _unrecorded_attributes = frozenset(
+        {
+            ATTR_CURRENT_LESSON,
+            ATTR_NEXT_LESSON,
+            ATTR_TODAY_LESSONS,
+            ATTR_TOMORROW_FIRST_LESSON,
+        }
+    )
+
+    # Coordinator data rendered by this entity
+    _data_keys = (
+        "state",
+        "current_lesson",
+        "current_lesson_index",
+        "next_lesson",
+        "next_lesson_index",
+        "today_lessons",
+        "weekday",
+        "revision",
+        "remaining_today_count",
+        "is_vacation",
+        "vacation_name",
+        "next_vacation_start",
+        "days_until_vacation",
+        "is_school_day",
+        "week",
+        "next_school_day",
+        "next_school_day_start",
+        "tomorrow_first_lesson",
+    )
 
     def __init__(
         self, coordinator: TimetableCoordinator, entry: ConfigEntry
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._attr_name = "TimeTable Current"
+        super().__init__(coordinator, self._data_keys)
+        self._attr_name = f"{coordinator.entity_prefix} Current"
         self._attr_unique_id = f"{entry.entry_id}_current"
         self._attr_icon = "mdi:school"
         self._attr_has_entity_name = False
+        self._entry = entry
 
     @property
     def native_value(self) -> str:
@@ -62,55 +132,192 @@ class TimetableCurrentSensor(CoordinatorEntity, SensorEntity):
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
         data = self.coordinator.data
+        if self._entry.options.get(CONF_COMPACT_ATTRIBUTES, False):
+            lessons = {
+                ATTR_CURRENT_LESSON_INDEX: data.get("current_lesson_index"),
+                ATTR_NEXT_LESSON_INDEX: data.get("next_lesson_index"),
+                ATTR_LESSON_COUNT: len(data.get("today_lessons", [])),
+                ATTR_WEEKDAY: data.get("weekday"),
+            }
+        else:
+            lessons = {
+                ATTR_CURRENT_LESSON: data.get("current_lesson"),
+                ATTR_NEXT_LESSON: data.get("next_lesson"),
+                ATTR_TODAY_LESSONS: data.get("today_lessons", []),
+                ATTR_TOMORROW_FIRST_LESSON: data.get("tomorrow_first_lesson"),
+            }
+        if self.coordinator.schedule.rotation.weeks > 1:
+            week = data.get("week", 1)
+            lessons[ATTR_WEEK] = week
+            lessons[ATTR_WEEK_LABEL] = week_label(week - 1)
         return {
-            ATTR_CURRENT_LESSON: data.get("current_lesson"),
-            ATTR_NEXT_LESSON: data.get("next_lesson"),
-            ATTR_TODAY_LESSONS: data.get("today_lessons", []),
+            **lessons,
+            ATTR_REVISION: data.get("revision"),
             ATTR_REMAINING_TODAY: data.get("remaining_today_count", 0),
             ATTR_IS_VACATION: data.get("is_vacation", False),
             ATTR_VACATION_NAME: data.get("vacation_name"),
+            ATTR_NEXT_VACATION_START: data.get("next_vacation_start"),
+            ATTR_DAYS_UNTIL_VACATION: data.get("days_until_vacation"),
             ATTR_IS_SCHOOL_DAY: data.get("is_school_day", False),
+            ATTR_NEXT_SCHOOL_DAY: data.get("next_school_day"),
+            ATTR_NEXT_SCHOOL_DAY_START: data.get("next_school_day_start"),
         }
 
 
 class TimetableNextSensor(CoordinatorEntity, SensorEntity):
-    """Sensor for next lesson."""
+    """Sensor for next lesson.
+
+    The next lesson is looked up across days and vacations, so after the
+    last lesson of the day the sensor shows the first lesson of the next
+    school day.
+    """
+
+    _unrecorded_attributes = frozenset(
+        {ATTR_NOTES, ATTR_COLOR, ATTR_ICON, ATTR_UPCOMING}
+    )
+
+    _data_keys = ("upcoming_lessons", "date")
 
     def __init__(
         self, coordinator: TimetableCoordinator, entry: ConfigEntry
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
-        self._attr_name = "TimeTable Next Lesson"
+        super().__init__(coordinator, self._data_keys)
+        self._attr_name = f"{coordinator.entity_prefix} Next Lesson"
         self._attr_unique_id = f"{entry.entry_id}_next"
         self._attr_icon = "mdi:clock-outline"
         self._attr_has_entity_name = False
+        self._entry = entry
+
+    @property
+    def _next_lesson(self) -> dict[str, Any] | None:
+        """Return the next lesson with its date, if any."""
+        upcoming = self.coordinator.data.get("upcoming_lessons")
+        return upcoming[0] if upcoming else None
 
     @property
     def native_value(self) -> str | None:
         """Return the state of the sensor."""
-        next_lesson = self.coordinator.data.get("next_lesson")
+        next_lesson = self._next_lesson
         if next_lesson is None:
             return "No upcoming lesson"
 
         subject = next_lesson.get("subject", "Unknown")
         start = next_lesson.get("start_time", "")
-        return f"{subject} at {start}"
+        if next_lesson["date"] == self.coordinator.data.get("date"):
+            return f"{subject} at {start}"
+        weekday = WEEKDAY_MAP[date.fromisoformat(next_lesson["date"]).weekday()]
+        return f"{subject} on {weekday.capitalize()} at {start}"
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
-        next_lesson = self.coordinator.data.get("next_lesson")
+        next_lesson = self._next_lesson
         if next_lesson is None:
             return {}
 
-        return {
+        attributes = {
             "subject": next_lesson.get("subject"),
+            "date": next_lesson["date"],
+            "start": next_lesson["start"],
             "start_time": next_lesson.get("start_time"),
             "end_time": next_lesson.get("end_time"),
             "room": next_lesson.get("room"),
+            "exception": next_lesson.get("exception"),
+        }
+        if self._entry.options.get(CONF_COMPACT_ATTRIBUTES, False):
+            return attributes
+
+        return {
+            **attributes,
             "teacher": next_lesson.get("teacher"),
             "notes": next_lesson.get("notes"),
             "color": next_lesson.get("color"),
             "icon": next_lesson.get("icon"),
+            ATTR_UPCOMING: self.coordinator.data["upcoming_lessons"],
+        }
+
+
+class TimetableTimestampSensor(CoordinatorEntity, SensorEntity):
+    """Sensor for the instant a lesson or school day starts or ends.
+
+    The frontend renders timestamps as relative times on its own, so the
+    state only changes at lesson boundaries instead of every minute.
+    """
+
+    _attr_device_class = SensorDeviceClass.TIMESTAMP
+
+    def __init__(
+        self,
+        coordinator: TimetableCoordinator,
+        entry: ConfigEntry,
+        key: str,
+        name: str,
+        icon: str,
+    ) -> None:
+        """Initialize the sensor."""
+        super().__init__(coordinator, (key,))
+        self._attr_name = f"{coordinator.entity_prefix} {name}"
+        self._attr_unique_id = f"{entry.entry_id}_{key}"
+        self._attr_icon = icon
+        self._attr_has_entity_name = False
+        self._key = key
+
+    @property
+    def native_value(self) -> datetime | None:
+        """Return the state of the sensor."""
+        return self.coordinator.data.get(self._key)
+
+
+class TimetableStatisticsSensor(CoordinatorEntity, SensorEntity):
+    """Diagnostic sensor with the refresh latency and runtime statistics.
+
+    Disabled by default. Statistics are only collected while it is enabled,
+    so an unused sensor costs nothing on the refresh path.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
+    _attr_native_unit_of_measurement = UnitOfTime.MILLISECONDS
+    _attr_suggested_display_precision = 2
+    # Histograms change on every refresh; the state is enough for history
+    _unrecorded_attributes = frozenset({"counters", "histograms"})
+
+    def __init__(
+        self, coordinator: TimetableCoordinator, entry: ConfigEntry
+    ) -> None:
+        """Initialize the sensor."""
+        # No data keys: the statistics change on every refresh
+        super().__init__(coordinator)
+        self._attr_name = f"{coordinator.entity_prefix} Statistics"
+        self._attr_unique_id = f"{entry.entry_id}_statistics"
+        self._attr_icon = "mdi:chart-box-outline"
+        self._attr_has_entity_name = False
+
+    async def async_added_to_hass(self) -> None:
+        """Start collecting statistics."""
+        await super().async_added_to_hass()
+        self.coordinator.stats.enabled = True
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop collecting statistics and drop them."""
+        await super().async_will_remove_from_hass()
+        self.coordinator.stats.enabled = False
+        self.coordinator.stats.reset()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the mean refresh duration."""
+        refresh = self.coordinator.stats.histograms.get("refresh_ms")
+        if refresh is None or not refresh.count:
+            return None
+        return refresh.total / refresh.count
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        stats = self.coordinator.stats.as_dict()
+        return {
+            "counters": stats["counters"],
+            "histograms": stats["histograms"],
         }
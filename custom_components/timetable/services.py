@@ -0,0 +1,325 @@
+"""Services for TimeTable."""
+from __future__ import annotations
+
+from collections.abc import Awaitable
+
+import voluptuous as vol
+
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_ACTION,
+    ATTR_END_DATE,
+    ATTR_EXCEPTION,
+    ATTR_EXCEPTION_INDEX,
+    ATTR_FORMAT,
+    ATTR_LESSON,
+    ATTR_LESSON_INDEX,
+    ATTR_MERGE,
+    ATTR_MIN_OCCURRENCES,
+    ATTR_OCCURRENCES,
+    ATTR_OPERATIONS,
+    ATTR_PATH,
+    ATTR_SCHEDULE_DATA,
+    ATTR_SCHEDULE_ID,
+    ATTR_START_DATE,
+    ATTR_VACATION_END,
+    ATTR_VACATION_INDEX,
+    ATTR_VACATION_LABEL,
+    ATTR_VACATION_START,
+    ATTR_WEEKDAY,
+    DOMAIN,
+    IMPORT_FORMATS,
+    SERVICE_ADD_EXCEPTION,
+    SERVICE_ADD_LESSON,
+    SERVICE_ADD_VACATION,
+    SERVICE_BATCH_UPDATE,
+    SERVICE_GET_OCCURRENCES,
+    SERVICE_IMPORT_SCHEDULE,
+    SERVICE_REMOVE_EXCEPTION,
+    SERVICE_REMOVE_LESSON,
+    SERVICE_REMOVE_VACATION,
+    SERVICE_SET_SCHEDULE,
+    SERVICE_SYNC_SUBSTITUTIONS,
+    WEEKDAYS,
+)
+from .coordinator import TimetableCoordinator, async_find_coordinator
+from .importer import TemplateBuilder, read_file
+from .schemas import (
+    EXCEPTION_SCHEMA,
+    LESSON_SCHEMA,
+    SCHEDULE_DATA_SCHEMA,
+    operation,
+)
+from .sync import resolve_config_path
+
+SCHEDULE_ID_FIELD = {vol.Optional(ATTR_SCHEDULE_ID): cv.string}
+
+# Parts of the schedule data replaced by set_schedule
+SCHEDULE_DATA_KEYS = ("lessons", "vacations", "exceptions")
+
+# Entry options changed by set_schedule
+SCHEDULE_SETTINGS_KEYS = ("name", "include_weekends")
+
+SET_SCHEDULE_SCHEMA = vol.Schema(
+    {**SCHEDULE_ID_FIELD, vol.Required(ATTR_SCHEDULE_DATA): SCHEDULE_DATA_SCHEMA}
+)
+
+ADD_LESSON_SCHEMA = vol.Schema(
+    {
+        **SCHEDULE_ID_FIELD,
+        vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+        vol.Required(ATTR_LESSON): LESSON_SCHEMA,
+    }
+)
+
+REMOVE_LESSON_SCHEMA = vol.Schema(
+    {
+        **SCHEDULE_ID_FIELD,
+        vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+        vol.Required(ATTR_LESSON_INDEX): cv.positive_int,
+    }
+)
+
+ADD_VACATION_SCHEMA = vol.Schema(
+    {
+        **SCHEDULE_ID_FIELD,
+        vol.Required(ATTR_VACATION_START): cv.string,
+        vol.Required(ATTR_VACATION_END): cv.string,
+        vol.Required(ATTR_VACATION_LABEL): cv.string,
+    }
+)
+
+REMOVE_VACATION_SCHEMA = vol.Schema(
+    {
+        **SCHEDULE_ID_FIELD,
+        vol.Required(ATTR_VACATION_INDEX): cv.positive_int,
+    }
+)
+
+ADD_EXCEPTION_SCHEMA = vol.Schema(
+    {**SCHEDULE_ID_FIELD, vol.Required(ATTR_EXCEPTION): EXCEPTION_SCHEMA}
+)
+
+REMOVE_EXCEPTION_SCHEMA = vol.Schema(
+    {
+        **SCHEDULE_ID_FIELD,
+        vol.Required(ATTR_EXCEPTION_INDEX): cv.positive_int,
+    }
+)
+
+BATCH_UPDATE_SCHEMA = vol.Schema(
+    {
+        **SCHEDULE_ID_FIELD,
+        vol.Required(ATTR_OPERATIONS): vol.All(cv.ensure_list, [operation]),
+    }
+)
+
+GET_OCCURRENCES_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SCHEDULE_ID): cv.string,
+        vol.Required(ATTR_START_DATE): cv.date,
+        vol.Required(ATTR_END_DATE): cv.date,
+    }
+)
+
+IMPORT_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_SCHEDULE_ID): cv.string,
+        vol.Required(ATTR_PATH): cv.string,
+        vol.Optional(ATTR_FORMAT): vol.In(IMPORT_FORMATS),
+        vol.Optional(ATTR_MERGE, default=False): cv.boolean,
+        vol.Optional(ATTR_MIN_OCCURRENCES, default=2): vol.All(
+            vol.Coerce(int), vol.Range(min=1)
+        ),
+    }
+)
+
+
+SYNC_SUBSTITUTIONS_SCHEMA = vol.Schema(SCHEDULE_ID_FIELD)
+
+
+def _get_coordinator(hass: HomeAssistant, call: ServiceCall) -> TimetableCoordinator:
+    """Return the coordinator addressed by the service call."""
+    schedule_id = call.data.get(ATTR_SCHEDULE_ID)
+    if (coordinator := async_find_coordinator(hass, schedule_id=schedule_id)) is None:
+        raise ServiceValidationError(f"TimeTable schedule not found: {schedule_id}")
+    return coordinator
+
+
+async def _async_edit(edit: Awaitable[None]) -> None:
+    """Await a coordinator edit, reporting invalid input to the caller."""
+    try:
+        await edit
+    except ValueError as err:
+        raise ServiceValidationError(str(err)) from err
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the TimeTable services."""
+
+    @callback
+    def handle_get_occurrences(call: ServiceCall) -> ServiceResponse:
+        """Return the lesson occurrences of a date range."""
+        coordinator = _get_coordinator(hass, call)
+        try:
+            occurrences = coordinator.get_occurrences(
+                call.data[ATTR_START_DATE], call.data[ATTR_END_DATE]
+            )
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from err
+        return {ATTR_OCCURRENCES: [occurrence.as_dict() for occurrence in occurrences]}
+
+    async def handle_import_schedule(call: ServiceCall) -> ServiceResponse:
+        """Import lessons and vacations from an iCalendar or CSV file."""
+        coordinator = _get_coordinator(hass, call)
+        try:
+            path = resolve_config_path(hass, call.data[ATTR_PATH])
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from err
+        file_format = call.data.get(ATTR_FORMAT, path.suffix.lstrip(".").lower())
+        if file_format not in IMPORT_FORMATS:
+            raise ServiceValidationError(f"Unsupported file format: {file_format}")
+
+        builder = TemplateBuilder(call.data[ATTR_MIN_OCCURRENCES])
+        try:
+            await hass.async_add_executor_job(
+                read_file,
+                str(path),
+                file_format,
+                builder,
+                dt_util.get_default_time_zone(),
+            )
+        except (OSError, UnicodeDecodeError) as err:
+            raise ServiceValidationError(f"Cannot read {path}: {err}") from err
+
+        try:
+            builder.raise_for_errors()
+            imported = builder.build()
+            # Only the parts present in the file are replaced or extended
+            data = {key: value for key, value in imported.items() if value}
+            if call.data[ATTR_MERGE]:
+                stored = coordinator.store.data
+                if "lessons" in data:
+                    data["lessons"] = {
+                        **stored["lessons"],
+                        **{
+                            weekday: [*stored["lessons"].get(weekday, []), *lessons]
+                            for weekday, lessons in data["lessons"].items()
+                        },
+                    }
+                if "vacations" in data:
+                    data["vacations"] = [*stored["vacations"], *data["vacations"]]
+            # Validated as a whole, written and refreshed once
+            await coordinator.async_set_schedule(data)
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from err
+
+        return {
+            "events": builder.events,
+            "lessons": sum(len(lessons) for lessons in imported["lessons"].values()),
+            "vacations": len(imported["vacations"]),
+        }
+
+    async def handle_set_schedule(call: ServiceCall) -> None:
+        """Replace the schedule as a whole."""
+        coordinator = _get_coordinator(hass, call)
+        data = call.data[ATTR_SCHEDULE_DATA]
+        await _async_edit(
+            coordinator.async_set_schedule(
+                {key: data[key] for key in SCHEDULE_DATA_KEYS if key in data},
+                {key: data[key] for key in SCHEDULE_SETTINGS_KEYS if key in data},
+            )
+        )
+
+    async def handle_operation(call: ServiceCall) -> None:
+        """Apply a single edit named after the service."""
+        coordinator = _get_coordinator(hass, call)
+        await _async_edit(
+            coordinator.async_apply_operations([{ATTR_ACTION: call.service, **call.data}])
+        )
+
+    async def handle_add_vacation(call: ServiceCall) -> None:
+        """Add a vacation period."""
+        coordinator = _get_coordinator(hass, call)
+        vacation = {
+            key: call.data[key]
+            for key in (ATTR_VACATION_LABEL, ATTR_VACATION_START, ATTR_VACATION_END)
+        }
+        await _async_edit(coordinator.async_add_vacation(vacation))
+
+    async def handle_batch_update(call: ServiceCall) -> None:
+        """Apply a list of edits with a single write and refresh."""
+        coordinator = _get_coordinator(hass, call)
+        await _async_edit(coordinator.async_apply_operations(call.data[ATTR_OPERATIONS]))
+
+    async def handle_sync_substitutions(call: ServiceCall) -> ServiceResponse:
+        """Fetch the substitution plan now and apply its changes."""
+        coordinator = _get_coordinator(hass, call)
+        sync = hass.data[DOMAIN][coordinator.config_entry.entry_id]["sync"]
+        try:
+            return await sync.async_sync(force=True)
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from err
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_SET_SCHEDULE, handle_set_schedule, schema=SET_SCHEDULE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_ADD_LESSON, handle_operation, schema=ADD_LESSON_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_REMOVE_LESSON, handle_operation, schema=REMOVE_LESSON_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_ADD_VACATION, handle_add_vacation, schema=ADD_VACATION_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_VACATION,
+        handle_operation,
+        schema=REMOVE_VACATION_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_ADD_EXCEPTION, handle_operation, schema=ADD_EXCEPTION_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REMOVE_EXCEPTION,
+        handle_operation,
+        schema=REMOVE_EXCEPTION_SCHEMA,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_BATCH_UPDATE, handle_batch_update, schema=BATCH_UPDATE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SYNC_SUBSTITUTIONS,
+        handle_sync_substitutions,
+        schema=SYNC_SUBSTITUTIONS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_GET_OCCURRENCES,
+        handle_get_occurrences,
+        schema=GET_OCCURRENCES_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_SCHEDULE,
+        handle_import_schedule,
+        schema=IMPORT_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
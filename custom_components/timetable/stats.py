@@ -0,0 +1,133 @@
+"""Lightweight runtime statistics for TimeTable.
+
+Counters and latency/size histograms are only collected while enabled,
+which is while the statistics diagnostic sensor is enabled. When disabled
+every call returns after a single attribute check, and timers are a shared
+null context manager, so the instrumented paths cost next to nothing.
+"""
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import AbstractContextManager, nullcontext
+from time import perf_counter
+from typing import Any
+
+# Upper bucket bounds by the unit suffix of a histogram name
+BUCKETS: dict[str, tuple[float, ...]] = {
+    "ms": (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000),
+    "bytes": (256, 1024, 4096, 16384, 65536, 262144, 1048576),
+}
+
+_DISABLED: AbstractContextManager[None] = nullcontext()
+
+
+class Histogram:
+    """Counts of observed values in fixed buckets, with count, sum and max."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        """Initialize the histogram with the upper bounds of its buckets."""
+        self.bounds = bounds
+        # One more bucket for values above the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Add a value."""
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, fraction: float) -> float | None:
+        """Return the upper bound of the bucket holding the given quantile."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for bound, count in zip((*self.bounds, self.max), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the histogram for diagnostics."""
+        labels = [f"<={bound:g}" for bound in self.bounds] + [f">{self.bounds[-1]:g}"]
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 3) if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": round(self.max, 3),
+            "buckets": {
+                label: count for label, count in zip(labels, self.counts) if count
+            },
+        }
+
+
+class _Timer:
+    """Context manager adding its run time in milliseconds to a histogram."""
+
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> None:
+        self._start = perf_counter()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._histogram.observe((perf_counter() - self._start) * 1000)
+
+
+class Stats:
+    """Counters and histograms of one timetable."""
+
+    def __init__(self) -> None:
+        """Initialize disabled, empty statistics."""
+        self.enabled = False
+        self.counters: dict[str, int] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def _histogram(self, name: str) -> Histogram:
+        """Return the histogram ``name``, bucketed by its unit suffix."""
+        if (histogram := self.histograms.get(name)) is None:
+            bounds = BUCKETS.get(name.rpartition("_")[2], BUCKETS["ms"])
+            histogram = self.histograms[name] = Histogram(bounds)
+        return histogram
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        """Add ``amount`` to the counter ``name``."""
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float) -> None:
+        """Add ``value`` to the histogram ``name``."""
+        if self.enabled:
+            self._histogram(name).observe(value)
+
+    def timer(self, name: str) -> AbstractContextManager[None]:
+        """Return a context manager timing its block into the histogram ``name``."""
+        if not self.enabled:
+            return _DISABLED
+        return _Timer(self._histogram(name))
+
+    def reset(self) -> None:
+        """Drop all collected values."""
+        self.counters.clear()
+        self.histograms.clear()
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the statistics for diagnostics."""
+        return {
+            "enabled": self.enabled,
+            "counters": dict(self.counters),
+            "histograms": {
+                name: histogram.as_dict() for name, histogram in self.histograms.items()
+            },
+        }
@@ -0,0 +1,125 @@
+"""Storage for TimeTable schedules."""
+from __future__ import annotations
+
+from collections.abc import Mapping
+import logging
+import secrets
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import SAVE_DELAY, STORAGE_KEY, STORAGE_VERSION
+from .stats import Stats
+
+_LOGGER = logging.getLogger(__name__)
+
+# Keys that used to live in the config entry options
+SCHEDULE_KEYS = ("lessons", "vacations")
+
+
+class _StatsStore(Store[dict[str, Any]]):
+    """Store that records every disk write in the timetable statistics.
+
+    Immediate and delayed saves both end up here, so every write is
+    counted and timed, including the JSON encoding.
+    """
+
+    def __init__(self, hass: HomeAssistant, key: str, stats: Stats) -> None:
+        """Initialize the store."""
+        super().__init__(hass, STORAGE_VERSION, key)
+        self._stats = stats
+
+    async def _async_write_data(self, path: str, data: dict) -> None:
+        """Write the data and record the write."""
+        with self._stats.timer("store_save_ms"):
+            await super()._async_write_data(path, data)
+        self._stats.incr("store_writes")
+
+
+class TimetableStore:
+    """Persist the schedule of one timetable in its own storage file.
+
+    Edits are written with a delay so that a burst of changes, such as a
+    drag-and-drop session in the panel, results in a single disk write.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        # Shared with the coordinator of the timetable
+        self.stats = Stats()
+        self._store: Store[dict[str, Any]] = _StatsStore(
+            hass, f"{STORAGE_KEY}.{entry_id}", self.stats
+        )
+        self.data: dict[str, Any] = {
+            "lessons": {},
+            "vacations": [],
+            "exceptions": [],
+            "revision": 0,
+        }
+        self._dirty = False
+
+    async def async_load(self, options: Mapping[str, Any]) -> bool:
+        """Load the schedule, migrating it from ``options`` on first run.
+
+        Returns True when the schedule was migrated, so the caller can strip
+        it from the config entry options.
+        """
+        data = await self._store.async_load()
+        if data is not None:
+            self.data = {**self.data, **data}
+            return False
+
+        self.data = {
+            "lessons": dict(options.get("lessons", {})),
+            "vacations": list(options.get("vacations", [])),
+            "exceptions": [],
+            "revision": 0,
+        }
+        await self._store.async_save(self.data)
+        _LOGGER.debug("Migrated schedule to %s", self._store.key)
+        return any(key in options for key in SCHEDULE_KEYS)
+
+    @property
+    def revision(self) -> int:
+        """Return the revision counter, bumped on every change."""
+        return self.data["revision"]
+
+    @callback
+    def async_update(self, changes: Mapping[str, Any]) -> None:
+        """Apply ``changes`` and schedule a delayed write."""
+        self.data = {**self.data, **changes, "revision": self.revision + 1}
+        self._dirty = True
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @property
+    def feed_token(self) -> str | None:
+        """Return the secret of the calendar feed URL, if one was created."""
+        return self.data.get("feed_token")
+
+    @callback
+    def async_get_feed_token(self) -> str:
+        """Return the secret of the calendar feed URL, creating it on first use."""
+        if not (token := self.data.get("feed_token")):
+            # Not a schedule change, so the revision stays the same
+            token = secrets.token_urlsafe(24)
+            self.data = {**self.data, "feed_token": token}
+            self._dirty = True
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+        return token
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data for the delayed write."""
+        self._dirty = False
+        return self.data
+
+    async def async_flush(self) -> None:
+        """Write pending changes immediately."""
+        if self._dirty:
+            self._dirty = False
+            await self._store.async_save(self.data)
+
+    async def async_remove(self) -> None:
+        """Remove the storage file."""
+        await self._store.async_remove()
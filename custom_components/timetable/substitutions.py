@@ -0,0 +1,249 @@
+"""Parsing and diffing of published substitution plans.
+
+A plan is parsed into date-specific exceptions by one of the registered
+parsers. Exceptions taken from a plan are tagged with their source, so a
+new version of the plan is merged by replacing only the tagged entries
+that changed, while exceptions entered by hand are left alone.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterable, Mapping
+import csv
+from html.parser import HTMLParser
+import io
+import json
+from typing import Any
+
+from .edits import check_exception
+from .overlay import parse_exception
+
+# A parser turns the text of a plan into one mapping per plan row
+PlanParser = Callable[[str], Iterable[Mapping[str, Any]]]
+
+# Plan parsers by format name
+PARSERS: dict[str, PlanParser] = {}
+
+# Wording used by common plan generators for the exception types
+TYPE_ALIASES = {
+    "cancelled": "cancel",
+    "canceled": "cancel",
+    "entfall": "cancel",
+    "substitution": "replace",
+    "vertretung": "replace",
+    "raumänderung": "room",
+    "raumaenderung": "room",
+    "moved": "move",
+    "verlegung": "move",
+    "extra": "add",
+    "zusatz": "add",
+}
+
+# Plan columns that change the affected lesson, by lesson field
+LESSON_COLUMNS = {
+    "new_subject": "subject",
+    "new_start_time": "start_time",
+    "new_end_time": "end_time",
+    "teacher": "teacher",
+    "notes": "notes",
+}
+
+# Fields holding HH:MM times, in an exception and in its lesson
+TIME_FIELDS = ("start_time", "end_time")
+
+
+def register_parser(name: str) -> Callable[[PlanParser], PlanParser]:
+    """Register a plan parser under ``name``."""
+
+    def decorator(parser: PlanParser) -> PlanParser:
+        PARSERS[name] = parser
+        return parser
+
+    return decorator
+
+
+@register_parser("json")
+def parse_json(text: str) -> Iterable[Mapping[str, Any]]:
+    """Return the rows of a JSON list or of an object with an ``exceptions`` list."""
+    data = json.loads(text)
+    if isinstance(data, Mapping):
+        data = data.get("exceptions")
+    if not isinstance(data, list):
+        raise ValueError("Expected a list of exceptions")
+    return data
+
+
+@register_parser("csv")
+def parse_csv(text: str) -> Iterable[Mapping[str, Any]]:
+    """Return the rows of a CSV table with a header line."""
+    return csv.DictReader(io.StringIO(text))
+
+
+class _TableParser(HTMLParser):
+    """Collect the cell texts of the first table of an HTML page."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.rows: list[list[str]] = []
+        self._depth = 0
+        self._done = False
+        self._cell: list[str] | None = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if self._done:
+            return
+        if tag == "table":
+            self._depth += 1
+        elif self._depth == 1 and tag == "tr":
+            self.rows.append([])
+        elif self._depth == 1 and tag in ("td", "th") and self.rows:
+            self._cell = []
+
+    def handle_endtag(self, tag: str) -> None:
+        if self._done:
+            return
+        if tag == "table":
+            self._depth -= 1
+            self._done = self._depth == 0
+        elif tag in ("td", "th") and self._cell is not None:
+            self.rows[-1].append(" ".join("".join(self._cell).split()))
+            self._cell = None
+
+    def handle_data(self, data: str) -> None:
+        if self._cell is not None:
+            self._cell.append(data)
+
+
+@register_parser("html")
+def parse_html(text: str) -> Iterable[Mapping[str, Any]]:
+    """Return the rows of the first table of an HTML page, keyed by its header."""
+    parser = _TableParser()
+    parser.feed(text)
+    parser.close()
+    if not parser.rows:
+        raise ValueError("No table found")
+    header, *rows = parser.rows
+    return [dict(zip(header, row)) for row in rows if any(row)]
+
+
+def _iso_date(value: Any) -> Any:
+    """Return ``DD.MM.YYYY`` dates in ISO format, other values unchanged."""
+    if isinstance(value, str) and value.count(".") == 2:
+        day, month, year = value.split(".")
+        return f"{year}-{month.zfill(2)}-{day.zfill(2)}"
+    return value
+
+
+def row_to_exception(row: Mapping[str, Any]) -> dict[str, Any]:
+    """Convert a plan row to a stored exception.
+
+    Raises ValueError when the row has a lesson or times of the wrong type.
+    """
+    row = {
+        str(key).strip().lower(): value.strip() if isinstance(value, str) else value
+        for key, value in row.items()
+        if key is not None and value not in (None, "")
+    }
+    kind = str(row.get("type", "")).lower()
+    kind = TYPE_ALIASES.get(kind, kind)
+    exception: dict[str, Any] = {"date": _iso_date(row.get("date", "")), "type": kind}
+    if not isinstance(lesson := row.get("lesson") or {}, Mapping):
+        raise ValueError("lesson must be a mapping")
+    lesson = dict(lesson)
+
+    if kind == "add":
+        # The row describes the extra lesson itself
+        for field in ("subject", "start_time", "end_time", "room"):
+            if field in row:
+                lesson.setdefault(field, row[field])
+    else:
+        for field in ("start_time", "subject"):
+            if field in row:
+                exception[field] = row[field]
+        if "to_date" in row:
+            exception["to_date"] = _iso_date(row["to_date"])
+        if kind == "room":
+            exception["room"] = row.get("room", "")
+        elif "room" in row:
+            lesson["room"] = row["room"]
+    for column, field in LESSON_COLUMNS.items():
+        if column in row:
+            lesson[field] = row[column]
+    for fields in (exception, lesson):
+        for field in TIME_FIELDS:
+            if field in fields and not isinstance(fields[field], str):
+                raise ValueError(f"{field} must be an HH:MM string")
+    if lesson:
+        exception["lesson"] = lesson
+    return exception
+
+
+def _decode(payload: bytes) -> str:
+    """Decode a plan, falling back to Windows-1252 used by older generators."""
+    try:
+        return payload.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        return payload.decode("cp1252", errors="replace")
+
+
+def parse_plan(
+    payload: bytes, parser: str
+) -> tuple[list[dict[str, Any]], list[str]]:
+    """Return the valid exceptions of a plan and messages for invalid rows.
+
+    Raises ValueError when the plan as a whole cannot be read.
+    """
+    if parser not in PARSERS:
+        raise ValueError(f"Unknown plan format: {parser}")
+    exceptions = []
+    errors = []
+    for number, row in enumerate(PARSERS[parser](_decode(payload)), 1):
+        if not isinstance(row, Mapping):
+            errors.append(f"row {number}: not a mapping")
+            continue
+        try:
+            exception = row_to_exception(row)
+            check_exception(exception)
+        except (KeyError, ValueError) as err:
+            errors.append(f"row {number}: {err}")
+            continue
+        exceptions.append(exception)
+    return exceptions, errors
+
+
+def _key(exception: Mapping[str, Any]) -> str:
+    """Return a key identifying the content of an exception."""
+    return json.dumps(exception, sort_keys=True)
+
+
+def merge_exceptions(
+    current: list[dict[str, Any]],
+    incoming: list[dict[str, Any]],
+    source: str,
+    ordinal: int,
+) -> tuple[list[dict[str, Any]], int, int] | None:
+    """Merge the exceptions of a plan into the stored ones.
+
+    Returns the new exception list with the numbers of added and removed
+    entries, or None when the plan matches the stored exceptions. Plan
+    entries that only affect days before ``ordinal`` are ignored, as they
+    would be pruned right away.
+    """
+    tagged = {}
+    for exception in incoming:
+        if parse_exception(exception)[1] >= ordinal:
+            exception = {**exception, "source": source}
+            tagged[_key(exception)] = exception
+
+    kept = [
+        exception
+        for exception in current
+        if exception.get("source") != source or _key(exception) in tagged
+    ]
+    present = {_key(exception) for exception in kept if exception.get("source") == source}
+    added = [exception for key, exception in tagged.items() if key not in present]
+    removed = len(current) - len(kept)
+    if not added and not removed:
+        return None
+    merged = sorted([*kept, *added], key=lambda exception: exception["date"])
+    return merged, len(added), removed
+
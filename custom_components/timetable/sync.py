@@ -0,0 +1,258 @@
+"""Substitution plan sync for TimeTable.
+
+The plan configured for a timetable is polled from a URL or a file. Each
+poll is skipped as early as possible: URLs are fetched conditionally with
+the ETag and Last-Modified of the previous response, files are only read
+when their modification time or size changed, and payloads whose hash
+matches the last applied one are not parsed. Parsed plans are diffed
+against the stored exceptions, so only changed entries are written.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+from hashlib import blake2b
+from http import HTTPStatus
+import logging
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+import aiohttp
+from aiohttp import hdrs
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_SYNC_FORMAT,
+    CONF_SYNC_INTERVAL,
+    CONF_SYNC_SOURCE,
+    DEFAULT_SYNC_FORMAT,
+    DEFAULT_SYNC_INTERVAL,
+    MAX_PLAN_SIZE,
+    SYNC_SOURCE,
+)
+from .coordinator import TimetableCoordinator
+from .substitutions import parse_plan
+
+_LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for the plan server
+FETCH_TIMEOUT = 30
+
+# Invalid plan rows listed in the log
+MAX_LOGGED_ERRORS = 5
+
+
+def resolve_config_path(hass: HomeAssistant, value: str) -> Path:
+    """Return ``value`` as a path inside the config dir or an allowlisted dir."""
+    path = Path(hass.config.path(value)).resolve()
+    if not (
+        path.is_relative_to(Path(hass.config.config_dir).resolve())
+        or hass.config.is_allowed_path(str(path))
+    ):
+        raise ValueError(f"Access to {path} is not allowed")
+    return path
+
+
+def _redact_source(source: str) -> str:
+    """Return the scheme and host of a plan URL, or the name of a plan file.
+
+    The rest of the source can carry credentials or tokens, so only this
+    form is written to the log.
+    """
+    if source.startswith(("http://", "https://")):
+        url = urlsplit(source)
+        return f"{url.scheme}://{url.hostname}"
+    return Path(source).name
+
+
+def _read_if_changed(
+    path: Path, stamp: tuple[int, int] | None
+) -> tuple[bytes | None, tuple[int, int]]:
+    """Read ``path`` unless its modification time and size equal ``stamp``."""
+    stat = path.stat()
+    current = (stat.st_mtime_ns, stat.st_size)
+    if current == stamp:
+        return None, current
+    if stat.st_size > MAX_PLAN_SIZE:
+        raise ValueError(f"Plan exceeds {MAX_PLAN_SIZE} bytes")
+    with open(path, "rb") as file:
+        return file.read(), current
+
+
+class SubstitutionSync:
+    """Poll the substitution plan of a timetable and apply its changes."""
+
+    def __init__(self, hass: HomeAssistant, coordinator: TimetableCoordinator) -> None:
+        """Initialize the sync."""
+        self.hass = hass
+        self.coordinator = coordinator
+        self.source: str | None = None
+        self.parser = DEFAULT_SYNC_FORMAT
+        self.interval: timedelta | None = None
+        self.last_status: str | None = None
+        self.last_error: str | None = None
+        self.last_checked: datetime | None = None
+        self.last_changed: datetime | None = None
+        self.stats = {
+            "polls": 0,
+            "not_modified": 0,
+            "unchanged": 0,
+            "applied": 0,
+            "error": 0,
+        }
+        self._lock = asyncio.Lock()
+        self._unsub_poll: CALLBACK_TYPE | None = None
+        # ETag, Last-Modified or file stamp, and hash of the last applied plan
+        self._validators: dict[str, Any] = {}
+
+    @callback
+    def async_configure(self, options: Mapping[str, Any]) -> None:
+        """Start, restart or stop polling according to ``options``.
+
+        Options updates that leave the sync settings alone, such as lesson
+        edits, keep the running poll. The plan is fetched right away when
+        its source or format changed.
+        """
+        source = options.get(CONF_SYNC_SOURCE) or None
+        parser = options.get(CONF_SYNC_FORMAT, DEFAULT_SYNC_FORMAT)
+        interval = timedelta(minutes=options.get(CONF_SYNC_INTERVAL, DEFAULT_SYNC_INTERVAL))
+        plan_changed = (source, parser) != (self.source, self.parser)
+        if not plan_changed and interval == self.interval:
+            return
+        if plan_changed:
+            self._validators.clear()
+        self.source, self.parser, self.interval = source, parser, interval
+
+        self.async_stop()
+        if source is None:
+            return
+        self._unsub_poll = async_track_time_interval(
+            self.hass, self._async_poll, interval, name="TimeTable substitution sync"
+        )
+        if plan_changed:
+            self.hass.async_create_background_task(
+                self.async_sync(), "TimeTable substitution sync"
+            )
+
+    @callback
+    def async_stop(self) -> None:
+        """Stop polling."""
+        if self._unsub_poll is not None:
+            self._unsub_poll()
+            self._unsub_poll = None
+
+    async def _async_poll(self, _now: datetime) -> None:
+        """Sync on the poll interval."""
+        await self.async_sync()
+
+    async def _async_fetch_url(self, url: str) -> tuple[bytes | None, dict[str, Any]]:
+        """Fetch the plan unless the server reports it unchanged."""
+        headers = {}
+        if etag := self._validators.get("etag"):
+            headers[hdrs.IF_NONE_MATCH] = etag
+        if last_modified := self._validators.get("last_modified"):
+            headers[hdrs.IF_MODIFIED_SINCE] = last_modified
+        session = async_get_clientsession(self.hass)
+        async with session.get(
+            url, headers=headers, timeout=aiohttp.ClientTimeout(total=FETCH_TIMEOUT)
+        ) as response:
+            if response.status == HTTPStatus.NOT_MODIFIED:
+                return None, {}
+            response.raise_for_status()
+            payload = await response.content.read(MAX_PLAN_SIZE + 1)
+            if len(payload) > MAX_PLAN_SIZE:
+                raise ValueError(f"Plan exceeds {MAX_PLAN_SIZE} bytes")
+            return payload, {
+                "etag": response.headers.get(hdrs.ETAG),
+                "last_modified": response.headers.get(hdrs.LAST_MODIFIED),
+            }
+
+    async def _async_read_file(self, value: str) -> tuple[bytes | None, dict[str, Any]]:
+        """Read the plan file unless its modification time and size are unchanged."""
+        path = resolve_config_path(self.hass, value)
+        payload, stamp = await self.hass.async_add_executor_job(
+            _read_if_changed, path, self._validators.get("file_stamp")
+        )
+        return payload, {"file_stamp": stamp}
+
+    async def async_sync(self, force: bool = False) -> dict[str, Any]:
+        """Fetch the plan and apply the exceptions that changed.
+
+        With ``force`` the plan is fetched and diffed even if the validators
+        of the last applied plan say it is unchanged.
+        """
+        if self.source is None:
+            raise ValueError("No substitution plan configured")
+        async with self._lock:
+            if force:
+                self._validators.clear()
+            self.stats["polls"] += 1
+            self.last_checked = dt_util.utcnow()
+            result = await self._async_sync(self.source)
+            self.last_status = result["status"]
+            self.stats[result["status"]] += 1
+            return result
+
+    async def _async_sync(self, source: str) -> dict[str, Any]:
+        """Run one sync of ``source``."""
+        label = _redact_source(source)
+        try:
+            if source.startswith(("http://", "https://")):
+                payload, validators = await self._async_fetch_url(source)
+            else:
+                payload, validators = await self._async_read_file(source)
+            if payload is None:
+                return {"status": "not_modified"}
+
+            digest = blake2b(payload, digest_size=16).hexdigest()
+            if digest == self._validators.get("digest"):
+                # Served again with new validators, but the same content
+                self._validators.update(validators)
+                return {"status": "unchanged"}
+
+            exceptions, errors = await self.hass.async_add_executor_job(
+                parse_plan, payload, self.parser
+            )
+            if errors:
+                _LOGGER.warning(
+                    "Skipped %d invalid rows of the substitution plan %s: %s",
+                    len(errors),
+                    label,
+                    "; ".join(errors[:MAX_LOGGED_ERRORS]),
+                )
+            added, removed = await self.coordinator.async_sync_exceptions(
+                SYNC_SOURCE, exceptions
+            )
+        except (aiohttp.ClientError, TimeoutError, OSError, ValueError) as err:
+            self.last_error = str(err) or type(err).__name__
+            _LOGGER.warning(
+                "Cannot sync substitution plan %s: %s",
+                label,
+                self.last_error.replace(source, label),
+            )
+            return {"status": "error", "error": self.last_error}
+
+        # Only remember the plan once it was applied, so failures are retried
+        self._validators.update(validators, digest=digest)
+        self.last_error = None
+        if not added and not removed:
+            return {"status": "unchanged", "invalid": len(errors)}
+        self.last_changed = dt_util.utcnow()
+        _LOGGER.debug(
+            "Substitution plan %s: %d exceptions added, %d removed",
+            label,
+            added,
+            removed,
+        )
+        return {
+            "status": "applied",
+            "added": added,
+            "removed": removed,
+            "invalid": len(errors),
+        }
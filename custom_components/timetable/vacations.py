@@ -0,0 +1,127 @@
+"""Vacation interval index for TimeTable.
+
+Vacation periods are normalised into sorted, non-overlapping ranges of
+ordinal days at load time. Overlapping or adjacent periods are coalesced,
+so a lookup is a single bisection no matter how many holiday ranges a
+multi-year calendar contributes.
+"""
+from __future__ import annotations
+
+from bisect import bisect_right
+from collections.abc import Iterable, Mapping
+from datetime import date
+import logging
+from typing import Any
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_vacation(vacation: Mapping[str, Any]) -> tuple[int, int, str]:
+    """Convert a stored vacation dict to an ``(start, end, label)`` range."""
+    try:
+        start = date.fromisoformat(vacation["start_date"]).toordinal()
+        end = date.fromisoformat(vacation["end_date"]).toordinal()
+    except (KeyError, TypeError) as err:
+        raise ValueError(f"Invalid vacation dates: {err}") from err
+    if start > end:
+        raise ValueError("Vacation ends before it starts")
+    return start, end, vacation.get("label") or "Vacation"
+
+
+class VacationIndex:
+    """Sorted, merged vacation ranges keyed by ordinal day."""
+
+    __slots__ = ("starts", "ends", "labels")
+
+    def __init__(
+        self, ranges: Iterable[tuple[int, int, str]] = ()
+    ) -> None:
+        """Merge ``(start, end, label)`` ordinal ranges into the index."""
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+        self.labels: list[str] = []
+
+        merged_labels: list[list[str]] = []
+        for start, end, label in sorted(ranges):
+            if self.ends and start <= self.ends[-1] + 1:
+                self.ends[-1] = max(self.ends[-1], end)
+                if label not in merged_labels[-1]:
+                    merged_labels[-1].append(label)
+            else:
+                self.starts.append(start)
+                self.ends.append(end)
+                merged_labels.append([label])
+
+        self.labels = [" / ".join(labels) for labels in merged_labels]
+
+    @classmethod
+    def from_list(cls, vacations: Iterable[Mapping[str, Any]]) -> VacationIndex:
+        """Build the index from stored vacation dicts."""
+        ranges = []
+        for vacation in vacations:
+            try:
+                ranges.append(parse_vacation(vacation))
+            except ValueError as err:
+                _LOGGER.warning("Skipping invalid vacation (%s): %s", err, vacation)
+        return cls(ranges)
+
+    def __len__(self) -> int:
+        """Return the number of merged ranges."""
+        return len(self.starts)
+
+    def _find(self, ordinal: int) -> int:
+        """Return the position of the range containing ``ordinal`` or -1."""
+        idx = bisect_right(self.starts, ordinal) - 1
+        if idx >= 0 and ordinal <= self.ends[idx]:
+            return idx
+        return -1
+
+    def contains(self, ordinal: int) -> bool:
+        """Return whether the ordinal day falls into a vacation."""
+        return self._find(ordinal) >= 0
+
+    def skip(self, ordinal: int) -> int:
+        """Return the first day from ``ordinal`` on that is not in a vacation."""
+        idx = self._find(ordinal)
+        # Merged ranges never touch, so the day after a range is a school day
+        return self.ends[idx] + 1 if idx >= 0 else ordinal
+
+    def lookup(self, day: date) -> str | None:
+        """Return the vacation label for ``day`` or None on school days."""
+        idx = self._find(day.toordinal())
+        return self.labels[idx] if idx >= 0 else None
+
+    def end_of(self, day: date) -> date | None:
+        """Return the last day of the vacation containing ``day``."""
+        idx = self._find(day.toordinal())
+        return date.fromordinal(self.ends[idx]) if idx >= 0 else None
+
+    def next_start(self, day: date) -> date | None:
+        """Return the start of the first vacation beginning after ``day``."""
+        idx = bisect_right(self.starts, day.toordinal())
+        if idx < len(self.starts):
+            return date.fromordinal(self.starts[idx])
+        return None
+
+    def gaps(self, first: int, last: int) -> list[tuple[int, int]]:
+        """Return the ordinal ranges between ``first`` and ``last`` outside vacations."""
+        spans = []
+        cursor = first
+        for idx in range(max(bisect_right(self.starts, first) - 1, 0), len(self.starts)):
+            if self.starts[idx] > last:
+                break
+            if self.ends[idx] < cursor:
+                continue
+            if self.starts[idx] > cursor:
+                spans.append((cursor, self.starts[idx] - 1))
+            cursor = self.ends[idx] + 1
+        if cursor <= last:
+            spans.append((cursor, last))
+        return spans
+
+    def days_until(self, day: date) -> int | None:
+        """Return days until the next vacation, 0 while on vacation."""
+        if self._find(day.toordinal()) >= 0:
+            return 0
+        start = self.next_start(day)
+        return (start - day).days if start is not None else None
@@ -0,0 +1,164 @@
+"""Overlap detection for the lessons of the weekly template.
+
+Each day is sorted by start time once and swept in both directions. The
+forward sweep keeps the latest end seen so far and the backward sweep the
+earliest start, each per rotation week, so every lesson finds a lesson it
+overlaps, if there is one, in O(n log n) for the sort plus O(n * weeks)
+for the sweeps. Lessons restricted to disjoint rotation weeks never meet.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable, Mapping, Sequence
+from typing import Any, NamedTuple
+
+from .const import MAX_REPORTED_ERRORS
+from .schedule import Lesson
+
+# Sweep state for one bucket: (end or start minute, index)
+_Mark = tuple[int, int]
+
+
+class Conflict(NamedTuple):
+    """Two overlapping lessons of one weekday, by index into its list."""
+
+    weekday: str
+    index: int
+    other: int
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the conflict for the websocket API."""
+        return {"weekday": self.weekday, "index": self.index, "other": self.other}
+
+
+class OverlapError(ValueError):
+    """Raised when a write would store overlapping lessons."""
+
+    def __init__(
+        self,
+        conflicts: list[Conflict],
+        lessons: Mapping[str, Sequence[Mapping[str, Any]]],
+    ) -> None:
+        """Initialize the error with a message listing the conflicts."""
+        self.conflicts = conflicts
+        shown = "; ".join(
+            describe(conflict, lessons) for conflict in conflicts[:MAX_REPORTED_ERRORS]
+        )
+        more = len(conflicts) - MAX_REPORTED_ERRORS
+        if more > 0:
+            shown += f"; and {more} more"
+        super().__init__(f"{len(conflicts)} overlapping lessons: {shown}")
+
+
+def _key(lesson: Mapping[str, Any]) -> tuple[Any, ...]:
+    """Return what decides whether a lesson overlaps others."""
+    return lesson["start_time"], lesson["end_time"], tuple(lesson.get("weeks") or ())
+
+
+def _buckets(lesson: Lesson) -> Iterable[object]:
+    """Return the sweep buckets a lesson is checked against."""
+    # Every-week lessons meet all lessons; restricted ones meet every-week
+    # lessons and lessons sharing one of their weeks
+    return ("any",) if not lesson.weeks else ("every", *lesson.weeks)
+
+
+def _updates(lesson: Lesson) -> Iterable[object]:
+    """Return the sweep buckets a lesson is recorded in."""
+    return ("any", "every") if not lesson.weeks else ("any", *lesson.weeks)
+
+
+def _partners(lessons: Sequence[Lesson]) -> tuple[list[int | None], list[int | None]]:
+    """Return for every lesson an overlapping lesson before and after it.
+
+    Before and after refer to the order by start time; ``None`` where the
+    lesson overlaps nothing in that direction.
+    """
+    order = sorted(
+        range(len(lessons)), key=lambda i: (lessons[i].start, lessons[i].end)
+    )
+    before: list[int | None] = [None] * len(lessons)
+    after: list[int | None] = [None] * len(lessons)
+
+    latest: dict[object, _Mark] = {}
+    for index in order:
+        lesson = lessons[index]
+        marks = [latest[bucket] for bucket in _buckets(lesson) if bucket in latest]
+        if marks and (mark := max(marks))[0] > lesson.start:
+            before[index] = mark[1]
+        for bucket in _updates(lesson):
+            if bucket not in latest or latest[bucket][0] < lesson.end:
+                latest[bucket] = (lesson.end, index)
+
+    earliest: dict[object, _Mark] = {}
+    for index in reversed(order):
+        lesson = lessons[index]
+        marks = [earliest[bucket] for bucket in _buckets(lesson) if bucket in earliest]
+        if marks and (mark := min(marks))[0] < lesson.end:
+            after[index] = mark[1]
+        for bucket in _updates(lesson):
+            earliest[bucket] = (lesson.start, index)
+    return before, after
+
+
+def day_conflicts(lessons: Sequence[Mapping[str, Any]]) -> list[tuple[int, int]]:
+    """Return ``(index, other)`` for every lesson overlapping an earlier one.
+
+    ``other`` is the overlapped lesson that ends last; a lesson overlapping
+    several earlier ones is reported once.
+    """
+    before, _ = _partners([Lesson(lesson) for lesson in lessons])
+    return [(index, other) for index, other in enumerate(before) if other is not None]
+
+
+def find_conflicts(
+    lessons: Mapping[str, Sequence[Mapping[str, Any]]],
+) -> list[Conflict]:
+    """Return the overlapping lessons of every weekday."""
+    return [
+        Conflict(weekday, index, other)
+        for weekday, day in lessons.items()
+        for index, other in day_conflicts(day)
+    ]
+
+
+def check_overlaps(
+    stored: Mapping[str, Sequence[Mapping[str, Any]]],
+    changed: Mapping[str, Sequence[Mapping[str, Any]]],
+) -> None:
+    """Raise if the ``changed`` days add lessons that overlap others.
+
+    Overlaps already stored are left alone, so a day that has some can
+    still be edited, for example to remove one of the lessons.
+    """
+    conflicts: list[Conflict] = []
+    for weekday, day in changed.items():
+        added = Counter(map(_key, day)) - Counter(map(_key, stored.get(weekday, ())))
+        if not added:
+            continue
+        before, after = _partners([Lesson(lesson) for lesson in day])
+        for index, lesson in enumerate(day):
+            if added[_key(lesson)] <= 0:
+                continue
+            if (other := before[index]) is not None:
+                conflicts.append(Conflict(weekday, index, other))
+            elif (other := after[index]) is not None:
+                conflicts.append(Conflict(weekday, other, index))
+    if conflicts:
+        # Two added lessons overlapping each other are found from both sides
+        raise OverlapError(list(dict.fromkeys(conflicts)), changed)
+
+
+def describe(
+    conflict: Conflict, lessons: Mapping[str, Sequence[Mapping[str, Any]]]
+) -> str:
+    """Return a conflict as ``monday 08:30-09:15 Art overlaps 08:00-08:45 Math``."""
+    day = lessons[conflict.weekday]
+
+    def label(lesson: Mapping[str, Any]) -> str:
+        times = f"{lesson['start_time']}-{lesson['end_time']}"
+        return f"{times} {lesson['subject']}" if lesson.get("subject") else times
+
+    return (
+        f"{conflict.weekday} {label(day[conflict.index])} "
+        f"overlaps {label(day[conflict.other])}"
+    )
@@ -1,16 +1,100 @@
-"""Panel view registration for TimeTable Manager."""
+"""Panel view registration and calendar feed for TimeTable."""
 from __future__ import annotations
 
+from datetime import date
+from hashlib import blake2b
+from hmac import compare_digest
+from http import HTTPStatus
 import logging
 
+from aiohttp import web
+
 from homeassistant.components.frontend import async_register_built_in_panel
-from homeassistant.components.http import StaticPathConfig
+from homeassistant.components.http import HomeAssistantView, StaticPathConfig
 from homeassistant.core import HomeAssistant
 
-from .const import DOMAIN, PANEL_FILENAME, PANEL_ICON, PANEL_NAME, PANEL_URL
+from .const import DOMAIN, ICS_URL, PANEL_FILENAME, PANEL_ICON, PANEL_NAME, PANEL_URL
+from .coordinator import async_find_coordinator
+from .ics import iter_calendar
 
 _LOGGER = logging.getLogger(__name__)
 
+# Lines buffered before each write of the streamed feed
+ICS_CHUNK_LINES = 200
+
+
+class TimetableIcsView(HomeAssistantView):
+    """Serve a timetable as an iCalendar feed.
+
+    Calendar apps cannot send Home Assistant credentials, so the URL carries
+    a per-timetable secret instead. The ETag is derived from the schedule
+    revision and the settings that shape the feed, so polling clients get a
+    304 without the feed being generated until the timetable changes.
+    """
+
+    url = ICS_URL
+    name = "api:timetable:ics"
+    requires_auth = False
+
+    async def get(
+        self, request: web.Request, entry_id: str, token: str
+    ) -> web.StreamResponse:
+        """Stream the feed of a timetable."""
+        hass: HomeAssistant = request.app["hass"]
+        coordinator = async_find_coordinator(hass, entry_id)
+        # The secret is only created by an admin asking for the URL
+        if (
+            coordinator is None
+            or (feed_token := coordinator.store.feed_token) is None
+            or not compare_digest(token, feed_token)
+        ):
+            return web.Response(status=HTTPStatus.NOT_FOUND)
+
+        name = coordinator.config_entry.options.get("name", coordinator.config_entry.title)
+        time_zone = hass.config.time_zone
+        # Series start on 1 January of the previous year
+        anchor = date(coordinator.clock.now().year - 1, 1, 1)
+        key = repr(
+            (
+                coordinator.store.revision,
+                coordinator.schedule.include_weekends,
+                coordinator.schedule.rotation.weeks,
+                coordinator.schedule.rotation.anchor,
+                coordinator.schedule.rotation.skip_vacations,
+                name,
+                time_zone,
+                anchor,
+            )
+        )
+        etag = f'"{blake2b(key.encode(), digest_size=8).hexdigest()}"'
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in request.headers.get("If-None-Match", ""):
+            return web.Response(status=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+        response = web.StreamResponse(
+            headers={
+                **headers,
+                "Content-Type": "text/calendar; charset=utf-8",
+                "Content-Disposition": f'inline; filename="{coordinator.schedule_id}.ics"',
+            }
+        )
+        await response.prepare(request)
+        chunk: list[str] = []
+        for line in iter_calendar(
+            coordinator.schedule,
+            name=name,
+            uid_prefix=entry_id,
+            time_zone=time_zone,
+            anchor=anchor,
+        ):
+            chunk.append(line)
+            if len(chunk) >= ICS_CHUNK_LINES:
+                await response.write("".join(chunk).encode())
+                chunk.clear()
+        await response.write("".join(chunk).encode())
+        await response.write_eof()
+        return response
+
 
 async def async_setup_view(hass: HomeAssistant) -> None:
     """Set up the TimeTable Manager panel."""
@@ -29,6 +113,7 @@ async def async_setup_view(hass: HomeAssistant) -> None:
     ]
 
     await hass.http.async_register_static_paths(static_paths)
+    hass.http.register_view(TimetableIcsView())
 
     # Register the custom panel
     async_register_built_in_panel(
@@ -0,0 +1,595 @@
+"""Websocket API for TimeTable."""
+from __future__ import annotations
+
+from collections.abc import Awaitable
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv, entity_registry as er
+from homeassistant.helpers.json import json_bytes
+
+from .const import (
+    ATTR_CONFLICTS,
+    ATTR_COUNT,
+    ATTR_END_DATE,
+    ATTR_EXCEPTION,
+    ATTR_EXCEPTION_INDEX,
+    ATTR_LESSON,
+    ATTR_LESSON_INDEX,
+    ATTR_OCCURRENCES,
+    ATTR_SCHEDULE_ID,
+    ATTR_START_DATE,
+    ATTR_UPCOMING,
+    ATTR_VACATION,
+    ATTR_VACATION_INDEX,
+    ATTR_WEEKDAY,
+    ICS_URL,
+    MAX_UPCOMING_LESSONS,
+    UPCOMING_LESSONS,
+    WEEKDAYS,
+)
+from .coordinator import (
+    TimetableCoordinator,
+    async_find_coordinator,
+    async_get_coordinators,
+)
+from .schemas import (
+    EXCEPTION_SCHEMA,
+    LESSON_CHANGES_SCHEMA,
+    LESSON_SCHEMA,
+    VACATION_CHANGES_SCHEMA,
+    VACATION_SCHEMA,
+)
+from .validation import describe, find_conflicts
+
+# Coordinator data pushed to subscribers. Lessons are referenced by index into
+# the weekday lists of the snapshot, so lesson dicts are only sent on edits.
+SUBSCRIPTION_STATE_KEYS = (
+    "state",
+    "current_lesson_index",
+    "next_lesson_index",
+    "remaining_today_count",
+    "is_vacation",
+    "vacation_name",
+    "next_vacation_start",
+    "days_until_vacation",
+    "is_school_day",
+    "is_schooltime",
+    "weekday",
+    "week",
+)
+
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """Register the TimeTable websocket commands."""
+    websocket_api.async_register_command(hass, ws_list_schedules)
+    websocket_api.async_register_command(hass, ws_get_schedule)
+    websocket_api.async_register_command(hass, ws_get_feed_url)
+    websocket_api.async_register_command(hass, ws_set_schedule)
+    websocket_api.async_register_command(hass, ws_add_lesson)
+    websocket_api.async_register_command(hass, ws_update_lesson)
+    websocket_api.async_register_command(hass, ws_remove_lesson)
+    websocket_api.async_register_command(hass, ws_add_vacation)
+    websocket_api.async_register_command(hass, ws_update_vacation)
+    websocket_api.async_register_command(hass, ws_remove_vacation)
+    websocket_api.async_register_command(hass, ws_add_exception)
+    websocket_api.async_register_command(hass, ws_remove_exception)
+    websocket_api.async_register_command(hass, ws_subscribe)
+    websocket_api.async_register_command(hass, ws_get_occurrences)
+    websocket_api.async_register_command(hass, ws_get_upcoming)
+    websocket_api.async_register_command(hass, ws_get_conflicts)
+
+
+def _schedule_settings(coordinator: TimetableCoordinator) -> dict[str, Any]:
+    """Return the settings sent along with a schedule."""
+    entry = coordinator.config_entry
+    return {
+        "name": entry.options.get("name", entry.title),
+        "include_weekends": entry.options.get("include_weekends", False),
+    }
+
+
+def _observe_payload(
+    coordinator: TimetableCoordinator, payload: dict[str, Any]
+) -> None:
+    """Record the serialized size of a payload, if statistics are enabled."""
+    if coordinator.stats.enabled:
+        coordinator.stats.observe("ws_payload_bytes", len(json_bytes(payload)))
+
+
+def _get_coordinator(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> TimetableCoordinator | None:
+    """Return the coordinator addressed by ``msg`` or send an error."""
+    entry_id = msg.get("entry_id")
+    if "entity_id" in msg:
+        # Cards only know their entity; resolve it to the owning entry
+        entity_entry = er.async_get(hass).async_get(msg["entity_id"])
+        entry_id = entity_entry.config_entry_id if entity_entry else ""
+    coordinator = async_find_coordinator(hass, entry_id, msg.get(ATTR_SCHEDULE_ID))
+    if coordinator is None:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_NOT_FOUND, "TimeTable entry not found"
+        )
+    return coordinator
+
+
+async def _async_mutate(
+    connection: websocket_api.ActiveConnection, msg: dict[str, Any], mutation: Awaitable[None]
+) -> None:
+    """Await a coordinator mutation and report the result."""
+    try:
+        await mutation
+    except ValueError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(err))
+        return
+    connection.send_result(msg["id"])
+
+
+@websocket_api.websocket_command({vol.Required("type"): "timetable/schedules/list"})
+@callback
+def ws_list_schedules(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """List the loaded timetables."""
+    connection.send_result(
+        msg["id"],
+        [
+            {
+                "entry_id": coordinator.config_entry.entry_id,
+                ATTR_SCHEDULE_ID: coordinator.schedule_id,
+                "name": coordinator.config_entry.title,
+            }
+            for coordinator in async_get_coordinators(hass)
+        ],
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/schedule/get",
+        vol.Optional("entry_id"): str,
+        vol.Optional("entity_id"): str,
+        vol.Optional(ATTR_SCHEDULE_ID): str,
+    }
+)
+@callback
+def ws_get_schedule(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the stored schedule of a timetable."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    schedule = {
+        "entry_id": coordinator.config_entry.entry_id,
+        **_schedule_settings(coordinator),
+        "lessons": coordinator.store.data["lessons"],
+        "vacations": coordinator.store.data["vacations"],
+        "exceptions": coordinator.store.data["exceptions"],
+        "revision": coordinator.store.revision,
+    }
+    _observe_payload(coordinator, schedule)
+    connection.send_result(msg["id"], schedule)
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/feed_url",
+        vol.Required("entry_id"): str,
+    }
+)
+@websocket_api.require_admin
+@callback
+def ws_get_feed_url(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the URL of the calendar feed, creating its secret on first use.
+
+    The URL grants unauthenticated read access to the timetable.
+    """
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    connection.send_result(
+        msg["id"],
+        {
+            "ics_url": ICS_URL.format(
+                entry_id=coordinator.config_entry.entry_id,
+                token=coordinator.store.async_get_feed_token(),
+            )
+        },
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/schedule/set",
+        vol.Required("entry_id"): str,
+        vol.Optional("lessons"): {vol.In(WEEKDAYS): [LESSON_SCHEMA]},
+        vol.Optional("vacations"): [VACATION_SCHEMA],
+        vol.Optional("exceptions"): [EXCEPTION_SCHEMA],
+        vol.Optional("name"): str,
+        vol.Optional("include_weekends"): bool,
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_set_schedule(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Replace the schedule of a timetable as a whole."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+
+    await _async_mutate(
+        connection,
+        msg,
+        coordinator.async_set_schedule(
+            {
+                key: msg[key]
+                for key in ("lessons", "vacations", "exceptions")
+                if key in msg
+            },
+            {key: msg[key] for key in ("name", "include_weekends") if key in msg},
+        ),
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/lesson/add",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+        vol.Required(ATTR_LESSON): LESSON_SCHEMA,
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_add_lesson(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Add a lesson."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(
+        connection, msg, coordinator.async_add_lesson(msg[ATTR_WEEKDAY], msg[ATTR_LESSON])
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/lesson/update",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+        vol.Required(ATTR_LESSON_INDEX): vol.Coerce(int),
+        vol.Required(ATTR_LESSON): LESSON_CHANGES_SCHEMA,
+        vol.Optional("target_weekday"): vol.In(WEEKDAYS),
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_update_lesson(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Update a lesson, optionally moving it to another weekday."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(
+        connection,
+        msg,
+        coordinator.async_update_lesson(
+            msg[ATTR_WEEKDAY],
+            msg[ATTR_LESSON_INDEX],
+            msg[ATTR_LESSON],
+            msg.get("target_weekday"),
+        ),
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/lesson/remove",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_WEEKDAY): vol.In(WEEKDAYS),
+        vol.Required(ATTR_LESSON_INDEX): vol.Coerce(int),
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_remove_lesson(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Remove a lesson."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(
+        connection,
+        msg,
+        coordinator.async_remove_lesson(msg[ATTR_WEEKDAY], msg[ATTR_LESSON_INDEX]),
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/vacation/add",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_VACATION): VACATION_SCHEMA,
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_add_vacation(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Add a vacation period."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(connection, msg, coordinator.async_add_vacation(msg[ATTR_VACATION]))
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/vacation/update",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_VACATION_INDEX): vol.Coerce(int),
+        vol.Required(ATTR_VACATION): VACATION_CHANGES_SCHEMA,
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_update_vacation(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Update a vacation period."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(
+        connection,
+        msg,
+        coordinator.async_update_vacation(msg[ATTR_VACATION_INDEX], msg[ATTR_VACATION]),
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/vacation/remove",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_VACATION_INDEX): vol.Coerce(int),
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_remove_vacation(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Remove a vacation period."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(
+        connection, msg, coordinator.async_remove_vacation(msg[ATTR_VACATION_INDEX])
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/exception/add",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_EXCEPTION): EXCEPTION_SCHEMA,
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_add_exception(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Add a date-specific exception."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(
+        connection, msg, coordinator.async_add_exception(msg[ATTR_EXCEPTION])
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/exception/remove",
+        vol.Required("entry_id"): str,
+        vol.Required(ATTR_EXCEPTION_INDEX): vol.Coerce(int),
+    }
+)
+@websocket_api.require_admin
+@websocket_api.async_response
+async def ws_remove_exception(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Remove a date-specific exception."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    await _async_mutate(
+        connection, msg, coordinator.async_remove_exception(msg[ATTR_EXCEPTION_INDEX])
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/subscribe",
+        vol.Optional("entry_id"): str,
+        vol.Optional("entity_id"): str,
+        vol.Optional(ATTR_SCHEDULE_ID): str,
+    }
+)
+@callback
+def ws_subscribe(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Push a schedule snapshot, then deltas whenever the timetable changes.
+
+    The first event carries the whole schedule and state. Later events only
+    carry the weekdays, vacations, exceptions, settings and state keys that
+    changed, and refreshes that change nothing send nothing.
+    """
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+
+    sent: dict[str, Any] = {}
+
+    @callback
+    def _async_collect() -> dict[str, Any]:
+        """Return what changed since the last event and remember it."""
+        lessons = coordinator.store.data["lessons"]
+        vacations = coordinator.store.data["vacations"]
+        exceptions = coordinator.store.data["exceptions"]
+        settings = _schedule_settings(coordinator)
+        data = coordinator.data or {}
+        state = {key: data.get(key) for key in SUBSCRIPTION_STATE_KEYS}
+        # Lessons of today when exceptions change them from the weekday list
+        today = data.get("today_lessons") if data.get("has_exceptions") else None
+
+        delta: dict[str, Any] = {}
+        # Edits replace only the lists they touch, so identity spots changes
+        previous = sent.get("lessons", {})
+        changed_days = {
+            weekday: lessons.get(weekday, [])
+            for weekday in WEEKDAYS
+            if lessons.get(weekday) is not previous.get(weekday)
+        }
+        if changed_days:
+            delta["lessons"] = changed_days
+        if vacations is not sent.get("vacations"):
+            delta["vacations"] = vacations
+        if exceptions is not sent.get("exceptions"):
+            delta["exceptions"] = exceptions
+        if "today" not in sent or today != sent["today"]:
+            delta["today"] = today
+        if settings != sent.get("settings"):
+            delta.update(settings)
+        changed_state = {
+            key: value
+            for key, value in state.items()
+            if key not in sent.get("state", {}) or sent["state"][key] != value
+        }
+        if changed_state:
+            delta["state"] = changed_state
+
+        sent.update(
+            lessons=lessons,
+            vacations=vacations,
+            exceptions=exceptions,
+            today=today,
+            settings=settings,
+            state=state,
+        )
+        return delta
+
+    @callback
+    def _async_send(event: dict[str, Any]) -> None:
+        """Send an event tagged with the current revision."""
+        event = {**event, "revision": coordinator.store.revision}
+        _observe_payload(coordinator, event)
+        connection.send_message(websocket_api.event_message(msg["id"], event))
+
+    @callback
+    def _async_coordinator_updated() -> None:
+        """Send the changes of a refresh, if any."""
+        if delta := _async_collect():
+            _async_send(delta)
+
+    connection.subscriptions[msg["id"]] = coordinator.async_add_listener(
+        _async_coordinator_updated
+    )
+    connection.send_result(msg["id"])
+    _async_send(
+        {
+            "snapshot": True,
+            "entry_id": coordinator.config_entry.entry_id,
+            **_async_collect(),
+        }
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/occurrences",
+        vol.Optional("entry_id"): str,
+        vol.Optional("entity_id"): str,
+        vol.Optional(ATTR_SCHEDULE_ID): str,
+        vol.Required(ATTR_START_DATE): cv.date,
+        vol.Required(ATTR_END_DATE): cv.date,
+    }
+)
+@callback
+def ws_get_occurrences(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the lesson occurrences of a date range."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    try:
+        occurrences = coordinator.get_occurrences(msg[ATTR_START_DATE], msg[ATTR_END_DATE])
+    except ValueError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(err))
+        return
+    connection.send_result(
+        msg["id"],
+        {ATTR_OCCURRENCES: [occurrence.as_dict() for occurrence in occurrences]},
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/upcoming",
+        vol.Optional("entry_id"): str,
+        vol.Optional("entity_id"): str,
+        vol.Optional(ATTR_SCHEDULE_ID): str,
+        vol.Optional(ATTR_COUNT, default=UPCOMING_LESSONS): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=MAX_UPCOMING_LESSONS)
+        ),
+    }
+)
+@callback
+def ws_get_upcoming(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the next lessons, looking ahead across days and vacations."""
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    connection.send_result(
+        msg["id"], {ATTR_UPCOMING: coordinator.get_upcoming(msg[ATTR_COUNT])}
+    )
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): "timetable/conflicts",
+        vol.Required("entry_id"): str,
+        vol.Optional("lessons"): {vol.In(WEEKDAYS): [LESSON_SCHEMA]},
+    }
+)
+@callback
+def ws_get_conflicts(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Return the overlapping lessons of the stored or of the given lessons.
+
+    Lets the panel check a whole draft week in one request before saving.
+    """
+    if (coordinator := _get_coordinator(hass, connection, msg)) is None:
+        return
+    lessons = msg.get("lessons", coordinator.store.data["lessons"])
+    try:
+        conflicts = find_conflicts(lessons)
+    except ValueError as err:
+        connection.send_error(msg["id"], websocket_api.ERR_INVALID_FORMAT, str(err))
+        return
+    connection.send_result(
+        msg["id"],
+        {
+            ATTR_CONFLICTS: [
+                {**conflict.as_dict(), "message": describe(conflict, lessons)}
+                for conflict in conflicts
+            ]
+        },
+    )
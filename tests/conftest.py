@@ -0,0 +1,25 @@
+"""Fixtures for TimeTable tests."""
+from __future__ import annotations
+
+import pytest
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.timetable.const import ATTR_SCHEDULE_ID, DEFAULT_SCHEDULE_ID, DOMAIN
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations: None) -> None:
+    """Load the integration from custom_components."""
+
+
+@pytest.fixture
+def config_entry() -> MockConfigEntry:
+    """Return the config entry of the default timetable."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        title="My Timetable",
+        unique_id=DOMAIN,
+        data={ATTR_SCHEDULE_ID: DEFAULT_SCHEDULE_ID},
+        options={"name": "My Timetable", "include_weekends": False},
+    )
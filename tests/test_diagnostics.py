@@ -0,0 +1,38 @@
+"""Tests for the TimeTable diagnostics."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.timetable.const import DOMAIN
+from custom_components.timetable.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+
+async def test_invalid_lessons_are_counted(
+    hass: HomeAssistant, config_entry: MockConfigEntry
+) -> None:
+    """Invalid stored lessons are counted instead of failing the download."""
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+    store = hass.data[DOMAIN][config_entry.entry_id]["store"]
+    store.data = {
+        **store.data,
+        "lessons": {
+            "monday": [
+                {"subject": "Math", "start_time": "08:00", "end_time": "08:45"},
+                {"subject": "Art", "start_time": "08:30", "end_time": "09:15"},
+                {"subject": "Broken", "start_time": "25:00", "end_time": "09:00"},
+                {"subject": "Missing", "start_time": "10:00"},
+            ]
+        },
+    }
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, config_entry)
+
+    assert diagnostics["schedule"]["invalid_lessons"] == 2
+    assert diagnostics["schedule"]["overlapping_lessons"] == 1
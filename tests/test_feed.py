@@ -0,0 +1,97 @@
+"""Tests for the calendar feed URL and view."""
+from __future__ import annotations
+
+from http import HTTPStatus
+
+from homeassistant.auth.models import User
+from homeassistant.core import HomeAssistant
+from homeassistant.setup import async_setup_component
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.typing import (
+    ClientSessionGenerator,
+    WebSocketGenerator,
+)
+
+from custom_components.timetable.const import DOMAIN
+from custom_components.timetable.store import TimetableStore
+
+
+def _store(hass: HomeAssistant, config_entry: MockConfigEntry) -> TimetableStore:
+    """Return the store of the timetable of ``config_entry``."""
+    return hass.data[DOMAIN][config_entry.entry_id]["store"]
+
+
+async def _setup(hass: HomeAssistant, config_entry: MockConfigEntry) -> None:
+    """Set up the timetable of ``config_entry``."""
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+
+async def test_schedule_get_does_not_create_token(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    hass_ws_client: WebSocketGenerator,
+) -> None:
+    """Reading the schedule neither returns nor creates the feed secret."""
+    await _setup(hass, config_entry)
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "timetable/schedule/get", "entry_id": config_entry.entry_id}
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    assert "ics_url" not in msg["result"]
+    assert _store(hass, config_entry).feed_token is None
+
+
+async def test_feed_url_requires_admin(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    hass_ws_client: WebSocketGenerator,
+    hass_admin_user: User,
+) -> None:
+    """Only admins get the feed URL."""
+    await _setup(hass, config_entry)
+    hass_admin_user.groups = []
+    client = await hass_ws_client(hass)
+
+    await client.send_json_auto_id(
+        {"type": "timetable/feed_url", "entry_id": config_entry.entry_id}
+    )
+    msg = await client.receive_json()
+    assert not msg["success"]
+    assert msg["error"]["code"] == "unauthorized"
+    assert _store(hass, config_entry).feed_token is None
+
+
+async def test_feed_url_serves_calendar(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    hass_ws_client: WebSocketGenerator,
+    hass_client_no_auth: ClientSessionGenerator,
+) -> None:
+    """The feed is served at the URL given to admins and nowhere else."""
+    await _setup(hass, config_entry)
+    http = await hass_client_no_auth()
+    guessed = f"/api/timetable/ics/{config_entry.entry_id}/guess"
+
+    response = await http.get(guessed)
+    assert response.status == HTTPStatus.NOT_FOUND
+    assert _store(hass, config_entry).feed_token is None
+
+    client = await hass_ws_client(hass)
+    await client.send_json_auto_id(
+        {"type": "timetable/feed_url", "entry_id": config_entry.entry_id}
+    )
+    msg = await client.receive_json()
+    assert msg["success"]
+    url = msg["result"]["ics_url"]
+    assert url.endswith(_store(hass, config_entry).feed_token)
+
+    response = await http.get(url)
+    assert response.status == HTTPStatus.OK
+    assert "BEGIN:VTIMEZONE" in await response.text()
+    assert (await http.get(guessed)).status == HTTPStatus.NOT_FOUND
@@ -0,0 +1,78 @@
+"""Tests for the iCalendar feed."""
+from __future__ import annotations
+
+from datetime import date
+
+from custom_components.timetable.const import (
+    CONF_ROTATION_ANCHOR,
+    CONF_ROTATION_SKIP_VACATIONS,
+    CONF_ROTATION_WEEKS,
+)
+from custom_components.timetable.ics import iter_calendar, vtimezone
+from custom_components.timetable.schedule import CompiledSchedule
+
+DATA = {
+    "lessons": {
+        "monday": [{"subject": "Math", "start_time": "08:00", "end_time": "08:45"}],
+    },
+    # Skipped by the rotation, so the first series ends on Sunday 26 October
+    "vacations": [
+        {"start_date": "2025-10-27", "end_date": "2025-10-31", "label": "Autumn"}
+    ],
+    "exceptions": [],
+}
+
+OPTIONS = {
+    CONF_ROTATION_WEEKS: 2,
+    CONF_ROTATION_ANCHOR: "2025-09-01",
+    CONF_ROTATION_SKIP_VACATIONS: True,
+}
+
+
+def _calendar(time_zone: str) -> list[str]:
+    """Return the unfolded lines of the test calendar."""
+    lines = iter_calendar(
+        CompiledSchedule.from_data(DATA, OPTIONS),
+        name="Test",
+        uid_prefix="entry",
+        time_zone=time_zone,
+        anchor=date(2025, 1, 1),
+    )
+    return [line.rstrip("\r\n") for line in lines]
+
+
+def test_vtimezone_rules() -> None:
+    """Daylight saving changes become yearly rules."""
+    lines = [line.rstrip("\r\n") for line in vtimezone("Europe/Berlin", 2025)]
+    assert lines[:2] == ["BEGIN:VTIMEZONE", "TZID:Europe/Berlin"]
+    assert "DTSTART:20250330T020000" in lines
+    assert "RRULE:FREQ=YEARLY;BYMONTH=3;BYDAY=-1SU" in lines
+    assert "RRULE:FREQ=YEARLY;BYMONTH=10;BYDAY=-1SU" in lines
+    assert "TZOFFSETTO:+0200" in lines
+
+
+def test_vtimezone_without_daylight_saving() -> None:
+    """A zone without changes has a single standard observance."""
+    lines = [line.rstrip("\r\n") for line in vtimezone("UTC", 2025)]
+    assert lines.count("BEGIN:STANDARD") == 1
+    assert "BEGIN:DAYLIGHT" not in lines
+    assert "TZOFFSETFROM:+0000" in lines
+
+
+def test_calendar_defines_its_time_zone() -> None:
+    """Every TZID used by the events is defined by a VTIMEZONE."""
+    lines = _calendar("America/Los_Angeles")
+    assert "TZID:America/Los_Angeles" in lines
+    assert lines.index("BEGIN:VTIMEZONE") < lines.index("BEGIN:VEVENT")
+
+
+def test_until_is_local_end_of_day() -> None:
+    """UNTIL is the end of the last local day, as a UTC time."""
+    rules = [line for line in _calendar("America/Los_Angeles") if "UNTIL=" in line]
+    # 23:59:59 PDT on Sunday 26 October is 06:59:59 UTC on Monday
+    assert rules
+    assert all(line.endswith("UNTIL=20251027T065959Z") for line in rules)
+
+    rules = [line for line in _calendar("Europe/Berlin") if "UNTIL=" in line]
+    # 23:59:59 CET on Sunday 26 October is 22:59:59 UTC on the same day
+    assert all(line.endswith("UNTIL=20251026T225959Z") for line in rules)
@@ -0,0 +1,88 @@
+"""Tests for the iCalendar and CSV import."""
+from __future__ import annotations
+
+from datetime import timezone
+
+import pytest
+
+from custom_components.timetable.importer import TemplateBuilder, parse_ics
+
+
+def _import(*events: str, min_occurrences: int = 2) -> TemplateBuilder:
+    """Parse VEVENTs given as newline-separated properties."""
+    lines = ["BEGIN:VCALENDAR"]
+    for event in events:
+        lines += ["BEGIN:VEVENT", *event.strip().splitlines(), "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+    builder = TemplateBuilder(min_occurrences)
+    parse_ics(lines, builder, timezone.utc)
+    return builder
+
+
+def test_open_ended_series_is_a_lesson() -> None:
+    """A weekly series without an end becomes a lesson of every BYDAY."""
+    builder = _import(
+        """
+DTSTART:20250901T080000
+DTEND:20250901T084500
+SUMMARY:Math
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE
+"""
+    )
+    lessons = builder.build()["lessons"]
+    assert [lesson["subject"] for lesson in lessons["monday"]] == ["Math"]
+    assert [lesson["subject"] for lesson in lessons["wednesday"]] == ["Math"]
+    assert not builder.errors
+
+
+@pytest.mark.parametrize(
+    ("rule", "exdate", "expected"),
+    [
+        # Three Mondays and two Wednesdays
+        ("RRULE:FREQ=WEEKLY;BYDAY=MO,WE;COUNT=5", "", {"monday"}),
+        # UNTIL at 07:00 UTC ends before the lesson of 15 September
+        ("RRULE:FREQ=WEEKLY;UNTIL=20250915T070000Z", "", set()),
+        ("RRULE:FREQ=WEEKLY;UNTIL=20250915", "", {"monday"}),
+        ("RRULE:FREQ=WEEKLY;UNTIL=20250915", "EXDATE:20250908T080000", set()),
+    ],
+)
+def test_bounded_series_counts_occurrences(
+    rule: str, exdate: str, expected: set[str]
+) -> None:
+    """Series with an end count their occurrences, less the excluded dates."""
+    builder = _import(
+        f"""
+DTSTART:20250901T080000
+DTEND:20250901T084500
+SUMMARY:Math
+{rule}
+{exdate}
+""",
+        min_occurrences=3,
+    )
+    assert set(builder.build()["lessons"]) == expected
+    assert not builder.errors
+
+
+@pytest.mark.parametrize(
+    ("rule", "message"),
+    [
+        ("FREQ=WEEKLY;INTERVAL=2;BYDAY=MO", "INTERVAL=2"),
+        ("FREQ=DAILY", "frequency DAILY"),
+        ("FREQ=WEEKLY;BYSETPOS=1", "part BYSETPOS"),
+    ],
+)
+def test_unsupported_rule_is_reported(rule: str, message: str) -> None:
+    """Rules that cannot become weekly lessons are errors, not dropped."""
+    builder = _import(
+        f"""
+DTSTART:20250901T080000
+DTEND:20250901T084500
+SUMMARY:Math
+RRULE:{rule}
+"""
+    )
+    assert len(builder.errors) == 1
+    assert message in builder.errors[0]
+    with pytest.raises(ValueError):
+        builder.raise_for_errors()
@@ -0,0 +1,52 @@
+"""Tests for the compiled schedule."""
+from __future__ import annotations
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from custom_components.timetable.schedule import CompiledSchedule
+
+# Monday
+NOW = datetime(2026, 9, 14, 8, 10, tzinfo=ZoneInfo("Europe/Berlin"))
+
+LESSONS = {
+    "monday": [
+        {"subject": "Math", "start_time": "08:00", "end_time": "08:45"},
+        {"subject": "Art", "start_time": "08:50", "end_time": "09:35"},
+    ]
+}
+
+
+def test_evaluate_school_day() -> None:
+    """A lesson in progress is current and ends at its end time."""
+    schedule = CompiledSchedule.from_data({"lessons": LESSONS}, {})
+
+    data = schedule.evaluate(NOW)
+
+    assert data["state"] == "Math"
+    assert data["is_schooltime"] is True
+    assert data["current_lesson_index"] == 0
+    assert data["current_lesson_ends"] == NOW.replace(minute=45)
+    assert data["next_lesson_index"] == 1
+    assert data["remaining_today_count"] == 2
+
+
+def test_evaluate_vacation_day() -> None:
+    """No lesson of a vacation day is current or upcoming."""
+    vacation = {"label": "Autumn", "start_date": "2026-09-14", "end_date": "2026-09-18"}
+    schedule = CompiledSchedule.from_data(
+        {"lessons": LESSONS, "vacations": [vacation]}, {}
+    )
+
+    data = schedule.evaluate(NOW)
+
+    assert data["state"] == "Vacation: Autumn"
+    assert data["is_schooltime"] is False
+    assert data["current_lesson"] is None
+    assert data["current_lesson_index"] is None
+    assert data["current_lesson_ends"] is None
+    assert data["next_lesson"] is None
+    assert data["remaining_today_count"] == 0
+    assert data["next_lesson_starts"] == datetime(
+        2026, 9, 21, 8, 0, tzinfo=NOW.tzinfo
+    )
@@ -0,0 +1,57 @@
+"""Tests for the shared boundary scheduler."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from homeassistant.const import EVENT_CORE_CONFIG_UPDATE
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.timetable.const import DATA_SCHEDULER
+from custom_components.timetable.scheduler import RETRY_DELAY, async_get_scheduler
+
+
+async def test_failed_refresh_is_retried(hass: HomeAssistant) -> None:
+    """A refresh that raises keeps its timetable on the timer."""
+    scheduler = async_get_scheduler(hass)
+    calls = 0
+
+    async def action() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError("boom")
+
+    unregister = scheduler.async_register("entry", action)
+    start = dt_util.utcnow()
+    scheduler.async_schedule("entry", start + timedelta(minutes=5))
+
+    async_fire_time_changed(hass, start + timedelta(minutes=5))
+    await hass.async_block_till_done()
+    assert calls == 1
+
+    async_fire_time_changed(hass, start + timedelta(minutes=5) + RETRY_DELAY)
+    await hass.async_block_till_done()
+    assert calls == 2
+    unregister()
+
+
+async def test_last_unregister_releases_scheduler(hass: HomeAssistant) -> None:
+    """The config listener and the shared instance go with the last timetable."""
+    listeners = hass.bus.async_listeners().get(EVENT_CORE_CONFIG_UPDATE, 0)
+    scheduler = async_get_scheduler(hass)
+
+    async def action() -> None:
+        """Do nothing."""
+
+    first = scheduler.async_register("first", action)
+    second = scheduler.async_register("second", action)
+    assert hass.bus.async_listeners()[EVENT_CORE_CONFIG_UPDATE] == listeners + 1
+
+    first()
+    assert hass.data[DATA_SCHEDULER] is scheduler
+    second()
+    assert hass.bus.async_listeners().get(EVENT_CORE_CONFIG_UPDATE, 0) == listeners
+    assert DATA_SCHEDULER not in hass.data
@@ -0,0 +1,141 @@
+"""Tests for the TimeTable services."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.setup import async_setup_component
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.timetable.const import DOMAIN
+from custom_components.timetable.coordinator import TimetableCoordinator
+from custom_components.timetable.services import async_setup_services
+
+MATH = {"subject": "Math", "start_time": "08:00", "end_time": "08:45"}
+ART = {"subject": "Art", "start_time": "08:30", "end_time": "09:15"}
+
+SERVICES = (
+    "set_schedule",
+    "add_lesson",
+    "remove_lesson",
+    "add_vacation",
+    "remove_vacation",
+    "add_exception",
+    "remove_exception",
+    "batch_update",
+    "sync_substitutions",
+    "get_occurrences",
+    "import_schedule",
+)
+
+
+async def test_setup_services(hass: HomeAssistant) -> None:
+    """Every service is registered."""
+    async_setup_services(hass)
+
+    for service in SERVICES:
+        assert hass.services.has_service(DOMAIN, service), service
+
+
+async def test_setup_entry_registers_services(
+    hass: HomeAssistant, config_entry: MockConfigEntry
+) -> None:
+    """Setting up the integration registers the services and loads the entry."""
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.LOADED
+    for service in SERVICES:
+        assert hass.services.has_service(DOMAIN, service), service
+
+
+async def test_add_lesson_service(
+    hass: HomeAssistant, config_entry: MockConfigEntry
+) -> None:
+    """A lesson added through the service is stored."""
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    await hass.services.async_call(
+        DOMAIN,
+        "add_lesson",
+        {
+            "weekday": "monday",
+            "lesson": {"subject": "Math", "start_time": "08:00", "end_time": "08:45"},
+        },
+        blocking=True,
+    )
+
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    assert [
+        lesson["subject"] for lesson in coordinator.store.data["lessons"]["monday"]
+    ] == ["Math"]
+
+
+async def test_set_schedule_rejected_keeps_settings(
+    hass: HomeAssistant, config_entry: MockConfigEntry
+) -> None:
+    """A rejected schedule does not rename the timetable."""
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            "set_schedule",
+            {
+                "schedule_data": {
+                    "name": "Renamed",
+                    "include_weekends": True,
+                    "lessons": {"monday": [MATH, ART]},
+                }
+            },
+            blocking=True,
+        )
+    await hass.async_block_till_done()
+
+    assert config_entry.options["name"] == "My Timetable"
+    assert config_entry.options["include_weekends"] is False
+
+
+async def test_set_schedule_refreshes_once(
+    hass: HomeAssistant, config_entry: MockConfigEntry
+) -> None:
+    """Settings and lessons are applied with one refresh."""
+    config_entry.add_to_hass(hass)
+    assert await async_setup_component(hass, DOMAIN, {})
+    await hass.async_block_till_done()
+
+    with patch.object(
+        TimetableCoordinator,
+        "async_refresh",
+        autospec=True,
+        side_effect=TimetableCoordinator.async_refresh,
+    ) as refresh_mock:
+        await hass.services.async_call(
+            DOMAIN,
+            "set_schedule",
+            {
+                "schedule_data": {
+                    "name": "Renamed",
+                    "include_weekends": True,
+                    "lessons": {"saturday": [MATH]},
+                }
+            },
+            blocking=True,
+        )
+        await hass.async_block_till_done()
+
+    assert refresh_mock.call_count == 1
+    assert config_entry.options["name"] == "Renamed"
+    assert config_entry.options["include_weekends"] is True
+    coordinator = hass.data[DOMAIN][config_entry.entry_id]["coordinator"]
+    assert coordinator.schedule.include_weekends
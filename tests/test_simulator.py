@@ -0,0 +1,46 @@
+"""Tests for the replay of a timetable under a fake clock."""
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from homeassistant.core import HomeAssistant
+
+from simulator import SimulatedScheduler, Simulator, clock_module, const_module
+
+# Monday
+START = datetime(2026, 9, 14, tzinfo=ZoneInfo("Europe/Berlin"))
+
+DATA = {
+    "lessons": {
+        weekday: [
+            {"subject": "Math", "start_time": "08:00", "end_time": "08:45"},
+            {"subject": "Art", "start_time": "08:50", "end_time": "09:35"},
+        ]
+        for weekday in ("monday", "tuesday", "wednesday", "thursday", "friday")
+    },
+    "vacations": [],
+    "exceptions": [{"date": "2026-09-15", "type": "cancel", "start_time": "08:00"}],
+}
+
+
+async def test_replay_week(hass: HomeAssistant) -> None:
+    """The coordinator wakes up at every boundary and misses none."""
+    hass.data[const_module.DATA_SCHEDULER] = SimulatedScheduler(
+        hass, clock_module.FakeClock(START)
+    )
+    simulator = Simulator(hass, DATA, {})
+    await simulator.async_setup()
+
+    await simulator.async_run(START + timedelta(days=7), verify=True)
+
+    summary = simulator.summary()
+    assert summary["missed"] == []
+    # The first refresh, then one wakeup per timer
+    assert summary["wakeups"] == simulator.scheduler.wakeups + 1
+    assert "sensor.timetable_current" in simulator.entity_keys
+    assert "sensor.timetable_statistics" not in simulator.entity_keys
+    assert simulator.writes["binary_sensor.timetable_is_schooltime"] > 0
+    # Exceptions of past days were pruned by the coordinator
+    assert simulator.store.data["exceptions"] == []
+    await simulator.coordinator.async_shutdown()
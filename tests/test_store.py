@@ -0,0 +1,34 @@
+"""Tests for the schedule storage."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+
+from custom_components.timetable.const import SAVE_DELAY, STORAGE_KEY
+from custom_components.timetable.store import TimetableStore
+
+
+async def test_delayed_and_flushed_writes_are_recorded(
+    hass: HomeAssistant, hass_storage: dict[str, Any]
+) -> None:
+    """Both write paths count and time the disk write."""
+    store = TimetableStore(hass, "entry")
+    store.stats.enabled = True
+
+    store.async_update({"vacations": []})
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=SAVE_DELAY))
+    await hass.async_block_till_done()
+    assert hass_storage[f"{STORAGE_KEY}.entry"]["data"]["revision"] == 1
+    assert store.stats.counters["store_writes"] == 1
+    assert store.stats.histograms["store_save_ms"].count == 1
+
+    store.async_update({"vacations": []})
+    await store.async_flush()
+    assert hass_storage[f"{STORAGE_KEY}.entry"]["data"]["revision"] == 2
+    assert store.stats.counters["store_writes"] == 2
+    assert store.stats.histograms["store_save_ms"].count == 2
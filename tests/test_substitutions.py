@@ -0,0 +1,33 @@
+"""Tests for parsing substitution plans."""
+from __future__ import annotations
+
+import json
+
+from custom_components.timetable.substitutions import parse_plan
+
+
+def test_malformed_rows_are_reported() -> None:
+    """A malformed row is reported and the other rows are kept."""
+    rows = [
+        {"date": "2026-09-14", "type": "cancel", "start_time": 800},
+        {"date": "2026-09-14", "type": "replace", "start_time": "08:00", "lesson": 5},
+        {"date": "2026-09-14", "type": "replace", "start_time": "08:00", "lesson": "x"},
+        {
+            "date": "2026-09-14",
+            "type": "add",
+            "lesson": {"subject": "Art", "start_time": 900, "end_time": "09:45"},
+        },
+        {"date": "2026-09-15", "type": "cancel", "start_time": "08:00"},
+    ]
+
+    exceptions, errors = parse_plan(json.dumps(rows).encode(), "json")
+
+    assert exceptions == [
+        {"date": "2026-09-15", "type": "cancel", "start_time": "08:00"}
+    ]
+    assert errors == [
+        "row 1: start_time must be an HH:MM string",
+        "row 2: lesson must be a mapping",
+        "row 3: lesson must be a mapping",
+        "row 4: start_time must be an HH:MM string",
+    ]
@@ -48,14 +48,95 @@ class TimetableScheduleCard extends HTMLElement {
       title: config.title || 'Schedule',
       ...config
     };
+    // Follow the entity of the new configuration
+    this._unsubscribe();
+    this._subscribe();
     this.render();
   }
 
   set hass(hass) {
+    // Rendering is driven by the timetable subscription, not by state changes
     this._hass = hass;
+    this._subscribe();
+  }
+
+  connectedCallback() {
+    this._subscribe();
+  }
+
+  disconnectedCallback() {
+    this._unsubscribe();
+  }
+
+  _subscribe() {
+    if (this._subscription || !this._hass || !this._config.entity || !this.isConnected) {
+      return;
+    }
+    this._error = null;
+    this._subscription = this._hass.connection.subscribeMessage(
+      (event) => this._handleTimetableEvent(event),
+      { type: 'timetable/subscribe', entity_id: this._config.entity }
+    ).catch((err) => {
+      console.warn('TimeTable: subscription failed', err);
+      this._subscription = null;
+      this._error = err;
+      this.render();
+    });
+  }
+
+  _unsubscribe() {
+    if (this._subscription) {
+      this._subscription.then((unsubscribe) => unsubscribe && unsubscribe());
+      this._subscription = null;
+    }
+    this._timetable = null;
+  }
+
+  _handleTimetableEvent(event) {
+    // The first event is a full snapshot, later ones only carry what changed
+    if (event.snapshot) {
+      this._timetable = { lessons: {}, vacations: [], state: {} };
+    }
+    const timetable = this._timetable;
+    if (!timetable) {
+      return;
+    }
+    Object.assign(timetable.lessons, event.lessons || {});
+    Object.assign(timetable.state, event.state || {});
+    if (event.vacations) timetable.vacations = event.vacations;
+    if ('today' in event) timetable.today = event.today;
+    if ('name' in event) timetable.name = event.name;
+    if ('include_weekends' in event) timetable.include_weekends = event.include_weekends;
+    timetable.revision = event.revision;
     this.render();
   }
 
+  _getDayLessons(weekday) {
+    const timetable = this._timetable;
+    // Today's lessons with substitutions and cancellations applied
+    if (timetable && timetable.today && weekday === timetable.state.weekday) {
+      return timetable.today;
+    }
+    // Same order as the backend, which the lesson indices refer to
+    const lessons = (timetable && timetable.lessons[weekday]) || [];
+    // Only lessons of the current week of an A/B or longer rotation
+    const week = timetable && timetable.state && timetable.state.week;
+    return lessons
+      .filter((l) => !week || !l.weeks || !l.weeks.length || l.weeks.includes(week))
+      .sort((a, b) =>
+        a.start_time.localeCompare(b.start_time) || a.end_time.localeCompare(b.end_time));
+  }
+
+  _resolveLessons(state) {
+    const todayLessons = this._getDayLessons(state.weekday);
+    const pick = (index) => (index === null || index === undefined ? null : todayLessons[index] || null);
+    return {
+      currentLesson: pick(state.current_lesson_index),
+      nextLesson: pick(state.next_lesson_index),
+      todayLessons,
+    };
+  }
+
   getCardSize() {
     return this._config.compact_mode ? 6 : 10;
   }
@@ -79,8 +160,7 @@ class TimetableScheduleCard extends HTMLElement {
       return;
     }
 
-    const entityState = this._hass.states[this._config.entity];
-    if (!entityState) {
+    if (this._error) {
       this.shadowRoot.innerHTML = `
         <ha-card>
           <div style="padding: 16px; color: var(--error-color);">
@@ -90,11 +170,20 @@ class TimetableScheduleCard extends HTMLElement {
       `;
       return;
     }
+    if (!this._timetable) {
+      return;
+    }
 
-    const isVacation = entityState.attributes.is_vacation || false;
-    const vacationName = entityState.attributes.vacation_name;
-    const schedule = entityState.attributes.schedule || {};
-    const currentLesson = this._config.highlight_current ? entityState.attributes.current_lesson : null;
+    const state = this._timetable.state;
+    const isVacation = state.is_vacation || false;
+    const vacationName = state.vacation_name;
+    const schedule = {};
+    for (const day of ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']) {
+      schedule[day] = this._getDayLessons(day);
+    }
+    const currentLesson = this._config.highlight_current
+      ? this._resolveLessons(state).currentLesson
+      : null;
 
     this.shadowRoot.innerHTML = `
       ${this.getStyles()}